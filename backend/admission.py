@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+🚦 ADMISSION CONTROL
+Backpressure for the webhook: refuse work the system can't start soon, with an honest Retry-After
+"""
+
+import os
+import math
+import time
+import hashlib
+import threading
+import logging
+from collections import deque
+from typing import Dict, Any
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionDecision:
+    """🚦 Result of an admission check"""
+
+    def __init__(self, admitted: bool, reason: str = "", retry_after: int = 0, estimated_seconds: int = 0):
+        self.admitted = admitted
+        self.reason = reason
+        self.retry_after = retry_after
+        self.estimated_seconds = estimated_seconds
+
+
+class AdmissionController:
+    """🚦 Admits workflows while in-flight work and stage backlog stay under their limits
+
+    Work is counted in topics (a notes submission costs `posts_per_day`, a script or
+    prompt costs 1). Limits:
+    - `max_inflight`: topics admitted but not finished, across all clients
+    - `max_backlog`: items waiting in stage/render queues (0 disables)
+    - `client_max_inflight`: per-client topics, keyed on webhook secret or track (0 disables)
+    Retry-After and completion estimates come from the observed topic throughput.
+    """
+
+    def __init__(self):
+        self.max_inflight = int(os.getenv("ADMISSION_MAX_INFLIGHT_TOPICS", "40"))
+        self.max_backlog = int(os.getenv("ADMISSION_MAX_STAGE_BACKLOG", "100"))
+        self.client_max_inflight = int(os.getenv("ADMISSION_CLIENT_MAX_INFLIGHT", "0"))
+        self.client_key_mode = os.getenv("ADMISSION_CLIENT_KEY", "secret").lower()
+        self.default_topic_seconds = float(os.getenv("ADMISSION_DEFAULT_TOPIC_SECONDS", "120"))
+        self.throughput_window = float(os.getenv("ADMISSION_THROUGHPUT_WINDOW_SECONDS", "1800"))
+
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Dict[str, Any]] = {}  # workflow_id -> {"client", "cost", "admitted_at"}
+        self._completions: deque = deque()  # (finished_at, cost)
+        self.stats = {"admitted": 0, "rejected": 0, "rejected_client_quota": 0}
+
+    # ------------------------------------------------------------------
+    # Keys and costs
+    # ------------------------------------------------------------------
+    def client_key(self, headers: Dict, payload: Dict) -> str:
+        """Quota key: the track, or a hash of the webhook secret (never the secret itself)"""
+        if self.client_key_mode == "track":
+            return f"track:{payload.get('track') or payload.get('track_name') or 'default'}"
+        secret = headers.get('X-Webhook-Secret') or headers.get('x-webhook-secret') or payload.get('webhook_secret') or ""
+        return "secret:" + hashlib.sha256(str(secret).encode("utf-8")).hexdigest()[:12]
+
+    @staticmethod
+    def cost(payload: Dict) -> int:
+        """Topics a submission will produce"""
+        if str(payload.get("input_type", "notes")).lower() in ("script", "prompt"):
+            return 1
+        try:
+            return max(1, int(payload.get("posts_per_day", 1)))
+        except (TypeError, ValueError):
+            return 1
+
+    # ------------------------------------------------------------------
+    # Throughput estimates
+    # ------------------------------------------------------------------
+    def _topics_per_second(self, now: float) -> float:
+        while self._completions and now - self._completions[0][0] > self.throughput_window:
+            self._completions.popleft()
+        if len(self._completions) >= 2:
+            elapsed = max(60.0, now - self._completions[0][0])
+            return sum(cost for _, cost in self._completions) / elapsed
+        # No history yet: assume every in-flight slot finishes a topic per default_topic_seconds
+        return max(1, min(self.max_inflight, 4)) / self.default_topic_seconds
+
+    def _seconds_for(self, topics: float, now: float) -> int:
+        return int(math.ceil(topics / self._topics_per_second(now)))
+
+    # ------------------------------------------------------------------
+    # Admission
+    # ------------------------------------------------------------------
+    def try_admit(self, workflow_ids, client: str, cost: int, backlog: int = 0) -> AdmissionDecision:
+        """Admit `workflow_ids` (one ID or a list sharing `cost`) or explain why not
+
+        A submission larger than the limit is still admitted when nothing else is
+        in flight, so oversized requests are slow rather than impossible.
+        """
+        if isinstance(workflow_ids, str):
+            workflow_ids = [workflow_ids]
+        now = time.time()
+        with self._lock:
+            inflight = sum(e["cost"] for e in self._inflight.values())
+            client_inflight = sum(e["cost"] for e in self._inflight.values() if e["client"] == client)
+
+            overflow, reason = 0, ""
+            if self.client_max_inflight and client_inflight and client_inflight + cost > self.client_max_inflight:
+                overflow = client_inflight + cost - self.client_max_inflight
+                reason = f"client quota reached ({client_inflight:g}/{self.client_max_inflight} topics in flight)"
+                self.stats["rejected_client_quota"] += 1
+            elif inflight and inflight + cost > self.max_inflight:
+                overflow = inflight + cost - self.max_inflight
+                reason = f"at capacity ({inflight:g}/{self.max_inflight} topics in flight)"
+            elif self.max_backlog and backlog >= self.max_backlog:
+                overflow = backlog - self.max_backlog + 1
+                reason = f"stage backlog too deep ({backlog} queued)"
+
+            if reason:
+                self.stats["rejected"] += 1
+                retry_after = min(3600, max(5, self._seconds_for(overflow, now)))
+                logger.warning(f"🚦 Rejecting submission ({cost} topic(s)): {reason}; retry after {retry_after}s")
+                return AdmissionDecision(False, reason, retry_after=retry_after)
+
+            share = cost / len(workflow_ids)
+            for workflow_id in workflow_ids:
+                self._inflight[workflow_id] = {"client": client, "cost": share, "admitted_at": now}
+            self.stats["admitted"] += 1
+            return AdmissionDecision(True, estimated_seconds=self._seconds_for(inflight + cost, now))
+
+    def register(self, workflow_id: str, client: str, cost: int):
+        """Count work that bypasses admission (e.g. workflows resumed at startup)"""
+        with self._lock:
+            self._inflight[workflow_id] = {"client": client, "cost": cost, "admitted_at": time.time()}
+
+    def release(self, workflow_id: str):
+        """The workflow finished (either way); idempotent"""
+        with self._lock:
+            entry = self._inflight.pop(workflow_id, None)
+            if entry:
+                self._completions.append((time.time(), entry["cost"]))
+
+    def metrics(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            per_client: Dict[str, float] = {}
+            for entry in self._inflight.values():
+                per_client[entry["client"]] = per_client.get(entry["client"], 0) + entry["cost"]
+            return {
+                "inflight_topics": round(sum(per_client.values()), 2),
+                "max_inflight_topics": self.max_inflight,
+                "max_stage_backlog": self.max_backlog,
+                "client_max_inflight": self.client_max_inflight,
+                "client_key": self.client_key_mode,
+                "inflight_by_client": {k: round(v, 2) for k, v in per_client.items()},
+                "topics_per_minute": round(self._topics_per_second(now) * 60, 2),
+                **self.stats,
+            }
+
+
+def format_eta(seconds: int) -> str:
+    """Human estimate for the webhook response ("~3 minutes")"""
+    minutes = max(1, int(math.ceil(seconds / 60)))
+    return f"~{minutes} minute{'s' if minutes != 1 else ''}"
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+📒 ARTIFACT MANIFEST
+Per-topic record of each pipeline stage's inputs, outputs and content hashes
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+import logging
+from typing import Dict, List, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = ".manifest.json"
+
+# Every manifest read-modify-write goes through this lock so background upload
+# callbacks and the pipeline thread never overwrite each other's changes
+_manifest_lock = threading.RLock()
+
+
+def hash_value(value: Any) -> str:
+    """Stable hash of a JSON-able value"""
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def hash_file(path: str) -> Optional[str]:
+    """sha256 of a file's content; None when it can't be read"""
+    try:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+    except OSError:
+        return None
+
+
+def file_fingerprint(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return {"sha256": hash_file(path), "size": st.st_size, "mtime": st.st_mtime}
+
+
+class ArtifactManifest:
+    """📒 `.manifest.json` inside a topic folder
+
+    - `source`: the topic as submitted (plus any re-run overrides)
+    - `stages[name]`: inputs + their hash, outputs, and fingerprints of output files
+    - `image_slots[n]`: the image generated for slot n and the hash of its prompt
+    - `uploads`: local file path -> Drive link, filled in as uploads finish
+    A stage is current when its inputs hash matches and every recorded output
+    file still exists with the same content, or was uploaded to Drive (retention
+    may delete uploaded intermediates locally).
+    """
+
+    def __init__(self, folder: str):
+        self.folder = os.path.abspath(folder)
+        self.path = os.path.join(self.folder, MANIFEST_FILE)
+
+    @classmethod
+    def find(cls, base_dir: str, topic_id: str) -> Optional["ArtifactManifest"]:
+        """Locate the manifest for a TopicID under generated_content"""
+        if not topic_id or not os.path.isdir(base_dir):
+            return None
+        for name in sorted(os.listdir(base_dir)):
+            if name.startswith(f"{topic_id}_") and os.path.exists(os.path.join(base_dir, name, MANIFEST_FILE)):
+                manifest = cls(os.path.join(base_dir, name))
+                if manifest.load().get("topic_id") == topic_id:
+                    return manifest
+        return None
+
+    def load(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def _save(self, data: Dict[str, Any]):
+        try:
+            os.makedirs(self.folder, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, default=str)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not write artifact manifest {self.path}: {e}")
+
+    def _update(self, updater):
+        with _manifest_lock:
+            data = self.load()
+            updater(data)
+            data["updated_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+            self._save(data)
+
+    # ------------------------------------------------------------------
+    # Source topic
+    # ------------------------------------------------------------------
+    def init_source(self, topic_data: Dict):
+        """Remember the submitted topic (first run only)"""
+        def updater(data):
+            if not data.get("source"):
+                data["topic_id"] = topic_data.get("TopicID", "")
+                data["source"] = topic_data
+                data.setdefault("stages", {})
+                data.setdefault("uploads", {})
+        self._update(updater)
+
+    def source(self) -> Dict:
+        return dict(self.load().get("source") or {})
+
+    def update_source(self, overrides: Dict):
+        self._update(lambda data: data.setdefault("source", {}).update(overrides))
+
+    # ------------------------------------------------------------------
+    # Stages
+    # ------------------------------------------------------------------
+    def record_stage(self, stage: str, inputs: Dict, outputs: Dict, files: List[str]):
+        entry = {
+            "inputs": inputs,
+            "inputs_hash": hash_value(inputs),
+            "outputs": outputs,
+            "files": {path: file_fingerprint(path) for path in files},
+            "completed_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        self._update(lambda data: data.setdefault("stages", {}).__setitem__(stage, entry))
+
+    def forget_stage(self, stage: str):
+        self._update(lambda data: data.setdefault("stages", {}).pop(stage, None))
+
+    def stage(self, stage: str) -> Optional[Dict]:
+        return (self.load().get("stages") or {}).get(stage)
+
+    def is_current(self, stage: str, inputs: Dict) -> bool:
+        """True when the stage already ran with these inputs and its files are intact"""
+        entry = self.stage(stage)
+        if not entry or entry.get("inputs_hash") != hash_value(inputs):
+            return False
+        uploads = self.uploads()
+        for path, recorded in (entry.get("files") or {}).items():
+            if not recorded:
+                return False
+            try:
+                st = os.stat(path)
+            except OSError:
+                if os.path.abspath(path) in uploads:
+                    continue
+                return False
+            if st.st_size == recorded["size"] and st.st_mtime == recorded["mtime"]:
+                continue
+            if hash_file(path) != recorded["sha256"]:
+                return False
+        return True
+
+    # ------------------------------------------------------------------
+    # Image slots
+    # ------------------------------------------------------------------
+    def record_image_slot(self, slot: int, info: Dict):
+        """Remember one generated image (path, provider, prompt hash) so re-runs reuse it"""
+        self._update(lambda data: data.setdefault("image_slots", {}).__setitem__(str(slot), info))
+
+    def forget_image_slot(self, slot: int):
+        self._update(lambda data: data.setdefault("image_slots", {}).pop(str(slot), None))
+
+    def image_slots(self) -> Dict[str, Dict]:
+        return dict(self.load().get("image_slots") or {})
+
+    # ------------------------------------------------------------------
+    # Uploads
+    # ------------------------------------------------------------------
+    def record_upload(self, file_path: str, url: str):
+        self._update(lambda data: data.setdefault("uploads", {}).__setitem__(os.path.abspath(file_path), url))
+
+    def uploads(self) -> Dict[str, str]:
+        return dict(self.load().get("uploads") or {})
+
+    def available(self, path: str) -> Optional[str]:
+        """`path` if it is still on disk, else its Drive link, else None"""
+        if path and os.path.exists(path):
+            return path
+        return self.uploads().get(os.path.abspath(path)) if path else None
+
+    def content_hash(self, path: str) -> Optional[str]:
+        """sha256 of a file, falling back to the fingerprint recorded when it was produced"""
+        if path and os.path.exists(path):
+            return hash_file(path)
+        key = os.path.abspath(path) if path else None
+        for entry in (self.load().get("stages") or {}).values():
+            recorded = (entry.get("files") or {}).get(key)
+            if recorded:
+                return recorded.get("sha256")
+        return None
+
+    def summary(self) -> Dict[str, Any]:
+        data = self.load()
+        return {
+            "topic_id": data.get("topic_id"),
+            "folder": self.folder,
+            "updated_at": data.get("updated_at"),
+            "stages": {
+                name: {
+                    "inputs_hash": entry.get("inputs_hash"),
+                    "completed_at": entry.get("completed_at"),
+                    "outputs": entry.get("outputs"),
+                    "files": {path: (fp or {}).get("sha256") for path, fp in (entry.get("files") or {}).items()},
+                }
+                for name, entry in (data.get("stages") or {}).items()
+            },
+            "image_slots": data.get("image_slots", {}),
+            "uploads": data.get("uploads", {}),
+        }
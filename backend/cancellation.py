@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+🛑 CANCELLATION
+Per-workflow cancel flags checked between stages, provider calls and retries
+"""
+
+import threading
+import logging
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class WorkflowCancelled(Exception):
+    """Raised inside a workflow once it has been cancelled"""
+
+    def __init__(self, workflow_id: str):
+        super().__init__(f"Workflow {workflow_id} was cancelled")
+        self.workflow_id = workflow_id
+
+
+class CancellationRegistry:
+    """🛑 Thread-safe cancel flags keyed by workflow ID
+
+    Work checks `check(workflow_id)` at safe points and sleeps through `wait()` so
+    a backoff ends the moment the workflow is cancelled.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._events: Dict[str, threading.Event] = {}
+
+    def _event(self, workflow_id: str) -> threading.Event:
+        with self._lock:
+            return self._events.setdefault(workflow_id, threading.Event())
+
+    def cancel(self, workflow_id: str):
+        self._event(workflow_id).set()
+        logger.info(f"🛑 Workflow {workflow_id} cancelled")
+
+    def is_cancelled(self, workflow_id: Optional[str]) -> bool:
+        if not workflow_id:
+            return False
+        with self._lock:
+            event = self._events.get(workflow_id)
+        return bool(event and event.is_set())
+
+    def check(self, workflow_id: Optional[str]):
+        """Raise WorkflowCancelled if the workflow was cancelled"""
+        if self.is_cancelled(workflow_id):
+            raise WorkflowCancelled(workflow_id)
+
+    def wait(self, workflow_id: Optional[str], seconds: float):
+        """Sleep for `seconds`, waking early (and raising) if the workflow is cancelled"""
+        if not workflow_id:
+            threading.Event().wait(seconds)
+            return
+        if self._event(workflow_id).wait(seconds):
+            raise WorkflowCancelled(workflow_id)
+
+    def clear(self, workflow_id: Optional[str]):
+        """Forget a finished workflow's flag"""
+        with self._lock:
+            self._events.pop(workflow_id, None)
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+⏱️ DEADLINE BUDGETS
+A workflow's end-to-end deadline, turned into per-call timeouts and retry limits
+"""
+
+import os
+import time
+import logging
+from datetime import datetime
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class DeadlineExceeded(Exception):
+    """Raised when the remaining budget can't cover the next step"""
+
+
+class Deadline:
+    """⏱️ Absolute deadline (epoch seconds); `Deadline(None)` never expires
+
+    - `timeout(default)`: the usual timeout, capped by what's left
+    - `retries(default, attempt_seconds)`: how many retries still fit
+    - `allows(seconds)`: whether an optional step is affordable
+    - `check(step, needed)`: fail fast when a step can't finish in time
+    """
+
+    def __init__(self, expires_at: Optional[float] = None):
+        self.expires_at = float(expires_at) if expires_at else None
+
+    @classmethod
+    def from_payload(cls, payload: Dict) -> "Deadline":
+        """`deadline_at` (epoch or ISO time) or `deadline_seconds` from submission; default WORKFLOW_DEADLINE_SECONDS"""
+        deadline_at = payload.get("deadline_at")
+        if deadline_at:
+            try:
+                return cls(float(deadline_at))
+            except (TypeError, ValueError):
+                try:
+                    return cls(datetime.fromisoformat(str(deadline_at)).timestamp())
+                except ValueError:
+                    logger.warning(f"⚠️ Ignoring unparseable deadline_at: {deadline_at}")
+        try:
+            budget = float(payload.get("deadline_seconds") or os.getenv("WORKFLOW_DEADLINE_SECONDS", "0"))
+        except (TypeError, ValueError):
+            budget = 0
+        if budget <= 0:
+            return cls(None)
+        return cls(float(payload.get("submitted_at") or time.time()) + budget)
+
+    def remaining(self) -> Optional[float]:
+        if self.expires_at is None:
+            return None
+        return self.expires_at - time.time()
+
+    def timeout(self, default: float, minimum: float = 1.0) -> float:
+        """`default` capped by the remaining budget; raises when even `minimum` no longer fits"""
+        remaining = self.remaining()
+        if remaining is None:
+            return default
+        if remaining < minimum:
+            raise DeadlineExceeded(f"Deadline exceeded ({remaining:.0f}s left)")
+        return max(minimum, min(default, remaining))
+
+    def retries(self, default: int, attempt_seconds: float) -> int:
+        """Retries that still fit, assuming each attempt takes `attempt_seconds`"""
+        remaining = self.remaining()
+        if remaining is None:
+            return default
+        return max(0, min(default, int(remaining // max(attempt_seconds, 1.0)) - 1))
+
+    def allows(self, seconds: float) -> bool:
+        remaining = self.remaining()
+        return remaining is None or remaining >= seconds
+
+    def check(self, step: str, needed: float = 0.0):
+        """Fail fast when `step` needs more than what's left"""
+        remaining = self.remaining()
+        if remaining is not None and remaining < needed:
+            raise DeadlineExceeded(f"Deadline can't be met: {step} needs ~{needed:.0f}s, {max(remaining, 0):.0f}s left")
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+📁 DRIVE FOLDER CACHE
+Process-wide (parent, folder name) → folder ID cache with single-flight creation
+"""
+
+import os
+import json
+import tempfile
+import threading
+import logging
+from typing import Dict, Callable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def is_not_found_error(error: Exception) -> bool:
+    """Drive 404 / notFound (e.g. a cached parent folder was deleted or trashed)"""
+    status = getattr(getattr(error, "resp", None), "status", None)
+    try:
+        if int(status) == 404:
+            return True
+    except (TypeError, ValueError):
+        pass
+    text = str(error)
+    return "notFound" in text or "File not found" in text
+
+
+class DriveFolderCache:
+    """📁 Thread-safe folder ID cache
+
+    Concurrent callers asking for the same (parent, name) share one lookup/create
+    call, so parallel uploads for a topic can no longer race into duplicate folders.
+    When `persist_path` is set, the mapping survives restarts.
+    """
+
+    def __init__(self, persist_path: Optional[str] = None):
+        self.persist_path = persist_path
+        self._ids: Dict[Tuple[str, str], str] = {}
+        self._lock = threading.Lock()
+        # (parent, name) -> [lock, callers holding or waiting on it]
+        self._key_locks: Dict[Tuple[str, str], list] = {}
+        self._save_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self):
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return
+        try:
+            with open(self.persist_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for entry in data:
+                self._ids[(entry["parent"], entry["name"])] = entry["id"]
+            logger.info(f"📁 Loaded {len(self._ids)} cached Drive folder IDs from {self.persist_path}")
+        except Exception as e:
+            logger.warning(f"⚠️ Could not load Drive folder cache {self.persist_path}: {e}")
+
+    def _save(self):
+        if not self.persist_path:
+            return
+        # Serialized so an older snapshot can never replace a newer one
+        with self._save_lock:
+            tmp_path = None
+            try:
+                with self._lock:
+                    data = [{"parent": p, "name": n, "id": i} for (p, n), i in self._ids.items()]
+                folder = os.path.dirname(os.path.abspath(self.persist_path))
+                os.makedirs(folder, exist_ok=True)
+                # Unique temp file: other processes may share DRIVE_FOLDER_CACHE_PATH
+                fd, tmp_path = tempfile.mkstemp(dir=folder, prefix=".drive_folders.", suffix=".tmp")
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, self.persist_path)
+            except Exception as e:
+                logger.warning(f"⚠️ Could not persist Drive folder cache: {e}")
+                if tmp_path and os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+    def get(self, parent_id: str, name: str) -> Optional[str]:
+        with self._lock:
+            return self._ids.get((parent_id, name))
+
+    def get_or_create(self, parent_id: str, name: str, resolver: Callable[[], Optional[str]]) -> Optional[str]:
+        """Return the cached folder ID or run `resolver` once for all concurrent callers"""
+        key = (parent_id, name)
+        with self._lock:
+            folder_id = self._ids.get(key)
+            if folder_id:
+                self.hits += 1
+                return folder_id
+            entry = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+            key_lock = entry[0]
+
+        try:
+            with key_lock:
+                # Another thread may have resolved it while we waited
+                with self._lock:
+                    folder_id = self._ids.get(key)
+                    if folder_id:
+                        self.hits += 1
+                        return folder_id
+                    self.misses += 1
+
+                folder_id = resolver()
+                if folder_id:
+                    with self._lock:
+                        self._ids[key] = folder_id
+                    self._save()
+                return folder_id
+        finally:
+            # Dropped only when no caller holds or waits on it, so a failed resolve
+            # can't let a newcomer run a second resolver beside a waiting one
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0 and self._key_locks.get(key) is entry:
+                    del self._key_locks[key]
+
+    def invalidate(self, parent_id: str, name: str):
+        """Forget a folder (e.g. after Drive reports it missing)"""
+        with self._lock:
+            self._ids.pop((parent_id, name), None)
+        self._save()
+
+    def forget_folders(self, folder_ids) -> bool:
+        """Invalidate cached folders by ID after Drive reported one missing; True if any were cached"""
+        ids = set(folder_ids or [])
+        with self._lock:
+            keys = [key for key, folder_id in self._ids.items() if folder_id in ids]
+        for parent_id, name in keys:
+            logger.warning(f"📁 Dropping stale Drive folder ID for '{name}'")
+            self.invalidate(parent_id, name)
+        return bool(keys)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._ids), "hits": self.hits, "misses": self.misses}
+
+
+_folder_cache: Optional[DriveFolderCache] = None
+_folder_cache_lock = threading.Lock()
+
+
+def get_drive_folder_cache() -> DriveFolderCache:
+    """Process-wide cache; DRIVE_FOLDER_CACHE_PATH enables persistence across restarts"""
+    global _folder_cache
+    with _folder_cache_lock:
+        if _folder_cache is None:
+            _folder_cache = DriveFolderCache(os.getenv("DRIVE_FOLDER_CACHE_PATH") or None)
+        return _folder_cache
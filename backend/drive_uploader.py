@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+☁️ DRIVE UPLOAD SERVICE
+Background queue that uploads generated files to Google Drive in parallel
+"""
+
+import io
+import time
+import queue
+import threading
+import logging
+from typing import Dict, List, Any, Optional, Callable
+from googleapiclient.http import MediaFileUpload, MediaIoBaseUpload
+
+from backend.drive_folder_cache import get_drive_folder_cache, is_not_found_error
+
+logger = logging.getLogger(__name__)
+
+
+class DriveUploadJob:
+    """☁️ One queued upload; `done` is set once it succeeded or failed"""
+
+    def __init__(self, file_path: str, topic_id: str, metadata_factory: Callable, mimetype: Optional[str] = None,
+                 on_complete: Optional[Callable[[str], None]] = None, data: Optional[bytes] = None):
+        self.file_path = file_path
+        self.data = data
+        self.topic_id = topic_id
+        self.metadata_factory = metadata_factory
+        self.mimetype = mimetype
+        self.on_complete = on_complete
+        self.parents: List[str] = []
+        self.file_id = None
+        self.url = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class DriveUploadService:
+    """☁️ Parallel resumable uploads with batched permission grants
+
+    - `workers` threads pull jobs from a FIFO queue; each thread owns its own
+      Drive service because googleapiclient/httplib2 objects are not thread-safe
+    - Files are sent as resumable uploads in `chunk_size` chunks, straight from the
+      in-memory buffer when the producer handed one over (no re-read from disk)
+    - Public "anyone can read" grants are collected and sent as one batch request
+    - `on_complete(url)` fires once the file is uploaded and public
+    """
+
+    def __init__(self, service_factory: Callable[[], Any], workers: int = 4,
+                 chunk_size: int = 8 * 1024 * 1024, permission_batch_size: int = 50,
+                 permission_flush_interval: float = 1.0, num_retries: int = 3):
+        self.service_factory = service_factory
+        self.workers = max(1, workers)
+        self.chunk_size = chunk_size
+        self.permission_batch_size = min(permission_batch_size, 100)  # Drive batch limit
+        self.permission_flush_interval = permission_flush_interval
+        self.num_retries = num_retries
+
+        self._jobs: "queue.Queue[DriveUploadJob]" = queue.Queue()
+        self._permissions: "queue.Queue[DriveUploadJob]" = queue.Queue()
+        self._local = threading.local()
+        self._threads: List[threading.Thread] = []
+        self._start_lock = threading.Lock()
+
+        self._lock = threading.Lock()
+        self._topic_jobs: Dict[str, List[DriveUploadJob]] = {}
+        self.stats = {"submitted": 0, "uploaded": 0, "failed": 0, "in_flight": 0, "permission_batches": 0}
+
+    def _service(self):
+        service = getattr(self._local, "service", None)
+        if service is None:
+            service = self.service_factory()
+            self._local.service = service
+        return service
+
+    def _ensure_started(self):
+        with self._start_lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                t = threading.Thread(target=self._upload_loop, name=f"drive-upload-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+            t = threading.Thread(target=self._permission_loop, name="drive-permissions", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def submit(self, file_path: str, topic_id: str, metadata_factory: Callable, mimetype: Optional[str] = None,
+               on_complete: Optional[Callable[[str], None]] = None, data: Optional[bytes] = None) -> DriveUploadJob:
+        """Queue a file for upload; `metadata_factory(service)` builds the Drive file body"""
+        job = DriveUploadJob(file_path, topic_id, metadata_factory, mimetype, on_complete, data)
+        with self._lock:
+            self._topic_jobs.setdefault(topic_id, []).append(job)
+            self.stats["submitted"] += 1
+        self._ensure_started()
+        self._jobs.put(job)
+        logger.info(f"☁️ Queued Drive upload: {file_path}")
+        return job
+
+    def wait_for_topic(self, topic_id: str, timeout: Optional[float] = None) -> bool:
+        """Wait for every upload queued for a topic; True when all finished in time"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            jobs = list(self._topic_jobs.get(topic_id, []))
+        for job in jobs:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not job.done.wait(remaining):
+                return False
+        return True
+
+    def queue_depth(self) -> int:
+        return self._jobs.qsize()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+        return {
+            "queue_depth": self._jobs.qsize(),
+            "permission_queue_depth": self._permissions.qsize(),
+            "workers": self.workers,
+            **stats,
+        }
+
+    def _finish(self, job: DriveUploadJob, error: Optional[Exception] = None):
+        job.error = error
+        with self._lock:
+            self.stats["in_flight"] -= 1
+            self.stats["failed" if error else "uploaded"] += 1
+        if error:
+            logger.error(f"❌ Drive upload failed for {job.file_path}: {error}")
+        else:
+            job.url = f"https://drive.google.com/file/d/{job.file_id}/view"
+            logger.info(f"✅ Uploaded to Google Drive: {job.url}")
+            if job.on_complete:
+                try:
+                    job.on_complete(job.url)
+                except Exception as e:
+                    logger.warning(f"⚠️ Upload completion callback failed for {job.file_path}: {e}")
+        job.on_complete = None  # the callback closes over engine/topic state
+        job.done.set()
+        # Finished jobs leave the index at once, whether or not anyone ever waits on the topic
+        with self._lock:
+            jobs = self._topic_jobs.get(job.topic_id)
+            if jobs is not None:
+                jobs[:] = [j for j in jobs if j is not job]
+                if not jobs:
+                    self._topic_jobs.pop(job.topic_id, None)
+
+    def _upload_loop(self):
+        while True:
+            job = self._jobs.get()
+            with self._lock:
+                self.stats["in_flight"] += 1
+            try:
+                service = self._service()
+                try:
+                    job.file_id = self._send(job, service)
+                except Exception as e:
+                    # A cached topic folder deleted in Drive: forget it and retry once into a fresh one
+                    if not is_not_found_error(e) or not get_drive_folder_cache().forget_folders(job.parents):
+                        raise
+                    logger.warning(f"⚠️ Drive folder for {job.file_path} is gone; retrying with a fresh folder")
+                    job.file_id = self._send(job, service)
+                job.data = None  # release the buffer as soon as the bytes are on Drive
+                self._permissions.put(job)
+            except Exception as e:
+                job.data = None
+                self._finish(job, e)
+
+    def _send(self, job: DriveUploadJob, service) -> str:
+        """One resumable upload; returns the new file ID"""
+        metadata = job.metadata_factory(service)
+        job.parents = metadata.get('parents', [])
+        if job.data is not None:
+            media = MediaIoBaseUpload(io.BytesIO(job.data), mimetype=job.mimetype or 'application/octet-stream',
+                                      resumable=True, chunksize=self.chunk_size)
+        else:
+            media = MediaFileUpload(job.file_path, mimetype=job.mimetype, resumable=True, chunksize=self.chunk_size)
+        request = service.files().create(body=metadata, media_body=media, fields='id')
+        response = None
+        while response is None:
+            _, response = request.next_chunk(num_retries=self.num_retries)
+        return response['id']
+
+    def _permission_loop(self):
+        while True:
+            batch_jobs = [self._permissions.get()]
+            # Collect whatever else arrives within the flush interval
+            while len(batch_jobs) < self.permission_batch_size:
+                try:
+                    batch_jobs.append(self._permissions.get(timeout=self.permission_flush_interval))
+                except queue.Empty:
+                    break
+            self._grant_public_read(batch_jobs)
+
+    def _grant_public_read(self, jobs: List[DriveUploadJob]):
+        by_id = {job.file_id: job for job in jobs}
+        failures: Dict[str, Exception] = {}
+
+        def on_response(request_id, response, exception):
+            if exception is not None:
+                failures[request_id] = exception
+
+        try:
+            service = self._service()
+            batch = service.new_batch_http_request(callback=on_response)
+            for file_id in by_id:
+                batch.add(
+                    service.permissions().create(fileId=file_id, body={'role': 'reader', 'type': 'anyone'}),
+                    request_id=file_id
+                )
+            batch.execute()
+            with self._lock:
+                self.stats["permission_batches"] += 1
+        except Exception as e:
+            failures = {file_id: e for file_id in by_id}
+
+        for file_id, job in by_id.items():
+            self._finish(job, failures.get(file_id))
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+🔑 IDEMPOTENCY
+Unique run identifiers and a dedupe window for retried webhook submissions
+"""
+
+import os
+import time
+import uuid
+import sqlite3
+import threading
+import logging
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+
+from backend.artifact_manifest import hash_value
+
+logger = logging.getLogger(__name__)
+
+# Fields that never change what a submission produces
+_VOLATILE_FIELDS = ("webhook_secret", "idempotency_key")
+
+
+def unique_id(prefix: str, suffix: Any = None) -> str:
+    """`<prefix>_<unix seconds>_<random>[_<suffix>]` - time-sortable, collision-free across requests"""
+    value = f"{prefix}_{int(time.time())}_{uuid.uuid4().hex[:8]}"
+    return f"{value}_{suffix}" if suffix is not None else value
+
+
+def payload_fingerprint(payload: Dict) -> str:
+    """Content hash of a submission, used when the caller sends no Idempotency-Key"""
+    return "sha256:" + hash_value({k: v for k, v in payload.items() if k not in _VOLATILE_FIELDS})
+
+
+class IdempotencyStore:
+    """🔑 Maps idempotency keys to the workflow they started, for `window_seconds`
+
+    With `db_path` (WORKFLOW_REGISTRY_DB, the registry's SQLite file) claims are
+    shared by every server process on the host, like the workflow registry;
+    otherwise dedupe is per process.
+    """
+
+    def __init__(self, window_seconds: Optional[float] = None, db_path: Optional[str] = None):
+        if window_seconds is None:
+            window_seconds = float(os.getenv("IDEMPOTENCY_WINDOW_SECONDS", "600"))
+        self.window_seconds = window_seconds
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self.stats = {"claimed": 0, "duplicates": 0}
+        db_path = db_path if db_path is not None else os.getenv("WORKFLOW_REGISTRY_DB", "")
+        self._conn = None
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS idempotency "
+                               "(key TEXT PRIMARY KEY, workflow_id TEXT NOT NULL, at REAL NOT NULL)")
+
+    @contextmanager
+    def _transaction(self):
+        """Process lock, plus BEGIN IMMEDIATE so check-and-claim is atomic across processes"""
+        with self._lock:
+            if self._conn is None:
+                yield
+                return
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        if self._conn is None:
+            return self._entries.get(key)
+        row = self._conn.execute("SELECT workflow_id, at FROM idempotency WHERE key = ?", (key,)).fetchone()
+        return {"workflow_id": row[0], "at": row[1]} if row else None
+
+    def _put(self, key: str, workflow_id: str, at: float):
+        if self._conn is None:
+            self._entries[key] = {"workflow_id": workflow_id, "at": at}
+        else:
+            self._conn.execute("INSERT OR REPLACE INTO idempotency (key, workflow_id, at) VALUES (?, ?, ?)",
+                               (key, workflow_id, at))
+
+    def _prune(self, now: float):
+        if self._conn is not None:
+            self._conn.execute("DELETE FROM idempotency WHERE at < ?", (now - self.window_seconds,))
+            return
+        expired = [k for k, e in self._entries.items() if now - e["at"] > self.window_seconds]
+        for key in expired:
+            del self._entries[key]
+
+    def claim(self, key: str, workflow_id: str, replace: bool = False) -> Optional[Dict[str, Any]]:
+        """Record `key` -> `workflow_id` unless a live entry exists; returns that entry
+        ({"workflow_id", "at"}) if so"""
+        now = time.time()
+        with self._transaction():
+            self._prune(now)
+            entry = self._get(key)
+            if entry and not replace:
+                self.stats["duplicates"] += 1
+                return entry
+            self._put(key, workflow_id, now)
+            self.stats["claimed"] += 1
+            return None
+
+    def release(self, key: str, workflow_id: str):
+        """Forget `key` if it still points at `workflow_id` (the submission was never started)"""
+        with self._transaction():
+            entry = self._get(key)
+            if entry and entry["workflow_id"] == workflow_id:
+                if self._conn is None:
+                    self._entries.pop(key, None)
+                else:
+                    self._conn.execute("DELETE FROM idempotency WHERE key = ?", (key,))
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._transaction():
+            self._prune(time.time())
+            keys = len(self._entries) if self._conn is None else \
+                self._conn.execute("SELECT COUNT(*) FROM idempotency").fetchone()[0]
+        return {"window_seconds": self.window_seconds, "keys": keys,
+                "backend": "sqlite" if self._conn is not None else "memory", **self.stats}
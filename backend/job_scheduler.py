@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+🎟️ JOB SCHEDULER
+Priority lanes plus weighted fair sharing between tracks/clients for workflow jobs
+"""
+
+import os
+import time
+import heapq
+import itertools
+import threading
+import logging
+from typing import Dict, List, Any, Optional, Callable
+
+logger = logging.getLogger(__name__)
+
+# Lower value runs first; shared with the stage pipeline and the render scheduler
+PRIORITY_INTERACTIVE = 0
+PRIORITY_HIGH = 5
+PRIORITY_NORMAL = 10
+PRIORITY_BULK = 20
+
+PRIORITY_NAMES = {
+    "interactive": PRIORITY_INTERACTIVE,
+    "urgent": PRIORITY_INTERACTIVE,
+    "high": PRIORITY_HIGH,
+    "normal": PRIORITY_NORMAL,
+    "low": PRIORITY_BULK,
+    "bulk": PRIORITY_BULK,
+}
+
+
+def resolve_priority(payload: Dict, default: Optional[int] = None) -> int:
+    """Payload `priority` (name or number); otherwise script/prompt jobs are interactive and notes are normal"""
+    value = payload.get("priority")
+    if isinstance(value, str) and value.strip().lower() in PRIORITY_NAMES:
+        return PRIORITY_NAMES[value.strip().lower()]
+    try:
+        if value is not None and str(value).strip() != "":
+            return max(0, int(value))
+    except (TypeError, ValueError):
+        pass
+    if default is not None:
+        return default
+    if str(payload.get("input_type", "notes")).lower() in ("script", "prompt"):
+        return PRIORITY_INTERACTIVE
+    return PRIORITY_NORMAL
+
+
+def resolve_fair_key(payload: Dict, client_key: str = "") -> str:
+    """Fair-share key: the track by default; JOB_FAIR_KEY=client shares by the admission client key instead"""
+    if os.getenv("JOB_FAIR_KEY", "track").strip().lower() == "client" and client_key:
+        return client_key
+    return f"track:{payload.get('track') or payload.get('track_name') or 'default'}"
+
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    """"ai=2,design=1" -> {"ai": 2.0, "design": 1.0}"""
+    weights = {}
+    for part in (spec or "").split(","):
+        if "=" in part:
+            name, value = part.split("=", 1)
+            try:
+                weights[name.strip()] = max(0.01, float(value))
+            except ValueError:
+                logger.warning(f"⚠️ Ignoring bad fair-share weight: {part}")
+    return weights
+
+
+def fair_weight(weights: Dict[str, float], fair_key: str) -> float:
+    # Weights are configured by bare name ("ai=2"), keys carry their kind ("track:ai")
+    return weights.get(fair_key, weights.get(fair_key.split(":", 1)[-1], 1.0))
+
+
+class _Job:
+    def __init__(self, func: Callable[[], Any], priority: int, fair_key: str, cost: float, label: str, seq: int):
+        self.func = func
+        self.priority = priority
+        self.fair_key = fair_key
+        self.cost = cost
+        self.label = label
+        self.seq = seq
+        self.queued_at = time.monotonic()
+
+
+class JobScheduler:
+    """🎟️ A fixed worker pool that picks the next workflow job by priority, then fair share
+
+    - jobs run in strict priority order (lower value first); a job that has waited
+      `aging_seconds` moves up one lane per interval so bulk work is never starved
+    - within a lane, fair keys (track or client) take turns by weighted virtual time:
+      each dispatch advances the key's clock by cost / weight, and the key with the
+      smallest clock goes next, so a 50-topic dump doesn't block a 1-topic request
+    """
+
+    def __init__(self, workers: Optional[int] = None, weights: Optional[Dict[str, float]] = None,
+                 aging_seconds: Optional[float] = None):
+        self.workers = max(1, workers or int(os.getenv("JOB_SCHEDULER_WORKERS", "8")))
+        self.weights = weights if weights is not None else parse_weights(os.getenv("JOB_FAIR_WEIGHTS", ""))
+        self.aging_seconds = aging_seconds if aging_seconds is not None else float(os.getenv("JOB_PRIORITY_AGING_SECONDS", "600"))
+
+        self._cond = threading.Condition()
+        self._queues: Dict[str, List[tuple]] = {}  # fair_key -> heap of (priority, seq, job)
+        self._clock: Dict[str, float] = {}  # fair_key -> virtual time
+        self._seq = itertools.count()
+        self._running: Dict[int, Dict[str, Any]] = {}
+        self._started = False
+        self.stats = {"completed": 0, "failed": 0, "total_wait": 0.0, "max_wait": 0.0}
+
+    def _weight(self, fair_key: str) -> float:
+        return fair_weight(self.weights, fair_key)
+
+    def _ensure_started(self):
+        if self._started:
+            return
+        for i in range(self.workers):
+            threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True).start()
+        self._started = True
+        logger.info(f"🎟️ Job scheduler started with {self.workers} worker(s)")
+
+    def submit(self, func: Callable[[], Any], priority: int = PRIORITY_NORMAL, fair_key: str = "default",
+               cost: float = 1, label: str = "") -> None:
+        """Queue `func()`; it runs on a scheduler worker when its turn comes"""
+        with self._cond:
+            self._ensure_started()
+            job = _Job(func, priority, fair_key, max(cost, 0.01), label, next(self._seq))
+            if fair_key not in self._queues or not self._queues[fair_key]:
+                # A key that was idle rejoins at the current virtual time, not with saved-up credit
+                active = [self._clock[k] for k, q in self._queues.items() if q]
+                self._clock[fair_key] = max(self._clock.get(fair_key, 0.0), min(active) if active else 0.0)
+            heapq.heappush(self._queues.setdefault(fair_key, []), (priority, job.seq, job))
+            logger.info(f"🎟️ Job queued: {label or fair_key} (priority {priority}, {self._queue_depth()} waiting)")
+            self._cond.notify()
+
+    def cancel(self, label: str) -> bool:
+        """Drop a job that hasn't started yet; False if it is running or unknown"""
+        with self._cond:
+            for fair_key, heap in self._queues.items():
+                for entry in heap:
+                    if entry[2].label == label:
+                        heap.remove(entry)
+                        heapq.heapify(heap)
+                        logger.info(f"🛑 Dropped queued job {label}")
+                        return True
+        return False
+
+    def _queue_depth(self) -> int:
+        return sum(len(q) for q in self._queues.values())
+
+    def _effective_priority(self, job: _Job, now: float) -> int:
+        if self.aging_seconds <= 0:
+            return job.priority
+        return job.priority - int((now - job.queued_at) // self.aging_seconds) * PRIORITY_HIGH
+
+    def _next_job(self) -> Optional[_Job]:
+        now = time.monotonic()
+        best, best_rank = None, None
+        for fair_key, heap in self._queues.items():
+            if not heap:
+                continue
+            job = heap[0][2]
+            rank = (self._effective_priority(job, now), self._clock.get(fair_key, 0.0), job.seq)
+            if best_rank is None or rank < best_rank:
+                best, best_rank = fair_key, rank
+        if best is None:
+            return None
+        job = heapq.heappop(self._queues[best])[2]
+        self._clock[best] = self._clock.get(best, 0.0) + job.cost / self._weight(best)
+        return job
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                job = self._next_job()
+                while job is None:
+                    self._cond.wait()
+                    job = self._next_job()
+                wait = time.monotonic() - job.queued_at
+                self.stats["total_wait"] += wait
+                self.stats["max_wait"] = max(self.stats["max_wait"], wait)
+                self._running[job.seq] = {"label": job.label, "fair_key": job.fair_key,
+                                          "priority": job.priority, "started": time.time()}
+            outcome = "completed"
+            try:
+                job.func()
+            except Exception as e:
+                outcome = "failed"
+                logger.error(f"❌ Job {job.label or job.seq} failed: {e}")
+            finally:
+                with self._cond:
+                    self._running.pop(job.seq, None)
+                    self.stats[outcome] += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._cond:
+            stats = dict(self.stats)
+            waiting: Dict[str, int] = {}
+            for fair_key, heap in self._queues.items():
+                if heap:
+                    waiting[fair_key] = len(heap)
+            running = [{"label": r["label"], "fair_key": r["fair_key"], "priority": r["priority"],
+                        "seconds": round(time.time() - r["started"], 1)} for r in self._running.values()]
+        dispatched = stats["completed"] + stats["failed"] + len(running)
+        return {
+            "workers": self.workers,
+            "running": running,
+            "queue_depth": sum(waiting.values()),
+            "waiting_by_key": waiting,
+            "completed": stats["completed"],
+            "failed": stats["failed"],
+            "avg_wait_seconds": round(stats["total_wait"] / dispatched, 2) if dispatched else 0.0,
+            "max_wait_seconds": round(stats["max_wait"], 2),
+        }
+
+
+_job_scheduler: Optional[JobScheduler] = None
+_job_scheduler_lock = threading.Lock()
+
+
+def get_job_scheduler() -> JobScheduler:
+    """Process-wide scheduler for workflow jobs"""
+    global _job_scheduler
+    with _job_scheduler_lock:
+        if _job_scheduler is None:
+            _job_scheduler = JobScheduler()
+        return _job_scheduler
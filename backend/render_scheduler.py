@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+🎬 RENDER SCHEDULER
+Bounded, CPU-aware slot pool for FFmpeg render processes
+"""
+
+import os
+import math
+import time
+import heapq
+import itertools
+import subprocess
+import threading
+import logging
+from typing import Dict, List, Any, Optional, Callable
+
+from backend.cancellation import WorkflowCancelled
+from backend.deadline import Deadline, DeadlineExceeded
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_NORMAL = 10
+
+
+class RenderResult:
+    """🎬 Outcome of one scheduled render"""
+
+    def __init__(self, returncode: int, stdout: str, stderr: str, queue_wait: float, run_seconds: float):
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+        self.queue_wait = queue_wait
+        self.run_seconds = run_seconds
+
+
+class RenderScheduler:
+    """🎬 Runs FFmpeg commands through a fixed number of render slots
+
+    - `max_concurrent` encoders run at once (default: cores // threads_per_job)
+    - every job gets a `threads_per_job` x264 budget via `ffmpeg_thread_args()`; a job
+      encoding several outputs holds `slots_for(outputs)` slots and splits their budget
+    - waiting jobs are served lowest priority value first, FIFO within a priority
+    - each job reports how long it waited for a slot
+    - `cancel(owner)` kills an owner's running encoders and drops its waiting jobs
+    """
+
+    def __init__(self, max_concurrent: Optional[int] = None, threads_per_job: Optional[int] = None):
+        cores = os.cpu_count() or 1
+        if threads_per_job is None:
+            threads_per_job = int(os.getenv("RENDER_THREADS_PER_JOB", "0")) or max(1, min(4, cores // 2))
+        self.threads_per_job = max(1, threads_per_job)
+        if max_concurrent is None:
+            max_concurrent = int(os.getenv("RENDER_MAX_CONCURRENT", "0")) or max(1, cores // self.threads_per_job)
+        self.max_concurrent = max(1, max_concurrent)
+
+        self._cond = threading.Condition()
+        self._waiting: List[tuple] = []
+        self._seq = itertools.count()
+        self._running: Dict[int, Dict[str, Any]] = {}
+        self.stats = {"completed": 0, "failed": 0, "timed_out": 0, "cancelled": 0,
+                      "total_queue_wait": 0.0, "max_queue_wait": 0.0, "total_run_seconds": 0.0}
+
+    def slots_for(self, outputs: int) -> int:
+        """Slots a job encoding `outputs` streams holds so each encoder still gets a whole thread"""
+        return max(1, min(self.max_concurrent, math.ceil(max(1, outputs) / self.threads_per_job)))
+
+    def ffmpeg_thread_args(self, outputs: int = 1) -> List[str]:
+        """Encoder/filter thread flags that keep one job inside its CPU budget
+
+        Pass them after each output's codec options; with several outputs every
+        encoder gets an equal share of the job's budget (see `slots_for`).
+        """
+        encoder_threads = max(1, self.threads_per_job * self.slots_for(outputs) // max(1, outputs))
+        return ["-threads", str(encoder_threads), "-filter_complex_threads", str(self.threads_per_job)]
+
+    def _slots_in_use(self) -> int:
+        return sum(job["slots"] for job in self._running.values())
+
+    def _acquire(self, priority: int, label: str, on_queued: Optional[Callable[[int], None]],
+                 owner: Optional[str], cancelled: Optional[Callable[[], bool]], slots: int = 1,
+                 deadline: Optional[Deadline] = None) -> int:
+        ticket = next(self._seq)
+        entry = (priority, ticket)
+        with self._cond:
+            heapq.heappush(self._waiting, entry)
+            announced = False
+            while self._slots_in_use() + slots > self.max_concurrent or self._waiting[0] != entry:
+                remaining = deadline.remaining() if deadline else None
+                if (cancelled and cancelled()) or (remaining is not None and remaining <= 0):
+                    self._waiting.remove(entry)
+                    heapq.heapify(self._waiting)
+                    self._cond.notify_all()
+                    if remaining is not None and remaining <= 0:
+                        raise DeadlineExceeded(f"Deadline exceeded while waiting for a render slot ({label})")
+                    raise WorkflowCancelled(owner or label)
+                if not announced:
+                    announced = True
+                    position = sorted(self._waiting).index(entry) + 1
+                    logger.info(f"⏳ Render queued: {label} (position {position}, {len(self._running)} running)")
+                    if on_queued:
+                        try:
+                            on_queued(position)
+                        except Exception as e:
+                            logger.warning(f"⚠️ Render queue callback failed: {e}")
+                # Queue time counts against the deadline
+                self._cond.wait(remaining)
+            heapq.heappop(self._waiting)
+            self._running[ticket] = {"label": label, "priority": priority, "started": time.time(), "pid": None,
+                                     "owner": owner, "process": None, "slots": slots}
+            # Wake the next waiter in case more than one slot is free
+            self._cond.notify_all()
+        return ticket
+
+    def _release(self, ticket: int):
+        with self._cond:
+            self._running.pop(ticket, None)
+            self._cond.notify_all()
+
+    def run(self, cmd: List[str], timeout: float = 300, priority: int = PRIORITY_NORMAL, label: str = "",
+            on_queued: Optional[Callable[[int], None]] = None,
+            on_started: Optional[Callable[[float], None]] = None,
+            owner: Optional[str] = None, cancelled: Optional[Callable[[], bool]] = None,
+            outputs: int = 1, deadline: Optional[Deadline] = None) -> RenderResult:
+        """Wait for a render slot, then run `cmd`; raises subprocess.TimeoutExpired like subprocess.run
+
+        `on_queued(position)` fires if the job has to wait, `on_started(queue_wait)` once it gets a slot.
+        With `owner` and `cancelled`, `cancel(owner)` aborts the job and it raises WorkflowCancelled.
+        A command encoding several `outputs` holds `slots_for(outputs)` slots.
+        With a `deadline`, waiting for a slot stops (DeadlineExceeded) when it runs out and
+        `timeout` is capped by whatever is left once the slot is acquired.
+        """
+        queued_at = time.monotonic()
+        ticket = self._acquire(priority, label or cmd[-1], on_queued, owner, cancelled, self.slots_for(outputs), deadline)
+        queue_wait = time.monotonic() - queued_at
+        started = time.monotonic()
+        try:
+            if deadline:
+                timeout = deadline.timeout(timeout)
+            if on_started:
+                try:
+                    on_started(queue_wait)
+                except Exception as e:
+                    logger.warning(f"⚠️ Render start callback failed: {e}")
+            if cancelled and cancelled():
+                raise WorkflowCancelled(owner or label)
+            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            with self._cond:
+                if ticket in self._running:
+                    self._running[ticket]["pid"] = process.pid
+                    self._running[ticket]["process"] = process
+                if cancelled and cancelled():
+                    process.kill()  # cancelled between the check above and registration
+            try:
+                stdout, stderr = process.communicate(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.communicate()
+                self._record(queue_wait, time.monotonic() - started, "timed_out")
+                raise
+            if cancelled and cancelled():
+                self._record(queue_wait, time.monotonic() - started, "cancelled")
+                raise WorkflowCancelled(owner or label)
+            run_seconds = time.monotonic() - started
+            self._record(queue_wait, run_seconds, "completed" if process.returncode == 0 else "failed")
+            return RenderResult(process.returncode, stdout, stderr, queue_wait, run_seconds)
+        finally:
+            self._release(ticket)
+
+    def cancel(self, owner: str) -> int:
+        """Kill `owner`'s running encoders and wake its waiting jobs so they bail out; returns kills"""
+        killed = 0
+        with self._cond:
+            for job in self._running.values():
+                if job["owner"] == owner and job["process"] is not None and job["process"].poll() is None:
+                    try:
+                        job["process"].kill()
+                        killed += 1
+                    except OSError as e:
+                        logger.warning(f"⚠️ Could not kill render {job['label']} (pid {job['pid']}): {e}")
+            self._cond.notify_all()
+        if killed:
+            logger.info(f"🛑 Killed {killed} render process(es) for {owner}")
+        return killed
+
+    def _record(self, queue_wait: float, run_seconds: float, outcome: str):
+        with self._cond:
+            self.stats[outcome] += 1
+            self.stats["total_queue_wait"] += queue_wait
+            self.stats["max_queue_wait"] = max(self.stats["max_queue_wait"], queue_wait)
+            self.stats["total_run_seconds"] += run_seconds
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._cond:
+            stats = dict(self.stats)
+            running = [{"label": r["label"], "pid": r["pid"], "slots": r["slots"],
+                        "seconds": round(time.time() - r["started"], 1)} for r in self._running.values()]
+            waiting = len(self._waiting)
+        finished = stats["completed"] + stats["failed"] + stats["timed_out"] + stats["cancelled"]
+        return {
+            "max_concurrent": self.max_concurrent,
+            "threads_per_job": self.threads_per_job,
+            "running": running,
+            "queue_depth": waiting,
+            "completed": stats["completed"],
+            "failed": stats["failed"],
+            "timed_out": stats["timed_out"],
+            "cancelled": stats["cancelled"],
+            "avg_queue_wait_seconds": round(stats["total_queue_wait"] / finished, 2) if finished else 0.0,
+            "max_queue_wait_seconds": round(stats["max_queue_wait"], 2),
+            "avg_run_seconds": round(stats["total_run_seconds"] / finished, 2) if finished else 0.0,
+        }
+
+
+_render_scheduler: Optional[RenderScheduler] = None
+_render_scheduler_lock = threading.Lock()
+
+
+def get_render_scheduler() -> RenderScheduler:
+    """Process-wide scheduler shared by every engine instance"""
+    global _render_scheduler
+    with _render_scheduler_lock:
+        if _render_scheduler is None:
+            _render_scheduler = RenderScheduler()
+            logger.info(f"🎬 Render scheduler: {_render_scheduler.max_concurrent} slot(s), "
+                        f"{_render_scheduler.threads_per_job} thread(s) per job")
+        return _render_scheduler
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+🧹 RETENTION MANAGER
+Age, size and status based cleanup of generated_content with a background sweeper
+"""
+
+import os
+import json
+import time
+import shutil
+import threading
+import logging
+from typing import Dict, List, Any, Optional, Set
+
+from backend.artifact_manifest import ArtifactManifest
+
+logger = logging.getLogger(__name__)
+
+MARKER_FILE = ".retention.json"
+INTERMEDIATE_EXTENSIONS = {".mp3", ".wav", ".png", ".jpg", ".jpeg", ".gif"}
+VIDEO_EXTENSIONS = {".mp4"}
+# Flat folders holding hard links (or copies) of topic artifacts
+MIRROR_DIRS = ("videos", "audio", "images")
+
+
+class RetentionManager:
+    """🧹 Keeps generated_content within policy
+
+    Policies (all optional, configured from the environment):
+    - RETENTION_MAX_AGE_DAYS: delete topic folders / mirrored files older than N days
+    - RETENTION_MAX_TOTAL_GB: evict oldest topics (folder plus its mirrors) until usage fits
+    - RETENTION_EVICT_UPLOADED_INTERMEDIATES (default true): once a topic is
+      Completed, delete audio/images (and their mirrors) whose Drive upload the
+      topic's artifact manifest recorded; videos stay
+    Topic folders registered as active are never touched.
+    """
+
+    def __init__(self, base_dir: str, max_age_days: Optional[float] = None, max_total_gb: Optional[float] = None,
+                 evict_uploaded_intermediates: Optional[bool] = None, sweep_interval: Optional[float] = None):
+        self.base_dir = base_dir
+        self.max_age_days = float(os.getenv("RETENTION_MAX_AGE_DAYS", "0")) if max_age_days is None else max_age_days
+        self.max_total_gb = float(os.getenv("RETENTION_MAX_TOTAL_GB", "0")) if max_total_gb is None else max_total_gb
+        if evict_uploaded_intermediates is None:
+            evict_uploaded_intermediates = os.getenv("RETENTION_EVICT_UPLOADED_INTERMEDIATES", "true").lower() in ("1", "true", "yes", "on")
+        self.evict_uploaded_intermediates = evict_uploaded_intermediates
+        self.sweep_interval = float(os.getenv("RETENTION_SWEEP_INTERVAL_SECONDS", "600")) if sweep_interval is None else sweep_interval
+
+        self._lock = threading.Lock()
+        self._active: Dict[str, int] = {}
+        self._thread = None
+        self._stop = threading.Event()
+        self.last_sweep: Optional[Dict[str, Any]] = None
+
+    # ------------------------------------------------------------------
+    # Bookkeeping called by the engine
+    # ------------------------------------------------------------------
+    def protect(self, folder: str):
+        """Mark a topic folder as in use by a running pipeline"""
+        key = os.path.abspath(folder)
+        with self._lock:
+            self._active[key] = self._active.get(key, 0) + 1
+
+    def release(self, folder: str):
+        key = os.path.abspath(folder)
+        with self._lock:
+            count = self._active.get(key, 0) - 1
+            if count > 0:
+                self._active[key] = count
+            else:
+                self._active.pop(key, None)
+
+    def _update_marker(self, folder: str, updater):
+        marker_path = os.path.join(folder, MARKER_FILE)
+        with self._lock:
+            marker = self._read_marker(folder)
+            updater(marker)
+            try:
+                os.makedirs(folder, exist_ok=True)
+                tmp_path = f"{marker_path}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(marker, f)
+                os.replace(tmp_path, marker_path)
+            except Exception as e:
+                logger.warning(f"⚠️ Could not write retention marker in {folder}: {e}")
+
+    def record_status(self, folder: str, status: str):
+        """Remember the topic's final status"""
+        self._update_marker(folder, lambda m: m.__setitem__("status", status))
+
+    @staticmethod
+    def _read_marker(folder: str) -> Dict[str, Any]:
+        try:
+            with open(os.path.join(folder, MARKER_FILE), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    # ------------------------------------------------------------------
+    # Usage
+    # ------------------------------------------------------------------
+    def _entries(self) -> List[str]:
+        if not os.path.isdir(self.base_dir):
+            return []
+        entries = []
+        for name in os.listdir(self.base_dir):
+            if name.startswith("."):
+                continue  # service state (e.g. workflow checkpoints), never swept
+            path = os.path.join(self.base_dir, name)
+            if name in MIRROR_DIRS and os.path.isdir(path):
+                # Flat mirror folders: treat each file as its own entry
+                entries.extend(os.path.join(path, f) for f in os.listdir(path))
+            else:
+                entries.append(path)
+        return entries
+
+    @staticmethod
+    def _walk_files(path: str):
+        if os.path.isfile(path):
+            yield path
+            return
+        for root, _, files in os.walk(path):
+            for f in files:
+                yield os.path.join(root, f)
+
+    def _entry_size(self, path: str, seen: Set) -> int:
+        """Bytes held by an entry; hard-linked files are only counted once"""
+        total = 0
+        for f in self._walk_files(path):
+            try:
+                st = os.stat(f)
+            except OSError:
+                continue
+            inode = (st.st_dev, st.st_ino)
+            if inode in seen:
+                continue
+            seen.add(inode)
+            total += st.st_size
+        return total
+
+    @staticmethod
+    def _inode(path: str) -> Optional[tuple]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_dev, st.st_ino)
+
+    def _topic_units(self, entries: List[str]) -> List[List[str]]:
+        """Group entries that hold the same data: a topic folder plus the mirror files
+        hard-linked to it (or, for copies, named after its TopicID); other mirrors stand alone"""
+        units: List[List[str]] = []
+        owner: Dict[tuple, int] = {}
+        prefixes: Dict[str, int] = {}
+        mirrors = []
+        for entry in entries:
+            if not os.path.isdir(entry):
+                mirrors.append(entry)
+                continue
+            index = len(units)
+            units.append([entry])
+            for f in self._walk_files(entry):
+                inode = self._inode(f)
+                if inode:
+                    owner[inode] = index
+            topic_id = ArtifactManifest(entry).load().get("topic_id")
+            if topic_id:
+                prefixes[f"{topic_id}_"] = index
+        for mirror in mirrors:
+            index = owner.get(self._inode(mirror))
+            if index is None:
+                name = os.path.basename(mirror)
+                index = next((i for prefix, i in prefixes.items() if name.startswith(prefix)), None)
+            if index is None:
+                units.append([mirror])
+            else:
+                units[index].append(mirror)
+        return units
+
+    def _disk_usage(self) -> int:
+        """Real bytes under base_dir (each inode once)"""
+        return self._entry_size(self.base_dir, set()) if os.path.isdir(self.base_dir) else 0
+
+    @staticmethod
+    def _entry_mtime(path: str) -> float:
+        """Newest file mtime; a folder's own mtime changes whenever retention deletes from it"""
+        latest = None
+        for f in RetentionManager._walk_files(path):
+            try:
+                mtime = os.path.getmtime(f)
+            except OSError:
+                continue
+            latest = mtime if latest is None else max(latest, mtime)
+        return latest if latest is not None else os.path.getmtime(path)
+
+    def usage(self) -> Dict[str, Any]:
+        """Current disk usage of generated_content"""
+        seen: Set = set()
+        by_type = {"video": 0, "intermediate": 0, "other": 0}
+        topic_folders = 0
+        for entry in self._entries():
+            if os.path.isdir(entry):
+                topic_folders += 1
+            for f in self._walk_files(entry):
+                try:
+                    st = os.stat(f)
+                except OSError:
+                    continue
+                inode = (st.st_dev, st.st_ino)
+                if inode in seen:
+                    continue
+                seen.add(inode)
+                ext = os.path.splitext(f)[1].lower()
+                kind = "video" if ext in VIDEO_EXTENSIONS else "intermediate" if ext in INTERMEDIATE_EXTENSIONS else "other"
+                by_type[kind] += st.st_size
+        total = sum(by_type.values())
+        with self._lock:
+            active = len(self._active)
+        return {
+            "base_dir": self.base_dir,
+            "total_bytes": total,
+            "total_gb": round(total / (1024 ** 3), 3),
+            "bytes_by_type": by_type,
+            "topic_folders": topic_folders,
+            "active_topics": active,
+            "policy": {
+                "max_age_days": self.max_age_days,
+                "max_total_gb": self.max_total_gb,
+                "evict_uploaded_intermediates": self.evict_uploaded_intermediates,
+                "sweep_interval_seconds": self.sweep_interval,
+            },
+            "last_sweep": self.last_sweep,
+        }
+
+    # ------------------------------------------------------------------
+    # Sweeping
+    # ------------------------------------------------------------------
+    def _is_active(self, path: str) -> bool:
+        key = os.path.abspath(path)
+        with self._lock:
+            return key in self._active
+
+    def _remove(self, path: str) -> bool:
+        try:
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ Retention could not remove {path}: {e}")
+            return False
+
+    def _evict_intermediates(self, folder: str, mirrors: List[str]) -> int:
+        """Delete a completed topic's uploaded audio/images together with their mirror copies"""
+        if self._read_marker(folder).get("status") != "Completed":
+            return 0
+        has_video = any(f.lower().endswith(tuple(VIDEO_EXTENSIONS)) for f in os.listdir(folder))
+        if not has_video:
+            return 0
+        is_intermediate = lambda path: os.path.splitext(path)[1].lower() in INTERMEDIATE_EXTENSIONS
+        folder = os.path.abspath(folder)
+        # The manifest is the single record of confirmed uploads; it keeps accepting them as outputs
+        uploaded = [p for p in ArtifactManifest(folder).uploads()
+                    if os.path.dirname(p) == folder and is_intermediate(p) and os.path.exists(p)]
+        removed = 0
+        removed_inodes = set()
+        for path in uploaded:
+            inode = self._inode(path)
+            if self._remove(path):
+                removed += 1
+                removed_inodes.add(inode)
+        if not removed:
+            return 0
+        # Hard-linked mirrors share the evicted inodes; copies (LOCAL_MIRROR_MODE=copy) share nothing
+        # left in the folder, so either way they hold the bytes we just meant to free
+        kept_inodes = {self._inode(f) for f in self._walk_files(folder)}
+        for mirror in mirrors:
+            if not is_intermediate(mirror) or not os.path.isfile(mirror):
+                continue
+            inode = self._inode(mirror)
+            if (inode in removed_inodes or inode not in kept_inodes) and self._remove(mirror):
+                removed += 1
+        return removed
+
+    def _remove_unit(self, unit: List[str]) -> int:
+        return sum(1 for entry in unit if os.path.lexists(entry) and self._remove(entry))
+
+    def sweep(self) -> Dict[str, Any]:
+        """Apply every policy once; returns what was removed"""
+        started = time.time()
+        result = {"removed_entries": 0, "removed_intermediates": 0, "freed_bytes": 0}
+        before = self._disk_usage()
+
+        # A topic's folder and its mirrors share bytes, so they are only ever evicted together
+        units = [u for u in self._topic_units(self._entries()) if not any(self._is_active(e) for e in u)]
+
+        # 1. Status policy: drop confirmed-uploaded intermediates of completed topics
+        if self.evict_uploaded_intermediates:
+            for unit in units:
+                if os.path.isdir(unit[0]):
+                    result["removed_intermediates"] += self._evict_intermediates(unit[0], unit[1:])
+
+        def unit_mtime(unit: List[str]) -> float:
+            return max((self._entry_mtime(e) for e in unit if os.path.lexists(e)), default=0.0)
+
+        # 2. Age policy
+        if self.max_age_days > 0:
+            cutoff = started - self.max_age_days * 86400
+            for unit in list(units):
+                if unit_mtime(unit) < cutoff:
+                    result["removed_entries"] += self._remove_unit(unit)
+                    units.remove(unit)
+
+        # 3. Size policy: evict oldest topics first, re-measuring real usage after each one
+        if self.max_total_gb > 0:
+            limit = self.max_total_gb * (1024 ** 3)
+            total = self._disk_usage()
+            for _, unit in sorted(((unit_mtime(u), u) for u in units), key=lambda pair: pair[0]):
+                if total <= limit:
+                    break
+                removed = self._remove_unit(unit)
+                if removed:
+                    result["removed_entries"] += removed
+                    total = self._disk_usage()
+
+        after = self._disk_usage()
+        result["freed_bytes"] = max(before - after, 0)
+        result["finished_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        result["duration_seconds"] = round(time.time() - started, 2)
+        self.last_sweep = result
+        if result["removed_entries"] or result["removed_intermediates"]:
+            logger.info(f"🧹 Retention sweep: {result}")
+        return result
+
+    def start(self):
+        """Start the background sweeper (idempotent)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="retention-sweeper", daemon=True)
+        self._thread.start()
+        logger.info(f"🧹 Retention sweeper started (every {self.sweep_interval:.0f}s) for {self.base_dir}")
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.sweep_interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"❌ Retention sweep failed: {e}")
@@ -4,8 +4,7 @@
 Flask server with proper payload handling
 """
 
-from flask import Flask, request, jsonify, send_file, send_from_directory, render_template_string
-import threading
+from flask import Flask, request, jsonify, send_file, send_from_directory, render_template_string, Response
 import time
 import os
 import logging
@@ -63,8 +62,204 @@ app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Store active workflows
-active_workflows = {}
+# Workflow and batch status records: compact, evicted once finished, optionally shared across processes
+from backend.workflow_registry import WorkflowRegistry
+workflow_registry = WorkflowRegistry("workflows")
+batch_registry = WorkflowRegistry("batches")
+
+# Retried submissions map back to the workflow they already started
+from backend.idempotency import IdempotencyStore, payload_fingerprint, unique_id
+idempotency_store = IdempotencyStore()
+
+# Backpressure: in-flight topic budget, stage backlog limit and per-client quotas
+from backend.admission import AdmissionController, format_eta
+admission = AdmissionController()
+
+# Workflow jobs run on a shared pool: priority lanes first, then fair share per track/client
+from backend.job_scheduler import get_job_scheduler, resolve_priority, resolve_fair_key, PRIORITY_BULK, PRIORITY_INTERACTIVE
+
+# Status transitions are pushed to SSE streams and long-polls instead of being polled for
+from backend.status_events import get_status_events, TERMINAL_STATUSES
+from backend.deadline import Deadline
+status_events = get_status_events()
+
+# Background disk retention for generated_content
+if workflow_engine:
+    workflow_engine.retention.start()
+
+def publish_workflow_status(wf_id, workflow_info=None):
+    """Push the workflow's current status to anyone streaming or long-polling it"""
+    workflow_info = workflow_info or workflow_registry.get(wf_id)
+    if workflow_info is None:
+        return
+    event = {"details": dict(workflow_info.get("details", {}))}
+    if workflow_info["status"] in TERMINAL_STATUSES:
+        event.update(error=workflow_info.get("error"), status_code=workflow_info.get("status_code"),
+                     completed_at=workflow_info.get("completed_at"))
+    status_events.publish(wf_id, workflow_info["status"], **event)
+    if workflow_info["status"] in TERMINAL_STATUSES and workflow_info.get("batch_id"):
+        finish_batch_if_done(workflow_info["batch_id"])
+
+def finish_batch_if_done(batch_id):
+    """Mark a batch Completed once every workflow it started has finished"""
+    batch = batch_registry.get(batch_id)
+    if batch is None or batch["status"] in TERMINAL_STATUSES:
+        return
+    # Duplicates point at workflows other submissions own; the batch only waits for its own
+    statuses = {}
+    for wf_id in batch["workflow_ids"]:
+        info = workflow_registry.get(wf_id) or {}
+        if info.get("batch_id") == batch_id:
+            statuses[wf_id] = info.get("status")
+    if any(status not in TERMINAL_STATUSES for status in statuses.values()):
+        return
+    succeeded = sum(1 for status in statuses.values() if status == "Completed")
+    summary = {
+        "ok": succeeded == len(statuses),
+        "itemsCount": len(statuses),
+        "succeeded": succeeded,
+        "failed": len(statuses) - succeeded,
+        "topicsCount": batch.get("topics_count", 0),
+        "items": statuses,
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
+    }
+    batch_registry.update(batch_id, status="Completed", summary=summary,
+                          completed_at=time.strftime("%Y-%m-%d %H:%M:%S"))
+
+def update_workflow_status(wf_id, status, **details):
+    """Update workflow status in the registry (extra keyword details are merged in)"""
+    workflow_info = workflow_registry.update(wf_id, details=details, status=status,
+                                             updated_at=time.strftime("%Y-%m-%d %H:%M:%S"))
+    if workflow_info is not None:
+        logger.info(f"🔄 Workflow status updated: {wf_id} → {status}")
+        publish_workflow_status(wf_id, workflow_info)
+
+def record_workflow_result(wf_id, response_data, status_code):
+    """Store a workflow's final response (summarized) in the registry"""
+    cancelled = isinstance(response_data, dict) and response_data.get("cancelled")
+    expired = isinstance(response_data, dict) and response_data.get("deadline_exceeded")
+    workflow_info = workflow_registry.update(
+        wf_id,
+        status="Cancelled" if cancelled else "Deadline Exceeded" if expired else "Completed" if status_code == 200 else "Failed",
+        response=response_data,
+        status_code=status_code,
+        # propagate error message for non-200 responses so UI can show it
+        error=(response_data.get("error") if isinstance(response_data, dict) else None) if status_code != 200 else None,
+        completed_at=time.strftime("%Y-%m-%d %H:%M:%S")
+    )
+    admission.release(wf_id)
+    publish_workflow_status(wf_id, workflow_info)
+
+def record_workflow_failure(wf_id, error):
+    """Mark a workflow failed by an unexpected exception"""
+    workflow_info = workflow_registry.update(wf_id, status="Failed", error=str(error),
+                                             completed_at=time.strftime("%Y-%m-%d %H:%M:%S"))
+    admission.release(wf_id)
+    publish_workflow_status(wf_id, workflow_info)
+
+def current_stage_backlog():
+    """Work waiting in the stage pipeline queues and the render queue"""
+    backlog = 0
+    if workflow_engine and getattr(workflow_engine, 'stage_pipeline', None):
+        backlog += sum(stage["queue_depth"] for stage in workflow_engine.stage_pipeline.metrics().values())
+    from backend.render_scheduler import get_render_scheduler
+    backlog += get_render_scheduler().metrics()["queue_depth"]
+    return backlog
+
+def rejected_response(decision):
+    """429 with a Retry-After computed from current throughput"""
+    response = jsonify({
+        "success": False,
+        "error": f"Server busy - {decision.reason}",
+        "retry_after_seconds": decision.retry_after,
+        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
+    })
+    response.headers["Retry-After"] = str(decision.retry_after)
+    return response, 429
+
+def assign_fair_key(headers, payload):
+    """Fair-share key (the track unless JOB_FAIR_KEY=client), kept on the payload so stage queues share by it too"""
+    payload["fair_key"] = resolve_fair_key(payload, admission.client_key(headers, payload))
+    return payload["fair_key"]
+
+def schedule_workflow(wf_id, func, priority, fair_key, cost=1):
+    """Queue a workflow job; its status moves Queued → Processing when a worker picks it up"""
+    update_workflow_status(wf_id, "Queued", priority=priority)
+
+    def run():
+        update_workflow_status(wf_id, "Processing")
+        func()
+
+    get_job_scheduler().submit(run, priority=priority, fair_key=fair_key, cost=cost, label=wf_id)
+
+def resume_unfinished_workflows():
+    """Pick up workflows a previous process left checkpointed (crash, deploy, OOM)"""
+    if not workflow_engine or os.getenv("WORKFLOW_RESUME_ON_STARTUP", "true").lower() not in ("1", "true", "yes"):
+        return
+    max_age_hours = float(os.getenv("WORKFLOW_RESUME_MAX_AGE_HOURS", "24"))
+    for checkpoint in workflow_engine.checkpoints.unfinished(max_age_hours):
+        wf_id = checkpoint["workflow_id"]
+        # Another live worker may already own it
+        if not workflow_engine.checkpoints.claim(wf_id):
+            continue
+        workflow_registry.create(wf_id, "Resuming", owner=os.getpid(),
+                                 started_at=checkpoint.get("created_at", time.strftime("%Y-%m-%d %H:%M:%S")),
+                                 payload=checkpoint.get("payload"), resumed=True)
+        payload = checkpoint.get("payload") or {}
+        admission.register(wf_id, admission.client_key({}, payload), admission.cost(payload))
+        logger.info(f"💾 Resuming workflow {wf_id} (attempt {checkpoint.get('attempts', 0) + 1})")
+
+        def process_resumed(checkpoint=checkpoint, wf_id=wf_id):
+            try:
+                workflow_engine.status_callback = update_workflow_status
+                response_data, status_code = workflow_engine.resume_workflow(checkpoint)
+                record_workflow_result(wf_id, response_data, status_code)
+            except Exception as e:
+                logger.error(f"❌ Resumed workflow failed: {wf_id} - {e}")
+                record_workflow_failure(wf_id, e)
+
+        schedule_workflow(wf_id, process_resumed, resolve_priority(payload),
+                          payload.get("fair_key") or assign_fair_key({}, payload), admission.cost(payload))
+
+resume_unfinished_workflows()
+
+def find_duplicate_workflow(headers, payload, workflow_id, idempotency_key=None):
+    """(existing workflow ID, None) when an identical earlier submission is still live, else
+    (None, claimed key) after claiming the key for `workflow_id` (release it if the submission is refused)"""
+    idempotency_key = idempotency_key or payload.get('idempotency_key')
+    if not idempotency_key and os.getenv("IDEMPOTENCY_CONTENT_HASH", "true").lower() in ("1", "true", "yes"):
+        idempotency_key = payload_fingerprint(payload)
+    if not idempotency_key or (workflow_engine and not workflow_engine.webhook_auth_check(headers)):
+        return None, None
+    claim = idempotency_store.claim(idempotency_key, workflow_id)
+    existing_id = claim["workflow_id"] if claim else None
+    existing = workflow_registry.get(existing_id) if existing_id else None
+    retryable = existing and existing.get("status") in TERMINAL_STATUSES and existing.get("status") != "Completed"
+    # Claimed a moment ago but not registered yet: the first submission is still being admitted
+    pending = claim and existing is None and \
+        time.time() - claim["at"] < float(os.getenv("IDEMPOTENCY_PENDING_SECONDS", "60"))
+    if (existing and not retryable) or pending:
+        logger.info(f"🔑 Duplicate submission → existing workflow {existing_id}")
+        return existing_id, None
+    if existing_id:
+        # The earlier run failed, was cancelled, ran out of time (or is gone) - let this retry start a fresh one
+        idempotency_store.claim(idempotency_key, workflow_id, replace=True)
+    return None, idempotency_key
+
+def submission_error(payload):
+    """Validation message for one submission, or None when it is usable"""
+    if not isinstance(payload, dict) or not payload:
+        return "Each item must be a non-empty JSON object"
+    input_type = str(payload.get('input_type', 'notes')).lower()
+    if input_type == 'script':
+        if not (str(payload.get('script_text', '')).strip() or str(payload.get('script', '')).strip()):
+            return "Missing required field: script_text for input_type=script"
+    elif input_type == 'prompt':
+        if not str(payload.get('custom_prompt', '')).strip() and not str(payload.get('raw_notes', '')).strip():
+            return "Provide custom_prompt (preferred) or raw_notes for input_type=prompt"
+    elif not str(payload.get('raw_notes', '')).strip():
+        return "raw_notes field cannot be empty for input_type=notes"
+    return None
 
 @app.route('/health', methods=['GET'])
 def health_check():
@@ -172,16 +367,37 @@ def learning_to_content_webhook():
                 }), 400
 
         # Generate workflow ID
-        workflow_id = f"workflow_{int(time.time())}"
+        workflow_id = unique_id("workflow")
+
+        # Deduplicate retries: explicit Idempotency-Key, else a hash of the payload
+        existing_id, claimed_key = find_duplicate_workflow(headers, payload, workflow_id, headers.get('Idempotency-Key'))
+        if existing_id:
+            return jsonify({
+                "success": True,
+                "duplicate": True,
+                "message": "Duplicate submission - returning the existing workflow",
+                "workflow_id": existing_id,
+                "status": (workflow_registry.get(existing_id) or {}).get("status"),
+                "status_url": f"/api/workflow/status/{existing_id}",
+                "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
+            }), 200
+        # Deadline budgets (`deadline_seconds`) count from submission, not from when the job starts
+        payload["submitted_at"] = time.time()
+        assign_fair_key(headers, payload)
+
+        # Admission control: refuse work we can't start soon instead of queueing it for hours
+        decision = admission.try_admit(workflow_id, admission.client_key(headers, payload),
+                                       admission.cost(payload), current_stage_backlog())
+        if not decision.admitted:
+            if claimed_key:
+                # Never started: a retry after Retry-After must not be answered with this ID
+                idempotency_store.release(claimed_key, workflow_id)
+            return rejected_response(decision)
 
         # Store workflow info
-        active_workflows[workflow_id] = {
-            "status": "Processing",
-            "started_at": time.strftime("%Y-%m-%d %H:%M:%S"),
-            "payload": payload
-        }
+        workflow_registry.create(workflow_id, "Queued", payload=payload, owner=os.getpid())
 
-        logger.info(f"🔄 Initial workflow status set: {workflow_id} → Processing")
+        logger.info(f"🔄 Initial workflow status set: {workflow_id} → Queued")
 
         logger.info(f"✅ Valid payload received for workflow: {workflow_id}")
         # Safe input preview depending on mode
@@ -194,14 +410,6 @@ def learning_to_content_webhook():
             _preview = str(payload.get('raw_notes', '')).strip()[:100]
         logger.info(f"📝 Input preview: {_preview}")
 
-        # Status update callback function
-        def update_workflow_status(wf_id, status):
-            """Update workflow status in active_workflows"""
-            if wf_id in active_workflows:
-                active_workflows[wf_id]["status"] = status
-                active_workflows[wf_id]["updated_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
-                logger.info(f"🔄 Workflow status updated: {wf_id} → {status}")
-
         # Process workflow
         def process_workflow():
             try:
@@ -234,29 +442,17 @@ def learning_to_content_webhook():
                     status_code = 200
 
                 # Update workflow status
-                active_workflows[workflow_id].update({
-                    "status": "Completed" if status_code == 200 else "Failed",
-                    "response": response_data,
-                    "status_code": status_code,
-                    # propagate error message for non-200 responses so UI can show it
-                    "error": (response_data.get("error") if isinstance(response_data, dict) else None) if status_code != 200 else None,
-                    "completed_at": time.strftime("%Y-%m-%d %H:%M:%S")
-                })
+                record_workflow_result(workflow_id, response_data, status_code)
 
                 logger.info(f"✅ Workflow completed: {workflow_id}")
 
             except Exception as e:
                 logger.error(f"❌ Workflow failed: {workflow_id} - {e}")
-                active_workflows[workflow_id].update({
-                    "status": "Failed",
-                    "error": str(e),
-                    "completed_at": time.strftime("%Y-%m-%d %H:%M:%S")
-                })
+                record_workflow_failure(workflow_id, e)
 
-        # Start background processing
-        thread = threading.Thread(target=process_workflow)
-        thread.daemon = True
-        thread.start()
+        # Start background processing (interactive script/prompt jobs jump ahead of bulk notes)
+        schedule_workflow(workflow_id, process_workflow, resolve_priority(payload),
+                          payload["fair_key"], admission.cost(payload))
 
         # Return immediate response
         return jsonify({
@@ -271,7 +467,8 @@ def learning_to_content_webhook():
             "voice_gender": payload.get("voice_gender", "Female"),
             "platforms": payload.get("platforms", ["YouTube Shorts"]),
             "status_url": f"/api/workflow/status/{workflow_id}",
-            "estimated_completion": "5-10 minutes",
+            "events_url": f"/api/workflow/events/{workflow_id}",
+            "estimated_completion": format_eta(decision.estimated_seconds),
             "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
         }), 202  # Accepted for processing
 
@@ -283,20 +480,169 @@ def learning_to_content_webhook():
             "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
         }), 500
 
+@app.route('/webhook/learning-to-content/batch', methods=['POST'])
+def learning_to_content_batch():
+    """
+    📦 BATCH WEBHOOK - many submissions in one request
+    Body: a JSON array of webhook payloads, {"defaults": {...}, "items": [...]}, or JSONL (one payload per line)
+    """
+    try:
+        if not workflow_engine:
+            return jsonify({"error": "Workflow engine not available"}), 500
+        headers = dict(request.headers)
+        if not workflow_engine.webhook_auth_check(headers):
+            return jsonify({"success": False, "error": "Unauthorized - Invalid webhook secret"}), 401
+
+        body = request.get_json(silent=True)
+        defaults = {}
+        if body is None:
+            # JSONL: one submission per non-empty line
+            try:
+                body = [json.loads(line) for line in request.get_data(as_text=True).splitlines() if line.strip()]
+            except json.JSONDecodeError as e:
+                return jsonify({"success": False, "error": f"Body is neither JSON nor JSONL: {e}"}), 400
+        if isinstance(body, dict):
+            defaults = body.get("defaults") or {}
+            body = body.get("items")
+        if not isinstance(body, list) or not body:
+            return jsonify({"success": False, "error": "Provide a non-empty array of submissions"}), 400
+        max_items = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+        if len(body) > max_items:
+            return jsonify({"success": False, "error": f"Batch too large ({len(body)} > {max_items} items)"}), 413
+
+        batch_id = unique_id("batch")
+        started_at = time.strftime("%Y-%m-%d %H:%M:%S")
+        items, results = [], []
+        for index, item in enumerate(body):
+            payload = {**defaults, **item} if isinstance(item, dict) else item
+            error = submission_error(payload)
+            if error:
+                results.append({"index": index, "success": False, "error": error})
+                continue
+            workflow_id = unique_id("workflow")
+            existing_id, claimed_key = find_duplicate_workflow(headers, payload, workflow_id)
+            if existing_id:
+                results.append({"index": index, "success": True, "duplicate": True, "workflow_id": existing_id})
+                continue
+            # Batch items default to the bulk lane unless they ask for a priority
+            payload.setdefault("priority", PRIORITY_BULK)
+            payload["submitted_at"] = time.time()
+            assign_fair_key(headers, payload)
+            workflow_registry.create(workflow_id, "Queued", started_at=started_at, payload=payload, batch_id=batch_id,
+                                     owner=os.getpid())
+            items.append({"workflow_id": workflow_id, "payload": payload, "idempotency_key": claimed_key})
+            results.append({"index": index, "success": True, "workflow_id": workflow_id})
+
+        if items:
+            decision = admission.try_admit([item["workflow_id"] for item in items], admission.client_key(headers, items[0]["payload"]),
+                                           sum(admission.cost(item["payload"]) for item in items), current_stage_backlog())
+            if not decision.admitted:
+                for item in items:
+                    workflow_registry.remove(item["workflow_id"])
+                    if item["idempotency_key"]:
+                        idempotency_store.release(item["idempotency_key"], item["workflow_id"])
+                return rejected_response(decision)
+
+        batch_registry.create(batch_id, "Queued" if items else "Completed", started_at=started_at,
+                              workflow_ids=[r["workflow_id"] for r in results if r.get("workflow_id")])
+        logger.info(f"📦 Batch {batch_id}: {len(items)} new workflow(s) from {len(body)} item(s)")
+
+        def prepare_batch():
+            # Shared part: extraction for every item and one EssentialContent append
+            batch_registry.update(batch_id, status="Processing")
+            try:
+                workflow_engine.status_callback = update_workflow_status
+                prepared = workflow_engine.prepare_batch_request(headers, items, on_item_done=record_workflow_result)
+            except Exception as e:
+                logger.error(f"❌ Batch failed: {batch_id} - {e}")
+                batch_registry.update(batch_id, status="Failed", error=str(e),
+                                      completed_at=time.strftime("%Y-%m-%d %H:%M:%S"))
+                for item in items:
+                    if (workflow_registry.get(item["workflow_id"]) or {}).get("status") not in TERMINAL_STATUSES:
+                        record_workflow_failure(item["workflow_id"], e)
+                return
+            batch_registry.update(batch_id, topics_count=sum(len(topics) for _, _, topics in prepared))
+            # Then every item is its own job: own priority lane, fair share, cost and cancel
+            for entry in prepared:
+                item = entry[0]
+                schedule_workflow(item["workflow_id"],
+                                  lambda entry=entry: workflow_engine.process_batch_item(entry, on_item_done=record_workflow_result),
+                                  resolve_priority(item["payload"]), item["payload"]["fair_key"], admission.cost(item["payload"]))
+
+        if items:
+            get_job_scheduler().submit(prepare_batch, priority=min(resolve_priority(item["payload"]) for item in items),
+                                       fair_key=items[0]["payload"]["fair_key"], label=batch_id)
+
+        return jsonify({
+            "success": True,
+            "message": f"Batch started with {len(items)} workflow(s)",
+            "batch_id": batch_id,
+            "items": results,
+            "status_url": f"/api/batch/{batch_id}",
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
+        }), 202
+
+    except Exception as e:
+        logger.error(f"❌ Batch webhook error: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/api/batch/<batch_id>', methods=['GET'])
+def get_batch_status(batch_id):
+    """Per-item status for a batch"""
+    batch = batch_registry.get(batch_id)
+    if batch is None:
+        return jsonify({"error": "Batch not found"}), 404
+    workflows = {wf_id: (workflow_registry.get(wf_id) or {}).get("status", "Unknown") for wf_id in batch["workflow_ids"]}
+    counts = {}
+    for status in workflows.values():
+        counts[status] = counts.get(status, 0) + 1
+    return jsonify({
+        "batch_id": batch_id,
+        "status": batch["status"],
+        "started_at": batch["started_at"],
+        "completed_at": batch.get("completed_at"),
+        "counts": counts,
+        "workflows": workflows,
+        "summary": batch.get("summary"),
+        "error": batch.get("error")
+    }), 200
+
+def parse_status_cursor(value):
+    try:
+        return max(0, int(value or 0))
+    except (TypeError, ValueError):
+        return 0
+
 @app.route('/api/workflow/status/<workflow_id>', methods=['GET'])
 def get_workflow_status(workflow_id):
-    """Get workflow status"""
+    """
+    Get workflow status
+
+    Long-poll: pass `cursor` (the `version` from the last response) and `wait`
+    (seconds, capped by STATUS_LONG_POLL_MAX_SECONDS); the request returns as soon
+    as the status changes, or unchanged when `wait` runs out.
+    """
     try:
-        if workflow_id not in active_workflows:
+        workflow_info = workflow_registry.get(workflow_id)
+        if workflow_info is None:
             return jsonify({"error": "Workflow not found"}), 404
 
-        workflow_info = active_workflows[workflow_id]
+        cursor = parse_status_cursor(request.args.get('cursor'))
+        try:
+            wait = min(float(request.args.get('wait', 0)), float(os.getenv("STATUS_LONG_POLL_MAX_SECONDS", "60")))
+        except ValueError:
+            wait = 0
+        if 'cursor' in request.args and wait > 0 and workflow_info["status"] not in TERMINAL_STATUSES:
+            if status_events.wait(workflow_id, cursor, wait):
+                workflow_info = workflow_registry.get(workflow_id) or workflow_info
 
         return jsonify({
             "workflow_id": workflow_id,
+            "version": status_events.latest_version(workflow_id),
             "status": workflow_info["status"],
             "started_at": workflow_info["started_at"],
             "completed_at": workflow_info.get("completed_at"),
+            "details": workflow_info.get("details", {}),
             "response": workflow_info.get("response"),
             "error": workflow_info.get("error")
         }), 200
@@ -305,6 +651,298 @@ def get_workflow_status(workflow_id):
         logger.error(f"❌ Status check error: {e}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/workflow/events/<workflow_id>', methods=['GET'])
+def stream_workflow_events(workflow_id):
+    """
+    📡 Server-sent events: a `status` event per transition (stage progress included),
+    closing after the final one. Reconnects resume from Last-Event-ID (or `cursor`).
+    """
+    if workflow_id not in workflow_registry:
+        return jsonify({"error": "Workflow not found"}), 404
+
+    cursor = parse_status_cursor(request.headers.get('Last-Event-ID') or request.args.get('cursor'))
+    keepalive = float(os.getenv("STATUS_STREAM_KEEPALIVE_SECONDS", "15"))
+    max_seconds = float(os.getenv("STATUS_STREAM_MAX_SECONDS", "3600"))
+
+    # Another process owns the workflow (shared registry): its events never reach this
+    # process's bus, so the registry is re-read every few seconds instead
+    owner = (workflow_registry.get(workflow_id) or {}).get("owner")
+    if owner not in (None, os.getpid()):
+        keepalive = min(keepalive, float(os.getenv("STATUS_STREAM_POLL_SECONDS", "2")))
+
+    def format_event(event):
+        return f"id: {event['version']}\nevent: status\ndata: {json.dumps(event, default=str)}\n\n"
+
+    def snapshot_event(version, workflow_info):
+        return {
+            "version": version,
+            "workflow_id": workflow_id,
+            "status": workflow_info.get("status"),
+            "details": workflow_info.get("details", {}),
+            "error": workflow_info.get("error"),
+            "completed_at": workflow_info.get("completed_at")
+        }
+
+    def generate(cursor=cursor):
+        yield "retry: 3000\n\n"
+        sent_status = None
+        if not cursor:
+            # A fresh subscriber starts from the current state, not the whole history
+            workflow_info = workflow_registry.get(workflow_id) or {}
+            cursor = status_events.latest_version(workflow_id)
+            sent_status = workflow_info.get("status")
+            yield format_event(snapshot_event(cursor, workflow_info))
+        started = time.monotonic()
+        while time.monotonic() - started < max_seconds:
+            workflow_info = workflow_registry.get(workflow_id) or {}
+            if workflow_info.get("status") in TERMINAL_STATUSES and not status_events.events_since(workflow_id, cursor):
+                if sent_status != workflow_info["status"]:
+                    # Finished without a final event on this bus (owned elsewhere, or events pruned)
+                    yield format_event(snapshot_event(cursor, workflow_info))
+                return
+            events = status_events.wait(workflow_id, cursor, keepalive)
+            if not events:
+                workflow_info = workflow_registry.get(workflow_id) or {}
+                if workflow_info.get("status") and workflow_info["status"] != sent_status \
+                        and workflow_info["status"] not in TERMINAL_STATUSES:
+                    # Progress made by another process shows up in the registry only
+                    sent_status = workflow_info["status"]
+                    yield format_event(snapshot_event(cursor, workflow_info))
+                    continue
+                # Comment line: keeps proxies from closing an idle stream
+                yield ": keepalive\n\n"
+                continue
+            for event in events:
+                cursor = event["version"]
+                sent_status = event["status"]
+                yield format_event(event)
+
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/workflow/<workflow_id>', methods=['DELETE'])
+def cancel_workflow(workflow_id):
+    """
+    🛑 Cancel a workflow: queued jobs are dropped at once; running ones stop at the
+    next stage/image/render boundary and their FFmpeg process is killed
+    """
+    try:
+        workflow_info = workflow_registry.get(workflow_id)
+        if workflow_info is None:
+            return jsonify({"error": "Workflow not found"}), 404
+        if workflow_engine and not workflow_engine.webhook_auth_check(dict(request.headers)):
+            return jsonify({"success": False, "error": "Unauthorized - Invalid webhook secret"}), 401
+        if workflow_info["status"] in TERMINAL_STATUSES:
+            return jsonify({
+                "success": False,
+                "error": f"Workflow already {workflow_info['status'].lower()}",
+                "status": workflow_info["status"]
+            }), 409
+
+        owner = workflow_info.get("owner")
+        if owner not in (None, os.getpid()):
+            # Another server process runs it (shared registry): hand the request to its owner
+            if not process_alive(owner):
+                return jsonify({
+                    "success": False,
+                    "error": f"Workflow is owned by process {owner}, which is no longer running",
+                    "status": workflow_info["status"]
+                }), 409
+            workflow_registry.update(workflow_id, cancel_requested=True)
+            logger.info(f"🛑 Cancel requested: {workflow_id} → forwarded to process {owner}")
+            return jsonify({
+                "success": True,
+                "workflow_id": workflow_id,
+                "status": "Cancelling",
+                "owner_process": owner,
+                "renders_killed": 0,
+                "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
+            }), 202
+
+        workflow_info, details = cancel_owned_workflow(workflow_id, workflow_info)
+        logger.info(f"🛑 Cancel requested: {workflow_id} → {workflow_info['status']}")
+        return jsonify({
+            "success": True,
+            "workflow_id": workflow_id,
+            "status": workflow_info["status"],
+            "renders_killed": details.get("renders_killed", 0),
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
+        }), 202
+
+    except Exception as e:
+        logger.error(f"❌ Cancel error: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+def process_alive(pid):
+    try:
+        os.kill(int(pid), 0)
+        return True
+    except PermissionError:
+        return True
+    except (OSError, ValueError, TypeError):
+        return False
+
+def cancel_owned_workflow(workflow_id, workflow_info):
+    """Cancel a workflow this process runs: queued jobs are dropped, running ones stop at their next boundary"""
+    details = {}
+    if get_job_scheduler().cancel(workflow_id):
+        # Never started: nothing to unwind
+        workflow_info = workflow_registry.update(
+            workflow_id,
+            status="Cancelled",
+            response={"ok": False, "cancelled": True, "error": "Workflow cancelled"},
+            completed_at=time.strftime("%Y-%m-%d %H:%M:%S")
+        ) or workflow_info
+        admission.release(workflow_id)
+        if workflow_engine:
+            # Batch items are checkpointed before they queue
+            workflow_engine.end_workflow(workflow_id)
+        publish_workflow_status(workflow_id, workflow_info)
+    else:
+        if workflow_engine:
+            details = workflow_engine.cancel_workflow(workflow_id)
+        update_workflow_status(workflow_id, "Cancelling")
+        workflow_info = workflow_registry.get(workflow_id) or workflow_info
+    return workflow_info, details
+
+def handle_remote_cancel(workflow_id):
+    """A DELETE that reached another process asked us (the owner) to cancel"""
+    workflow_info = workflow_registry.get(workflow_id)
+    if workflow_info and workflow_info["status"] not in TERMINAL_STATUSES:
+        logger.info(f"🛑 Cancel requested via another process: {workflow_id}")
+        cancel_owned_workflow(workflow_id, workflow_info)
+
+# With a shared registry, cancels sent to other processes arrive through the store
+if workflow_registry.shared:
+    workflow_registry.watch_cancel_requests(os.getpid(), handle_remote_cancel)
+
+def start_topic_job(workflow_id, payload, job):
+    """Track a single-topic job (re-run, image regeneration) like a workflow and run it in the background"""
+    workflow_registry.create(workflow_id, "Queued", payload=payload, owner=os.getpid())
+
+    def process_job():
+        try:
+            workflow_engine.status_callback = update_workflow_status
+            result = job()
+            workflow_info = workflow_registry.update(
+                workflow_id,
+                status="Cancelled" if result.get("cancelled") else "Deadline Exceeded" if result.get("deadline_exceeded")
+                else "Completed" if result.get("success") else "Failed",
+                response=result,
+                error=result.get("error"),
+                completed_at=time.strftime("%Y-%m-%d %H:%M:%S")
+            )
+        except Exception as e:
+            logger.error(f"❌ Topic job failed: {workflow_id} - {e}")
+            workflow_info = workflow_registry.update(workflow_id, status="Failed", error=str(e),
+                                                     completed_at=time.strftime("%Y-%m-%d %H:%M:%S"))
+        publish_workflow_status(workflow_id, workflow_info)
+
+    # Small, user-initiated fixes go in the interactive lane
+    schedule_workflow(workflow_id, process_job, PRIORITY_INTERACTIVE, "topic-jobs")
+
+@app.route('/api/topic/<topic_id>/manifest', methods=['GET'])
+def get_topic_manifest(topic_id):
+    """Recorded stage inputs, outputs and content hashes for a topic"""
+    try:
+        if not workflow_engine:
+            return jsonify({"error": "Workflow engine not available"}), 500
+        from backend.artifact_manifest import ArtifactManifest
+        manifest = ArtifactManifest.find(os.path.join(workflow_engine.get_project_root(), "generated_content"), topic_id)
+        if not manifest:
+            return jsonify({"error": "No artifact manifest for topic"}), 404
+        return jsonify({"success": True, **manifest.summary()}), 200
+    except Exception as e:
+        logger.error(f"❌ Manifest error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/topic/<topic_id>/rerun', methods=['POST'])
+def rerun_topic_stage(topic_id):
+    """
+    🔁 Re-run one pipeline stage for a topic from its saved artifacts
+    Body: {"stage": "script|audio|images|render|upload", "overrides": {...}}
+    (optional "deadline_seconds"/"deadline_at" budget for this re-run)
+    """
+    try:
+        if not workflow_engine:
+            return jsonify({"error": "Workflow engine not available"}), 500
+        if not workflow_engine.webhook_auth_check(dict(request.headers)):
+            return jsonify({"success": False, "error": "Unauthorized - Invalid webhook secret"}), 401
+
+        body = request.get_json(silent=True) or {}
+        stage = str(body.get("stage", "")).lower()
+        overrides = body.get("overrides") or {}
+        if not isinstance(overrides, dict):
+            return jsonify({"success": False, "error": "overrides must be an object"}), 400
+
+        from backend.artifact_manifest import ArtifactManifest
+        if not ArtifactManifest.find(os.path.join(workflow_engine.get_project_root(), "generated_content"), topic_id):
+            return jsonify({"success": False, "error": "No artifact manifest for topic"}), 404
+        if stage not in [name for name, _ in workflow_engine.topic_pipeline_stages()]:
+            return jsonify({"success": False, "error": f"Unknown stage: {stage}"}), 400
+
+        workflow_id = unique_id(f"rerun_{topic_id}")
+        deadline_at = Deadline.from_payload({**body, "submitted_at": time.time()}).expires_at
+        start_topic_job(workflow_id, {"topic_id": topic_id, "stage": stage, "overrides": overrides},
+                        lambda: workflow_engine.rerun_topic_stage(topic_id, stage, overrides, workflow_id=workflow_id,
+                                                                  deadline_at=deadline_at))
+
+        return jsonify({
+            "success": True,
+            "message": f"Re-running stage '{stage}' for topic {topic_id}",
+            "workflow_id": workflow_id,
+            "status_url": f"/api/workflow/status/{workflow_id}",
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
+        }), 202
+
+    except Exception as e:
+        logger.error(f"❌ Re-run error: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@app.route('/api/topic/<topic_id>/images/regenerate', methods=['POST'])
+def regenerate_topic_images(topic_id):
+    """
+    🖼️ Regenerate selected image slots; the video re-renders once all 4 images exist
+    Body: {"slots": [2], "prompts": {"2": "optional replacement prompt"}}
+    (optional "deadline_seconds"/"deadline_at" budget for this run)
+    """
+    try:
+        if not workflow_engine:
+            return jsonify({"error": "Workflow engine not available"}), 500
+        if not workflow_engine.webhook_auth_check(dict(request.headers)):
+            return jsonify({"success": False, "error": "Unauthorized - Invalid webhook secret"}), 401
+
+        body = request.get_json(silent=True) or {}
+        try:
+            slots = sorted({int(s) for s in body.get("slots") or []})
+        except (TypeError, ValueError):
+            return jsonify({"success": False, "error": "slots must be a list of numbers 1-4"}), 400
+        prompts = body.get("prompts") or {}
+        if not slots or any(s not in (1, 2, 3, 4) for s in slots) or not isinstance(prompts, dict):
+            return jsonify({"success": False, "error": "slots must be a list of numbers 1-4; prompts an object"}), 400
+
+        from backend.artifact_manifest import ArtifactManifest
+        if not ArtifactManifest.find(os.path.join(workflow_engine.get_project_root(), "generated_content"), topic_id):
+            return jsonify({"success": False, "error": "No artifact manifest for topic"}), 404
+
+        workflow_id = unique_id(f"images_{topic_id}")
+        deadline_at = Deadline.from_payload({**body, "submitted_at": time.time()}).expires_at
+        start_topic_job(workflow_id, {"topic_id": topic_id, "slots": slots},
+                        lambda: workflow_engine.regenerate_image_slots(topic_id, slots, prompts, workflow_id=workflow_id,
+                                                                       deadline_at=deadline_at))
+
+        return jsonify({
+            "success": True,
+            "message": f"Regenerating image slots {slots} for topic {topic_id}",
+            "workflow_id": workflow_id,
+            "status_url": f"/api/workflow/status/{workflow_id}",
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
+        }), 202
+
+    except Exception as e:
+        logger.error(f"❌ Image regeneration error: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
 @app.route('/admin/ensure-db', methods=['POST'])
 def ensure_db():
     """Ensure Google Sheets tabs exist with correct headers; optional reset."""
@@ -338,51 +976,91 @@ def ensure_db():
 
 @app.route('/admin/db-status', methods=['GET'])
 def db_status():
-    """Get database status and record counts."""
+    """Get database status and record counts (cached, one batched Sheets read)."""
     try:
-        # Get record counts from each sheet
-        tables = {}
-
         if not workflow_engine:
             return jsonify({"error": "Workflow engine not available"}), 500
 
-        # Try to get EssentialContent count
-        try:
-            ec_sheet = workflow_engine.gc.open_by_key(workflow_engine.sheet_id).worksheet("EssentialContent")
-            ec_records = ec_sheet.get_all_records()
-            tables['EssentialContent'] = len(ec_records)
-        except Exception as e:
-            logger.warning(f"Could not get EssentialContent count: {e}")
-            tables['EssentialContent'] = 0
-
-        # Try to get APIUsage count
-        try:
-            api_sheet = workflow_engine.gc.open_by_key(workflow_engine.sheet_id).worksheet("APIUsage")
-            api_records = api_sheet.get_all_records()
-            tables['APIUsage'] = len(api_records)
-        except Exception as e:
-            logger.warning(f"Could not get APIUsage count: {e}")
-            tables['APIUsage'] = 0
-
-        # Try to get ErrorLog count
-        try:
-            error_sheet = workflow_engine.gc.open_by_key(workflow_engine.sheet_id).worksheet("ErrorLog")
-            error_records = error_sheet.get_all_records()
-            tables['ErrorLog'] = len(error_records)
-        except Exception as e:
-            logger.warning(f"Could not get ErrorLog count: {e}")
-            tables['ErrorLog'] = 0
+        # ?fresh=true bypasses the short TTL cache
+        fresh = str(request.args.get('fresh', 'false')).lower() in ('1','true','yes','on')
+        counts = workflow_engine.get_table_row_counts(max_age=0 if fresh else None)
+        tables = counts["tables"]
 
         return jsonify({
             "success": True,
             "tables": tables,
-            "total_records": sum(tables.values())
+            "total_records": sum(tables.values()),
+            "cached": counts["cached"],
+            "age_seconds": counts["age_seconds"]
         })
 
     except Exception as e:
         logger.error(f"❌ Database status error: {e}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/admin/metrics', methods=['GET'])
+def get_metrics():
+    """Runtime metrics for background subsystems (queue depths, budgets)."""
+    try:
+        if not workflow_engine:
+            return jsonify({"error": "Workflow engine not available"}), 500
+
+        metrics = {}
+        if getattr(workflow_engine, 'sheets_gateway', None):
+            metrics['sheets_gateway'] = workflow_engine.sheets_gateway.metrics()
+
+        if getattr(workflow_engine, 'drive_uploader', None):
+            metrics['drive_uploads'] = workflow_engine.drive_uploader.metrics()
+
+        from backend.drive_folder_cache import get_drive_folder_cache
+        metrics['drive_folder_cache'] = get_drive_folder_cache().stats()
+
+        from backend.render_scheduler import get_render_scheduler
+        metrics['render_scheduler'] = get_render_scheduler().metrics()
+
+        if getattr(workflow_engine, 'stage_pipeline', None):
+            metrics['stage_pipeline'] = workflow_engine.stage_pipeline.metrics()
+
+        metrics['idempotency'] = idempotency_store.metrics()
+        metrics['admission'] = admission.metrics()
+        metrics['job_scheduler'] = get_job_scheduler().metrics()
+        metrics['status_events'] = status_events.metrics()
+        metrics['workflow_registry'] = workflow_registry.metrics()
+        metrics['batch_registry'] = batch_registry.metrics()
+
+        return jsonify({
+            "success": True,
+            "metrics": metrics,
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
+        }), 200
+
+    except Exception as e:
+        logger.error(f"❌ Metrics error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/admin/storage', methods=['GET'])
+def storage_status():
+    """Disk usage of generated_content and the active retention policy."""
+    try:
+        if not workflow_engine:
+            return jsonify({"error": "Workflow engine not available"}), 500
+        return jsonify({"success": True, **workflow_engine.retention.usage()}), 200
+    except Exception as e:
+        logger.error(f"❌ Storage status error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/admin/storage/sweep', methods=['POST'])
+def storage_sweep():
+    """Run the retention sweeper immediately."""
+    try:
+        if not workflow_engine:
+            return jsonify({"error": "Workflow engine not available"}), 500
+        result = workflow_engine.retention.sweep()
+        return jsonify({"success": True, "result": result, "usage": workflow_engine.retention.usage()}), 200
+    except Exception as e:
+        logger.error(f"❌ Storage sweep error: {e}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/files/<path:filename>')
 def serve_generated_file(filename):
     base_dir = "/app/generated_content"
@@ -443,7 +1121,13 @@ def get_features():
             "tone": "Optional - Default: Friendly",
             "voice_gender": "Optional - Default: Female",
             "platforms": "Optional - Default: [YouTube Shorts]",
-            "track_name": "Optional - Default: Default Track"
+            "track_name": "Optional - Default: Default Track",
+            "upload_types": "Optional - Artifact types pushed to Drive (audio, image, video). Default: DRIVE_UPLOAD_TYPES",
+            "execution_mode": "Optional - sequential | pipelined (per-stage worker pools). Default: PIPELINE_MODE",
+            "priority": "Optional - interactive | high | normal | bulk (or a number, lower runs first). Default: interactive for script/prompt, normal for notes, bulk for batch items",
+            "extraction_mode": "Optional - auto | chunked | single (notes mode; map-reduce extraction for long notes). Default: TOPIC_EXTRACTION_MODE",
+            "deadline_seconds": "Optional - end-to-end budget from submission; stage timeouts and retries shrink to fit and the run fails fast with 'Deadline Exceeded' once it can't finish. Default: WORKFLOW_DEADLINE_SECONDS (0 = none)",
+            "deadline_at": "Optional - absolute deadline (unix seconds or ISO time), instead of deadline_seconds"
         }
     }), 200
 
@@ -471,6 +1155,8 @@ def main():
     print("Health Check: http://localhost:9000/health")
     print("Features: http://localhost:9000/api/features")
     print("Status: http://localhost:9000/api/workflow/status/<id>")
+    print("Status Stream (SSE): http://localhost:9000/api/workflow/events/<id>")
+    print("Batch Webhook: http://localhost:9000/webhook/learning-to-content/batch")
     print("\nStarting server on port 9000...")
     # Start Flask server
     app.run(host='0.0.0.0', port=9000, debug=False, threaded=True)
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+📊 SHEETS GATEWAY
+Single quota-aware entry point for every Google Sheets call made by the engine
+"""
+
+import os
+import re
+import time
+import atexit
+import heapq
+import random
+import threading
+import logging
+from typing import Dict, List, Any, Optional, Callable, Tuple
+import gspread
+
+logger = logging.getLogger(__name__)
+
+# Write priorities (lower value is flushed first)
+PRIORITY_STATUS = 0
+PRIORITY_LOG = 1
+
+
+class TokenBucket:
+    """🪣 Token bucket refilled continuously at `rate_per_minute`"""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate_per_second = max(float(rate_per_minute), 1.0) / 60.0
+        self.capacity = float(capacity if capacity is not None else max(float(rate_per_minute), 1.0))
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate_per_second)
+        self.updated_at = now
+
+    def acquire(self, tokens: float = 1.0):
+        """Block until `tokens` are available, then consume them"""
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate_per_second
+            time.sleep(min(wait, 1.0))
+
+    def drain(self):
+        """Empty the bucket after the server told us we are over quota"""
+        with self.lock:
+            self.tokens = 0.0
+            self.updated_at = time.monotonic()
+
+    def available(self) -> float:
+        with self.lock:
+            self._refill()
+            return round(self.tokens, 2)
+
+
+def is_throttle_error(error: Exception) -> bool:
+    """Detect 429 / quota / transient backend errors from gspread or googleapiclient"""
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "resp", None), "status", None)
+    try:
+        if int(status) in (429, 500, 502, 503):
+            return True
+    except (TypeError, ValueError):
+        pass
+    text = str(error).lower()
+    return "429" in text or "quota" in text or "rate limit" in text or "rate_limit" in text
+
+
+class SheetsGateway:
+    """📊 Quota-aware Sheets client
+
+    - Reads and writes each draw from a token bucket sized to the per-minute quota
+    - Row updates are queued and coalesced per (worksheet, key) so repeated status
+      updates for the same topic collapse into one `update_cells` call
+    - Appends to the same worksheet are batched into one `append_rows` call
+    - Status writes are flushed before log writes
+    - Throttled calls are retried with exponential backoff; queued writes wait
+      out their backoff in the queue, so one throttled write never stalls the rest
+    """
+
+    def __init__(self, spreadsheet, read_quota_per_min: int = 60, write_quota_per_min: int = 60,
+                 max_retries: int = 6, base_backoff: float = 2.0):
+        self.spreadsheet = spreadsheet
+        self.read_bucket = TokenBucket(read_quota_per_min)
+        self.write_bucket = TokenBucket(write_quota_per_min)
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+
+        self._cond = threading.Condition()
+        self._heap: List[Tuple[int, int, Tuple]] = []
+        self._pending: Dict[Tuple, Dict[str, Any]] = {}
+        self._seq = 0
+        self._in_flight = 0
+        self._worker = None
+
+        self._worksheets: Dict[str, Any] = {}
+        self._row_index: Dict[Tuple[str, str], int] = {}
+
+        self.stats = {
+            "reads": 0,
+            "writes": 0,
+            "coalesced": 0,
+            "throttled_retries": 0,
+            "failed_writes": 0,
+            "unknown_keys": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Synchronous calls
+    # ------------------------------------------------------------------
+    def execute(self, kind: str, func: Callable, *args, max_retries: Optional[int] = None, **kwargs):
+        """Run a Sheets call under the read or write budget, retrying on throttling"""
+        bucket = self.read_bucket if kind == "read" else self.write_bucket
+        max_retries = self.max_retries if max_retries is None else max_retries
+        attempt = 0
+        while True:
+            bucket.acquire()
+            try:
+                result = func(*args, **kwargs)
+                self.stats["reads" if kind == "read" else "writes"] += 1
+                return result
+            except Exception as e:
+                if is_throttle_error(e):
+                    bucket.drain()
+                if not is_throttle_error(e) or attempt >= max_retries:
+                    raise
+                delay = self.base_backoff * (2 ** attempt) + random.uniform(0, 1)
+                attempt += 1
+                self.stats["throttled_retries"] += 1
+                logger.warning(f"⏳ Sheets {kind} throttled, retry {attempt}/{max_retries} in {delay:.1f}s: {e}")
+                time.sleep(delay)
+
+    def worksheet(self, name: str):
+        """Return a cached worksheet handle (one metadata read per tab per process)"""
+        ws = self._worksheets.get(name)
+        if ws is None:
+            ws = self.execute("read", self.spreadsheet.worksheet, name)
+            self._worksheets[name] = ws
+        return ws
+
+    def forget_worksheet(self, name: str):
+        """Drop cached handle/row indices after a tab is recreated or reset"""
+        self._worksheets.pop(name, None)
+        for key in [k for k in self._row_index if k[0] == name]:
+            self._row_index.pop(key, None)
+
+    def append_rows_now(self, worksheet_name: str, rows: List[List[Any]], key_column: Optional[int] = None):
+        """Append rows synchronously and remember where keyed rows landed"""
+        ws = self.worksheet(worksheet_name)
+        response = self.execute("write", ws.append_rows, rows)
+        if key_column:
+            self._remember_appended_rows(worksheet_name, rows, key_column, response)
+        return response
+
+    def _remember_appended_rows(self, worksheet_name: str, rows: List[List[Any]], key_column: int, response):
+        try:
+            updated_range = (response or {}).get("updates", {}).get("updatedRange", "")
+            match = re.search(r"![A-Z]+(\d+)", updated_range)
+            if not match:
+                return
+            first_row = int(match.group(1))
+            for offset, row in enumerate(rows):
+                key = str(row[key_column - 1]) if len(row) >= key_column else ""
+                if key:
+                    self._row_index[(worksheet_name, key)] = first_row + offset
+        except Exception as e:
+            logger.debug(f"Could not index appended rows: {e}")
+
+    # ------------------------------------------------------------------
+    # Queued writes
+    # ------------------------------------------------------------------
+    def update_row(self, worksheet_name: str, key: str, cells: Dict[int, Any],
+                   key_column: int = 1, priority: int = PRIORITY_STATUS):
+        """Queue cell updates for the row whose `key_column` equals `key`"""
+        queue_key = ("row", worksheet_name, str(key), key_column)
+        with self._cond:
+            entry = self._pending.get(queue_key)
+            if entry:
+                entry["cells"].update(cells)
+                self.stats["coalesced"] += 1
+                if priority < entry["priority"]:
+                    entry["priority"] = priority
+                    self._push(queue_key, priority)
+            else:
+                self._pending[queue_key] = {"cells": dict(cells), "priority": priority, "attempts": 0}
+                self._push(queue_key, priority)
+            self._ensure_worker()
+            self._cond.notify()
+
+    def append_row(self, worksheet_name: str, row: List[Any], priority: int = PRIORITY_LOG):
+        """Queue a row append; appends to the same tab are sent as one batch"""
+        queue_key = ("append", worksheet_name)
+        with self._cond:
+            entry = self._pending.get(queue_key)
+            if entry:
+                entry["rows"].append(row)
+                self.stats["coalesced"] += 1
+            else:
+                self._pending[queue_key] = {"rows": [row], "priority": priority, "attempts": 0}
+                self._push(queue_key, priority)
+            self._ensure_worker()
+            self._cond.notify()
+
+    def flush(self, timeout: float = 30.0) -> bool:
+        """Wait until the write queue is drained"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._pending or self._in_flight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def queue_depth(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._cond:
+            pending = list(self._pending.items())
+            in_flight = self._in_flight
+        return {
+            "queue_depth": len(pending),
+            "status_writes_pending": sum(1 for _, e in pending if e["priority"] == PRIORITY_STATUS),
+            "log_writes_pending": sum(1 for _, e in pending if e["priority"] != PRIORITY_STATUS),
+            "in_flight": in_flight,
+            "read_tokens": self.read_bucket.available(),
+            "write_tokens": self.write_bucket.available(),
+            **self.stats,
+        }
+
+    def _push(self, queue_key: Tuple, priority: int):
+        self._seq += 1
+        heapq.heappush(self._heap, (priority, self._seq, queue_key))
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="sheets-gateway", daemon=True)
+            self._worker.start()
+
+    def _next_item(self):
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                deferred, wake_at, found = [], None, None
+                while self._heap:
+                    item = heapq.heappop(self._heap)
+                    priority, _, queue_key = item
+                    entry = self._pending.get(queue_key)
+                    # Skip stale heap entries left behind by priority upgrades
+                    if entry is None or entry["priority"] != priority:
+                        continue
+                    # Entries backing off stay queued without holding up the ones behind them
+                    if entry.get("not_before", 0) > now:
+                        deferred.append(item)
+                        wake_at = min(wake_at or entry["not_before"], entry["not_before"])
+                        continue
+                    found = (queue_key, entry)
+                    break
+                for item in deferred:
+                    heapq.heappush(self._heap, item)
+                if found:
+                    self._pending.pop(found[0])
+                    self._in_flight += 1
+                    return found
+                self._cond.wait(None if wake_at is None else wake_at - now)
+
+    def _run(self):
+        while True:
+            queue_key, entry = self._next_item()
+            try:
+                if queue_key[0] == "row":
+                    self._write_row(queue_key, entry)
+                else:
+                    self._write_append(queue_key, entry)
+            except Exception as e:
+                self._requeue(queue_key, entry, e)
+            finally:
+                with self._cond:
+                    self._in_flight -= 1
+                    self._cond.notify_all()
+
+    def _requeue(self, queue_key: Tuple, entry: Dict[str, Any], error: Exception):
+        """Put a throttled write back with a `not_before` time; anything else is dropped at once"""
+        entry["attempts"] += 1
+        if not is_throttle_error(error):
+            self.stats["failed_writes"] += 1
+            logger.error(f"❌ Sheets write dropped {queue_key}: {error}")
+            return
+        if entry["attempts"] > self.max_retries:
+            self.stats["failed_writes"] += 1
+            logger.error(f"❌ Sheets write dropped after {self.max_retries} retries {queue_key}: {error}")
+            return
+        delay = self.base_backoff * (2 ** (entry["attempts"] - 1)) + random.uniform(0, 1)
+        self.stats["throttled_retries"] += 1
+        logger.warning(f"⏳ Sheets write {queue_key} throttled ({error}); retrying in {delay:.1f}s")
+        entry["not_before"] = time.monotonic() + delay
+        with self._cond:
+            newer = self._pending.get(queue_key)
+            if newer:
+                # Newer values win; only fill in cells/rows the newer entry lacks
+                if "cells" in entry:
+                    merged = dict(entry["cells"])
+                    merged.update(newer["cells"])
+                    newer["cells"] = merged
+                else:
+                    newer["rows"] = entry["rows"] + newer["rows"]
+                newer["attempts"] = max(newer["attempts"], entry["attempts"])
+                newer["not_before"] = max(newer.get("not_before", 0), entry["not_before"])
+            else:
+                self._pending[queue_key] = entry
+                self._push(queue_key, entry["priority"])
+            self._cond.notify()
+
+    def _resolve_row(self, worksheet_name: str, key: str, key_column: int) -> Optional[int]:
+        """Find the row holding `key`; cached positions are re-checked because the
+        sheet can be cleared, rewritten or hand-edited by other clients"""
+        ws = self.worksheet(worksheet_name)
+        row = self._row_index.get((worksheet_name, key))
+        if row:
+            cell = self.execute("read", ws.cell, row, key_column)
+            if str(getattr(cell, "value", "") or "") == key:
+                return row
+            logger.info(f"🔄 Row {row} in {worksheet_name} no longer holds '{key}', re-indexing")
+        values = self.execute("read", ws.col_values, key_column)
+        # Rows moved, so every cached position for this tab is suspect
+        for stale in [k for k in self._row_index if k[0] == worksheet_name]:
+            self._row_index.pop(stale, None)
+        for idx, val in enumerate(values, start=1):
+            if val:
+                self._row_index[(worksheet_name, val)] = idx
+        return self._row_index.get((worksheet_name, key))
+
+    def _write_row(self, queue_key: Tuple, entry: Dict[str, Any]):
+        _, worksheet_name, key, key_column = queue_key
+        row = self._resolve_row(worksheet_name, key, key_column)
+        if not row:
+            # Writing anywhere else would overwrite another topic's row
+            self.stats["unknown_keys"] += 1
+            logger.warning(f"⚠️ Key '{key}' not found in {worksheet_name}; dropping update of "
+                           f"{len(entry['cells'])} cell(s)")
+            return
+        ws = self.worksheet(worksheet_name)
+        cells = [gspread.Cell(row, col, value) for col, value in sorted(entry["cells"].items())]
+        self.execute("write", ws.update_cells, cells, max_retries=0)
+        logger.info(f"📊 Sheets row {row} in {worksheet_name} updated ({len(cells)} cells)")
+
+    def _write_append(self, queue_key: Tuple, entry: Dict[str, Any]):
+        _, worksheet_name = queue_key
+        ws = self.worksheet(worksheet_name)
+        self.execute("write", ws.append_rows, entry["rows"], max_retries=0)
+        logger.info(f"📊 Appended {len(entry['rows'])} row(s) to {worksheet_name}")
+
+
+_gateways: Dict[str, SheetsGateway] = {}
+_gateways_lock = threading.Lock()
+
+
+def get_sheets_gateway(spreadsheet) -> SheetsGateway:
+    """Return the process-wide gateway for a spreadsheet so all engines share one budget"""
+    key = getattr(spreadsheet, "id", None) or str(id(spreadsheet))
+    with _gateways_lock:
+        gateway = _gateways.get(key)
+        if gateway is None:
+            gateway = SheetsGateway(
+                spreadsheet,
+                read_quota_per_min=int(os.getenv("SHEETS_READ_QUOTA_PER_MIN", "60")),
+                write_quota_per_min=int(os.getenv("SHEETS_WRITE_QUOTA_PER_MIN", "60")),
+            )
+            if not _gateways:
+                atexit.register(flush_all_gateways)
+            _gateways[key] = gateway
+        return gateway
+
+
+def flush_all_gateways():
+    """Drain queued writes on shutdown so the last status updates aren't lost"""
+    timeout = float(os.getenv("SHEETS_SHUTDOWN_FLUSH_SECONDS", "15"))
+    with _gateways_lock:
+        gateways = list(_gateways.values())
+    for gateway in gateways:
+        if not gateway.flush(timeout=timeout):
+            logger.warning(f"⚠️ Sheets queue not drained at shutdown ({gateway.queue_depth()} pending)")
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+🏭 STAGE PIPELINE
+Per-stage worker pools so topics flow script → audio → images → render → upload concurrently
+"""
+
+import os
+import time
+import heapq
+import itertools
+import threading
+import logging
+from concurrent.futures import Future
+from typing import Dict, List, Any, Optional, Callable, Tuple
+
+from backend.job_scheduler import PRIORITY_NORMAL, parse_weights, fair_weight
+
+logger = logging.getLogger(__name__)
+
+
+class FairQueue:
+    """Blocking queue of (priority, seq, fair_key, ...) entries: lowest priority first, then
+    fair keys take turns by weighted virtual time (as in JobScheduler), FIFO within a key"""
+
+    def __init__(self, weights: Dict[str, float]):
+        self.weights = weights
+        self._cond = threading.Condition()
+        self._heaps: Dict[str, List[tuple]] = {}  # fair_key -> heap of entries
+        self._clock: Dict[str, float] = {}  # fair_key -> virtual time
+
+    def put(self, entry: tuple):
+        fair_key = entry[2]
+        with self._cond:
+            if not self._heaps.get(fair_key):
+                # A key that was idle rejoins at the current virtual time, not with saved-up credit
+                active = [self._clock[k] for k, h in self._heaps.items() if h]
+                self._clock[fair_key] = max(self._clock.get(fair_key, 0.0), min(active) if active else 0.0)
+            heapq.heappush(self._heaps.setdefault(fair_key, []), entry)
+            self._cond.notify()
+
+    def get(self) -> tuple:
+        with self._cond:
+            while not any(self._heaps.values()):
+                self._cond.wait()
+            fair_key = min((k for k, h in self._heaps.items() if h),
+                           key=lambda k: (self._heaps[k][0][0], self._clock.get(k, 0.0), self._heaps[k][0][1]))
+            entry = heapq.heappop(self._heaps[fair_key])
+            self._clock[fair_key] = self._clock.get(fair_key, 0.0) + 1 / fair_weight(self.weights, fair_key)
+            return entry
+
+    def qsize(self) -> int:
+        with self._cond:
+            return sum(len(h) for h in self._heaps.values())
+
+
+class PipelineStage:
+    """🏭 One stage: a fair priority queue plus `workers` threads running `func(item)`"""
+
+    def __init__(self, name: str, func: Callable[[Dict], bool], workers: int, weights: Dict[str, float]):
+        self.name = name
+        self.func = func
+        self.workers = max(1, workers)
+        self.queue = FairQueue(weights)
+        self.busy = 0
+        self.processed = 0
+        self.failed = 0
+        self.total_wait = 0.0
+        self.total_seconds = 0.0
+
+
+class StagePipeline:
+    """🏭 Stage-pipelined executor
+
+    Each stage owns a queue and a worker pool sized to its own bottleneck; items are
+    served lowest priority value first, then fair keys (tracks) take turns within a
+    priority (JOB_FAIR_WEIGHTS applies), FIFO within a key.
+    A stage function receives the item and returns False to stop it early; an
+    exception stops it as failed. Either way `finish(item, error)` turns the item
+    into its result, which resolves the Future returned by `submit`.
+    """
+
+    def __init__(self, stages: List[Tuple[str, Callable[[Dict], bool], int]]):
+        weights = parse_weights(os.getenv("JOB_FAIR_WEIGHTS", ""))
+        self.stages = [PipelineStage(name, func, workers, weights) for name, func, workers in stages]
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self._started = False
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._started:
+                return
+            for index, stage in enumerate(self.stages):
+                for i in range(stage.workers):
+                    t = threading.Thread(target=self._worker, args=(index,), name=f"stage-{stage.name}-{i}", daemon=True)
+                    t.start()
+            self._started = True
+            logger.info("🏭 Stage pipeline started: " + ", ".join(f"{s.name}×{s.workers}" for s in self.stages))
+
+    def submit(self, item: Dict, finish: Callable[[Dict, Optional[Exception]], Any],
+               priority: int = PRIORITY_NORMAL, fair_key: str = "default") -> Future:
+        """Queue an item at the first stage; it keeps `priority` and `fair_key` through every stage"""
+        self._ensure_started()
+        future: Future = Future()
+        self.stages[0].queue.put((priority, next(self._seq), fair_key, item, future, finish, time.monotonic()))
+        return future
+
+    def run(self, items: List[Dict], finish: Callable[[Dict, Optional[Exception]], Any],
+            priority: int = PRIORITY_NORMAL, fair_key: str = "default") -> List[Any]:
+        """Push every item through the pipeline and return the results in input order"""
+        futures = [self.submit(item, finish, priority, fair_key) for item in items]
+        return [f.result() for f in futures]
+
+    def _worker(self, index: int):
+        stage = self.stages[index]
+        while True:
+            priority, seq, fair_key, item, future, finish, queued_at = stage.queue.get()
+            started = time.monotonic()
+            with self._lock:
+                stage.busy += 1
+                stage.total_wait += started - queued_at
+            error = None
+            try:
+                proceed = stage.func(item)
+            except Exception as e:
+                proceed, error = False, e
+            with self._lock:
+                stage.busy -= 1
+                stage.processed += 1
+                stage.failed += 1 if error else 0
+                stage.total_seconds += time.monotonic() - started
+
+            if proceed and index + 1 < len(self.stages):
+                self.stages[index + 1].queue.put((priority, seq, fair_key, item, future, finish, time.monotonic()))
+                continue
+            try:
+                future.set_result(finish(item, error))
+            except Exception as e:
+                logger.error(f"❌ Pipeline finish failed after stage {stage.name}: {e}")
+                future.set_exception(e)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                stage.name: {
+                    "workers": stage.workers,
+                    "busy": stage.busy,
+                    "queue_depth": stage.queue.qsize(),
+                    "processed": stage.processed,
+                    "failed": stage.failed,
+                    "avg_wait_seconds": round(stage.total_wait / stage.processed, 2) if stage.processed else 0.0,
+                    "avg_seconds": round(stage.total_seconds / stage.processed, 2) if stage.processed else 0.0,
+                }
+                for stage in self.stages
+            }
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+📡 STATUS EVENTS
+Versioned per-workflow status events that SSE streams and long-polls wait on
+"""
+
+import os
+import time
+import itertools
+import threading
+import logging
+from collections import deque
+from typing import Dict, List, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# Statuses after which a workflow publishes nothing more
+TERMINAL_STATUSES = ("Completed", "Failed", "Cancelled", "Deadline Exceeded")
+
+
+class StatusEventBus:
+    """📡 Every status transition gets a version from one global counter
+
+    Readers keep the last version they saw as a cursor and ask for anything newer,
+    blocking until it arrives, so clients get changes as they happen instead of
+    polling. Each workflow keeps its last `history` events; a finished workflow's
+    events are dropped `retention_seconds` after its final event.
+    """
+
+    def __init__(self, history: Optional[int] = None, retention_seconds: Optional[float] = None):
+        self.history = history or int(os.getenv("STATUS_EVENT_HISTORY", "200"))
+        self.retention_seconds = retention_seconds if retention_seconds is not None else float(os.getenv("STATUS_EVENT_RETENTION_SECONDS", "3600"))
+        self._cond = threading.Condition()
+        self._versions = itertools.count(1)
+        self._events: Dict[str, deque] = {}
+        self._finished: Dict[str, float] = {}  # workflow_id -> time of its terminal event
+
+    def publish(self, workflow_id: str, status: str, **fields) -> int:
+        """Record a transition and wake every waiter; returns its version"""
+        with self._cond:
+            version = next(self._versions)
+            event = {"version": version, "workflow_id": workflow_id, "status": status,
+                     "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"), **fields}
+            self._events.setdefault(workflow_id, deque(maxlen=self.history)).append(event)
+            if status in TERMINAL_STATUSES:
+                self._finished[workflow_id] = time.time()
+            else:
+                self._finished.pop(workflow_id, None)
+            self._prune()
+            self._cond.notify_all()
+            return version
+
+    def _prune(self):
+        cutoff = time.time() - self.retention_seconds
+        for workflow_id in [w for w, at in self._finished.items() if at < cutoff]:
+            self._finished.pop(workflow_id, None)
+            self._events.pop(workflow_id, None)
+
+    def latest_version(self, workflow_id: str) -> int:
+        with self._cond:
+            events = self._events.get(workflow_id)
+            return events[-1]["version"] if events else 0
+
+    def events_since(self, workflow_id: str, cursor: int = 0) -> List[Dict[str, Any]]:
+        with self._cond:
+            return [e for e in self._events.get(workflow_id, ()) if e["version"] > cursor]
+
+    def wait(self, workflow_id: str, cursor: int = 0, timeout: float = 30.0) -> List[Dict[str, Any]]:
+        """Events newer than `cursor`, blocking up to `timeout` seconds for the first one"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                events = [e for e in self._events.get(workflow_id, ()) if e["version"] > cursor]
+                remaining = deadline - time.monotonic()
+                if events or remaining <= 0:
+                    return events
+                self._cond.wait(remaining)
+
+    def is_finished(self, workflow_id: str) -> bool:
+        with self._cond:
+            return workflow_id in self._finished
+
+    def forget(self, workflow_id: str):
+        with self._cond:
+            self._events.pop(workflow_id, None)
+            self._finished.pop(workflow_id, None)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "workflows": len(self._events),
+                "finished": len(self._finished),
+                "events": sum(len(e) for e in self._events.values()),
+            }
+
+
+_status_events: Optional[StatusEventBus] = None
+_status_events_lock = threading.Lock()
+
+
+def get_status_events() -> StatusEventBus:
+    """Process-wide status event bus"""
+    global _status_events
+    with _status_events_lock:
+        if _status_events is None:
+            _status_events = StatusEventBus()
+        return _status_events
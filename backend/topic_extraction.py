@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+🗺️ TOPIC EXTRACTION (MAP-REDUCE)
+Split long raw notes into section chunks and merge the topics extracted from each
+"""
+
+import re
+import logging
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Markdown headings, numbered headings ("2. Caching", "Chapter 3") and underlined titles
+_HEADING_RE = re.compile(r"^(#{1,6}\s+\S|(chapter|section|module|lesson|part)\s+\d+\b|\d+(\.\d+)*[.)]\s+[A-Z]|.+\n[=-]{3,}\s*$)",
+                         re.IGNORECASE | re.MULTILINE)
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {"a", "an", "the", "and", "or", "of", "to", "in", "on", "for", "with", "how", "what", "why", "your", "you", "is", "are"}
+
+
+def split_sections(raw_notes: str) -> List[str]:
+    """Cut notes at section boundaries (headings); falls back to one section"""
+    text = raw_notes.replace("\r\n", "\n").strip()
+    starts = sorted({m.start() for m in _HEADING_RE.finditer(text)} | {0})
+    return [s for s in (text[a:b].strip() for a, b in zip(starts, starts[1:] + [len(text)])) if s]
+
+
+def _split_oversized(section: str, max_chars: int) -> List[str]:
+    """Break a section longer than `max_chars` on paragraph, then line, then hard boundaries"""
+    if len(section) <= max_chars:
+        return [section]
+    for separator in ("\n\n", "\n", " "):
+        parts = section.split(separator)
+        if len(parts) > 1:
+            pieces, current = [], ""
+            for part in parts:
+                candidate = f"{current}{separator}{part}" if current else part
+                if len(candidate) <= max_chars or not current:
+                    current = candidate
+                elif len(current) < max_chars // 4 and len(part) > max_chars:
+                    # Keep a short lead-in (usually the heading) with the start of the text it introduces
+                    head = _split_oversized(part, max_chars - len(current) - len(separator))[0]
+                    pieces.append(f"{current}{separator}{head}")
+                    current = part[len(head):].lstrip()
+                else:
+                    pieces.append(current)
+                    current = part
+            pieces.append(current)
+            if all(len(p) <= max_chars for p in pieces):
+                return pieces
+            return [chunk for p in pieces for chunk in _split_oversized(p, max_chars)]
+    return [section[i:i + max_chars] for i in range(0, len(section), max_chars)]
+
+
+def chunk_notes(raw_notes: str, max_chars: int) -> List[str]:
+    """Pack whole sections into chunks of at most `max_chars`, keeping note order"""
+    chunks, current = [], ""
+    for section in split_sections(raw_notes):
+        if current and len(current) < max_chars // 4 and len(current) + len(section) + 2 > max_chars:
+            # A short leftover rides along with the next section instead of becoming its own chunk
+            section, current = f"{current}\n\n{section}", ""
+        for piece in _split_oversized(section, max_chars):
+            if current and len(current) + len(piece) + 2 > max_chars:
+                chunks.append(current)
+                current = piece
+            else:
+                current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _title_tokens(topic: Dict) -> set:
+    title = str(topic.get("title") or topic.get("Title") or "").lower()
+    return {w for w in _WORD_RE.findall(title) if w not in _STOPWORDS}
+
+
+def _is_duplicate(a: set, b: set, threshold: float) -> bool:
+    if not a or not b:
+        return False
+    return len(a & b) / len(a | b) >= threshold
+
+
+def merge_topics(chunk_topics: List[List[Dict]], limit: int, similarity: float = 0.6) -> List[Dict]:
+    """🗺️ Reduce step: dedupe near-identical titles, then pick `limit` topics in note order
+
+    Duplicates fold their main points into the first occurrence. When there are more
+    topics than needed, chunks take turns by rank so the selection covers the whole
+    document, and the result is re-sorted into the order the topics appear in the notes.
+    """
+    kept: List[Dict] = []  # {"topic", "tokens", "chunk", "rank"}
+    for chunk_index, topics in enumerate(chunk_topics):
+        for rank, topic in enumerate(t for t in topics if isinstance(t, dict)):
+            tokens = _title_tokens(topic)
+            duplicate = next((k for k in kept if _is_duplicate(tokens, k["tokens"], similarity)), None)
+            if duplicate:
+                points = duplicate["topic"].setdefault("main_points", list(duplicate["topic"].get("MainPoints") or []))
+                for point in topic.get("main_points") or topic.get("MainPoints") or []:
+                    if point not in points:
+                        points.append(point)
+                continue
+            kept.append({"topic": dict(topic), "tokens": tokens, "chunk": chunk_index, "rank": rank})
+
+    if len(kept) > limit:
+        kept = sorted(kept, key=lambda k: (k["rank"], k["chunk"]))[:limit]
+    kept.sort(key=lambda k: (k["chunk"], k["rank"]))
+
+    merged = []
+    for order, entry in enumerate(kept, 1):
+        topic = entry["topic"]
+        topic["Order"] = order
+        merged.append(topic)
+    logger.info(f"🗺️ Merged {sum(len(t) for t in chunk_topics)} chunk topics into {len(merged)}")
+    return merged
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+💾 WORKFLOW CHECKPOINTS
+Durable per-workflow journal so unfinished runs can resume after a crash or deploy
+"""
+
+import os
+import json
+import time
+import threading
+import logging
+from typing import Dict, List, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class WorkflowCheckpointStore:
+    """💾 One JSON checkpoint per running workflow
+
+    A checkpoint holds the request payload, the extracted topics once they are
+    inserted, and each topic's outcome. Stage-level progress lives in the topic
+    folders' artifact manifests, so a resumed topic skips every stage that had
+    already finished. Checkpoints are removed when their workflow finishes.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+
+    def _path(self, workflow_id: str) -> str:
+        safe_id = "".join(c if c.isalnum() or c in "-_" else "_" for c in workflow_id)
+        return os.path.join(self.directory, f"{safe_id}.json")
+
+    def load(self, workflow_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(workflow_id), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return None
+
+    def _write(self, checkpoint: Dict[str, Any]):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self._path(checkpoint["workflow_id"])
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(checkpoint, f, default=str)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not write workflow checkpoint for {checkpoint.get('workflow_id')}: {e}")
+
+    def _update(self, workflow_id: str, updater) -> bool:
+        with self._lock:
+            checkpoint = self.load(workflow_id)
+            if checkpoint is None:
+                return False
+            updater(checkpoint)
+            checkpoint["updated_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+            self._write(checkpoint)
+            return True
+
+    # ------------------------------------------------------------------
+    # Journal
+    # ------------------------------------------------------------------
+    def begin(self, workflow_id: str, payload: Dict):
+        """Create (or keep, when resuming) the checkpoint for a workflow, owned by this process"""
+        with self._lock:
+            if self.load(workflow_id):
+                return
+            now = time.strftime("%Y-%m-%d %H:%M:%S")
+            self._write({
+                "workflow_id": workflow_id,
+                "phase": "started",
+                "payload": payload,
+                "created_at": now,
+                "updated_at": now,
+                "created_ts": time.time(),
+                "run_data": None,
+                "topics": [],
+                "topic_results": {},
+                "attempts": 0,
+            })
+        self.claim(workflow_id)
+
+    def record_topics(self, workflow_id: str, run_data: Dict, topics: List[Dict]):
+        """Topics are extracted and inserted; from here on a resume never re-extracts"""
+        def updater(checkpoint):
+            checkpoint["phase"] = "topics_inserted"
+            checkpoint["run_data"] = {k: v for k, v in run_data.items() if k != "webhook"}
+            checkpoint["topics"] = topics
+        self._update(workflow_id, updater)
+
+    def record_topic_result(self, workflow_id: str, topic_id: str, success: bool, status: str):
+        self._update(workflow_id, lambda c: c.setdefault("topic_results", {}).__setitem__(
+            topic_id, {"success": success, "status": status, "at": time.strftime("%Y-%m-%d %H:%M:%S")}))
+
+    def finish(self, workflow_id: str):
+        """The workflow reached a final state; nothing left to resume"""
+        with self._lock:
+            try:
+                os.remove(self._path(workflow_id))
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.warning(f"⚠️ Could not remove workflow checkpoint for {workflow_id}: {e}")
+        self.release(workflow_id)
+
+    # ------------------------------------------------------------------
+    # Resume
+    # ------------------------------------------------------------------
+    def unfinished(self, max_age_hours: float = 24) -> List[Dict[str, Any]]:
+        """Checkpoints left behind by a crash; ones older than `max_age_hours` are dropped"""
+        if not os.path.isdir(self.directory):
+            return []
+        checkpoints = []
+        cutoff = time.time() - max_age_hours * 3600
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith(".json"):
+                continue
+            checkpoint = self.load(name[:-5])
+            if checkpoint is None:
+                continue
+            if checkpoint.get("created_ts", 0) < cutoff:
+                logger.warning(f"⚠️ Abandoning stale workflow checkpoint {checkpoint.get('workflow_id')}")
+                self.finish(checkpoint["workflow_id"])
+                continue
+            checkpoints.append(checkpoint)
+        return checkpoints
+
+    def claim(self, workflow_id: str) -> bool:
+        """Let exactly one live process resume a workflow"""
+        lock_path = f"{self._path(workflow_id)[:-5]}.lock"
+        for _ in range(2):
+            try:
+                fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                with os.fdopen(fd, "w") as f:
+                    f.write(str(os.getpid()))
+                self._update(workflow_id, lambda c: c.__setitem__("attempts", c.get("attempts", 0) + 1))
+                return True
+            except FileExistsError:
+                try:
+                    with open(lock_path, "r") as f:
+                        owner = int(f.read().strip() or 0)
+                    if owner and owner != os.getpid():
+                        os.kill(owner, 0)
+                        return False  # owner is alive
+                except (OSError, ValueError):
+                    pass
+                # Stale lock from a dead process
+                try:
+                    os.remove(lock_path)
+                except FileNotFoundError:
+                    pass
+        return False
+
+    def release(self, workflow_id: str):
+        try:
+            os.remove(f"{self._path(workflow_id)[:-5]}.lock")
+        except FileNotFoundError:
+            pass
@@ -14,6 +14,10 @@ import base64
 import subprocess
 import threading
 import re
+import copy
+import functools
+import math
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 from dotenv import load_dotenv
@@ -23,6 +27,19 @@ from google.cloud import texttospeech
 from googleapiclient.discovery import build
 from googleapiclient.http import MediaFileUpload
 import logging
+from backend.sheets_gateway import get_sheets_gateway, PRIORITY_STATUS, PRIORITY_LOG
+from backend.drive_folder_cache import get_drive_folder_cache, is_not_found_error
+from backend.drive_uploader import DriveUploadService
+from backend.retention import RetentionManager
+from backend.render_scheduler import get_render_scheduler
+from backend.stage_pipeline import StagePipeline
+from backend.artifact_manifest import ArtifactManifest, hash_file, hash_value
+from backend.workflow_checkpoints import WorkflowCheckpointStore
+from backend.topic_extraction import chunk_notes, merge_topics
+from backend.idempotency import unique_id
+from backend.job_scheduler import resolve_priority, resolve_fair_key, PRIORITY_NORMAL
+from backend.cancellation import CancellationRegistry, WorkflowCancelled
+from backend.deadline import Deadline, DeadlineExceeded
 
 # Load environment variables
 load_dotenv()
@@ -34,6 +51,11 @@ logger = logging.getLogger(__name__)
 class CompleteWorkflowEngine:
     """🎯 COMPLETE WORKFLOW ENGINE - EXACT N8N REPLICA"""
 
+    # Least time (seconds) a step needs; with less budget left it fails fast instead of starting
+    STAGE_MIN_SECONDS = {"extract": 15, "script": 15, "audio": 15, "images": 30, "render": 30, "upload": 0}
+    # Topic fields that belong to one run, never to the topic's saved source
+    RUN_ONLY_FIELDS = ("WorkflowID", "DeadlineAt", "Priority")
+
     def __init__(self):
         # Environment variables (exact from your n8n workflow)
         self.google_sheet_id = os.getenv("GOOGLE_SHEET_ID")
@@ -46,6 +68,8 @@ class CompleteWorkflowEngine:
         self.audio_folder_id = os.getenv("AUDIO_FOLDER_ID")
         self.images_folder_id = os.getenv("IMAGES_FOLDER_ID")
         self.videos_folder_id = os.getenv("VIDEOS_FOLDER_ID")
+        # Artifact types pushed to Drive by default (audio, image, video)
+        self.default_upload_types = self.parse_upload_types(os.getenv("DRIVE_UPLOAD_TYPES", "audio,image,video"))
 
         # Status flow (exact from Master Developer Prompt)
         self.status_flow = [
@@ -70,8 +94,45 @@ class CompleteWorkflowEngine:
             ("Urdu", "Female"): {"name": "ur-IN-Wavenet-A", "code": "ur-IN"}
         }
 
+        # EssentialContent columns holding media links (1-based)
+        self.essential_link_columns = {
+            "Image1Link": 15, "Image2Link": 16, "Image3Link": 17, "Image4Link": 18,
+            "AudioFileLink": 19, "VideoFileLink": 20, "VideoVariantLinks": 25
+        }
+
+        # Per-platform render variants produced alongside the master 1080x1920 video
+        self.platform_video_profiles = {
+            "YouTube Shorts": {"width": 1080, "height": 1920, "max_duration": 60, "maxrate": "8M", "bufsize": "16M"},
+            "Instagram Reels": {"width": 1080, "height": 1920, "max_duration": 90, "maxrate": "5M", "bufsize": "10M"},
+            "LinkedIn": {"width": 1080, "height": 1080, "max_duration": 600, "maxrate": "5M", "bufsize": "10M"},
+        }
+        self.render_platform_variants = os.getenv("RENDER_PLATFORM_VARIANTS", "true").lower() in ("1", "true", "yes", "on")
+        # Drive links resolved by background uploads: TopicID -> {link field: url}
+        self.resolved_links: Dict[str, Dict[str, str]] = {}
+        self.resolved_links_lock = threading.RLock()
+        # Provider bytes kept in memory until their Drive upload is queued (path -> bytes)
+        self.artifact_buffers: Dict[str, bytes] = {}
+        self.artifact_buffers_lock = threading.Lock()
+
+        # Retention / disk-quota policy for generated_content (sweeper started by the server)
+        self.retention = RetentionManager(os.path.join(self.get_project_root(), "generated_content"))
+
+        # Stage-pipelined execution (built on first use); PIPELINE_MODE picks the default mode
+        self.default_execution_mode = os.getenv("PIPELINE_MODE", "sequential").lower()
+        self.stage_pipeline = None
+        self.stage_pipeline_lock = threading.Lock()
+
+        # Cancel flags checked between stages, image slots and render slots
+        self.cancellation = CancellationRegistry()
+
+        # Durable workflow journal used to resume runs interrupted by a crash/deploy
+        self.checkpoints = WorkflowCheckpointStore(os.getenv("WORKFLOW_CHECKPOINT_DIR") or os.path.join(
+            self.get_project_root(), "generated_content", ".workflows"))
+
         # Initialize clients
         self.llm_client = None
+        self.sheets_gateway = None
+        self.drive_uploader = None
         self.setup_clients()
 
     class GeminiLLMClient:
@@ -136,6 +197,8 @@ class CompleteWorkflowEngine:
             )
             self.sheets_client = gspread.authorize(sheets_creds)
             self.sheet = self.sheets_client.open_by_key(self.google_sheet_id)
+            # All Sheets traffic goes through one quota-aware gateway per spreadsheet
+            self.sheets_gateway = get_sheets_gateway(self.sheet)
 
             # 🔧 FIXED: Initialize Google Drive with OAuth2 (for file uploads)
             oauth2_creds_path = os.path.join(config_dir, 'secrets', 'client_secret_777658526045-naf0mhnn7oqrkbar8461344qdi232pm9.apps.googleusercontent.com.json')
@@ -175,6 +238,11 @@ class CompleteWorkflowEngine:
                         pickle.dump(drive_creds, token)
 
                 self.drive_service = build('drive', 'v3', credentials=drive_creds)
+                # Background uploader; each worker thread builds its own Drive service
+                self.drive_uploader = DriveUploadService(
+                    lambda: build('drive', 'v3', credentials=drive_creds, cache_discovery=False),
+                    workers=int(os.getenv("DRIVE_UPLOAD_WORKERS", "4"))
+                )
                 logger.info("✅ Google Drive OAuth2 service initialized")
             else:
                 logger.warning("⚠️ OAuth2 credentials not found, Drive uploads disabled")
@@ -213,8 +281,10 @@ class CompleteWorkflowEngine:
             logger.error(f"❌ Full traceback: {traceback.format_exc()}")
             # Continue without Google services for testing
             self.sheet = None
+            self.sheets_gateway = None
             self.tts_client = None
             self.drive_service = None
+            self.drive_uploader = None
 
     def get_project_root(self) -> str:
         current_dir = os.getcwd()
@@ -271,9 +341,35 @@ class CompleteWorkflowEngine:
         folder_path = os.path.join(project_root, "generated_content", f"{topic_id}_{topic_title}")
         return folder_path
 
+    def drive_file_metadata(self, file_path: str, file_type: str, topic_data: Dict, service=None) -> Dict:
+        """☁️ Build Drive file body (name + topic subfolder parent) for an upload"""
+        # 🔧 FIXED: Create topic-based folder structure in Google Drive
+        topic_title = topic_data.get('Title', 'Unknown Topic').replace('/', '_').replace('\\', '_').replace(':', '_')[:50]
+        topic_id = topic_data.get('TopicID', 'unknown')
+        topic_folder_name = f"{topic_title}_{topic_id}"
+
+        # Get base folder ID based on file type
+        folder_mapping = {
+            "audio": self.audio_folder_id,
+            "image": self.images_folder_id,
+            "video": self.videos_folder_id
+        }
+
+        base_folder_id = folder_mapping.get(file_type)
+        if not base_folder_id:
+            raise Exception(f"No folder ID configured for {file_type}")
+
+        # Create or find topic subfolder in Google Drive
+        topic_folder_id = self.create_or_find_drive_folder(topic_folder_name, base_folder_id, service=service)
+
+        return {
+            'name': f"{topic_id}_{os.path.basename(file_path)}",
+            'parents': [topic_folder_id]
+        }
+
     def upload_to_google_drive(self, file_path: str, file_type: str, topic_data: Dict) -> str:
         """
-        🔧 FIXED: Upload file to Google Drive using OAuth2 credentials
+        🔧 FIXED: Upload file to Google Drive using OAuth2 credentials (blocking)
         """
         try:
             # Check if Drive service is available
@@ -286,46 +382,25 @@ class CompleteWorkflowEngine:
                 logger.error(f"❌ File not found: {file_path}")
                 return file_path
 
-            # 🔧 FIXED: Create topic-based folder structure in Google Drive
-            topic_title = topic_data.get('Title', 'Unknown Topic').replace('/', '_').replace('\\', '_').replace(':', '_')[:50]
-            topic_id = topic_data.get('TopicID', 'unknown')
-            topic_folder_name = f"{topic_title}_{topic_id}"
-
-            # Get base folder ID based on file type
-            folder_mapping = {
-                "audio": self.audio_folder_id,
-                "image": self.images_folder_id,
-                "video": self.videos_folder_id
-            }
-
-            base_folder_id = folder_mapping.get(file_type)
-            if not base_folder_id:
-                logger.error(f"❌ No folder ID configured for {file_type}")
-                return file_path
-
-            # Create or find topic subfolder in Google Drive
-            topic_folder_id = self.create_or_find_drive_folder(topic_folder_name, base_folder_id)
-
-            # Prepare file metadata
-            file_name = os.path.basename(file_path)
-            drive_file_name = f"{topic_id}_{file_name}"
-
-            file_metadata = {
-                'name': drive_file_name,
-                'parents': [topic_folder_id]
-            }
+            def create_file():
+                file_metadata = self.drive_file_metadata(file_path, file_type, topic_data)
+                media = MediaFileUpload(file_path, resumable=True)
+                logger.info(f"🔧 Uploading {file_type} to Google Drive: {file_metadata['name']}")
+                return file_metadata, self.drive_service.files().create(
+                    body=file_metadata,
+                    media_body=media,
+                    fields='id,webViewLink,webContentLink'
+                )
 
             # Upload file
-            from googleapiclient.http import MediaFileUpload
-            media = MediaFileUpload(file_path, resumable=True)
-
-            logger.info(f"🔧 Uploading {file_type} to Google Drive: {drive_file_name}")
-
-            file = self.drive_service.files().create(
-                body=file_metadata,
-                media_body=media,
-                fields='id,webViewLink,webContentLink'
-            ).execute()
+            file_metadata, request = create_file()
+            try:
+                file = request.execute()
+            except Exception as e:
+                # Cached topic folder deleted in Drive: forget it and retry once
+                if not is_not_found_error(e) or not get_drive_folder_cache().forget_folders(file_metadata.get('parents')):
+                    raise
+                file = create_file()[1].execute()
 
             # Make file publicly viewable
             self.drive_service.permissions().create(
@@ -345,12 +420,149 @@ class CompleteWorkflowEngine:
             logger.error(f"   File exists: {os.path.exists(file_path)}")
             return file_path
 
-    def create_or_find_drive_folder(self, folder_name: str, parent_folder_id: str) -> str:
-        """🔧 Create or find a folder in Google Drive"""
+    def parse_upload_types(self, value: Any) -> List[str]:
+        """☁️ Normalize an upload policy ("audio,video", ["video"], "all", "none") to artifact types"""
+        valid = ["audio", "image", "video"]
+        if value is None:
+            return list(valid)
+        if isinstance(value, str):
+            items = [v.strip().lower() for v in value.split(",")]
+        else:
+            items = [str(v).strip().lower() for v in value]
+        items = [v[:-1] if v.endswith("s") else v for v in items if v]
+        if "all" in items:
+            return list(valid)
+        if "none" in items:
+            return []
+        unknown = [v for v in items if v not in valid]
+        if unknown:
+            logger.warning(f"⚠️ Ignoring unknown upload types: {unknown}")
+        return [v for v in valid if v in items]
+
+    def resolve_upload_types(self, payload: Dict) -> List[str]:
+        """Per-request `upload_types` overrides the DRIVE_UPLOAD_TYPES deployment default"""
+        if payload.get("upload_types") is not None:
+            return self.parse_upload_types(payload.get("upload_types"))
+        return list(self.default_upload_types)
+
+    def queue_drive_upload(self, file_path: str, file_type: str, topic_data: Dict, link_field: str,
+                           link_key: Optional[str] = None) -> str:
+        """☁️ Queue a background Drive upload and return the local path immediately
+
+        When the upload finishes, the Drive link is recorded for the topic and
+        written to the `link_field` column of its EssentialContent row. With
+        `link_key`, the field is a dict (e.g. VideoVariantLinks[platform]).
+        """
+        # Hand the in-memory buffer (if any) to the uploader instead of re-reading the file
+        with self.artifact_buffers_lock:
+            data = self.artifact_buffers.pop(file_path, None)
+
+        upload_types = topic_data.get("UploadTypes")
+        if upload_types is None:
+            upload_types = self.default_upload_types
+        if file_type not in upload_types:
+            logger.info(f"📁 Upload policy skips {file_type}; keeping local path: {file_path}")
+            return file_path
+        if not self.drive_uploader:
+            logger.warning("⚠️ Google Drive service not available, using local path")
+            return file_path
+        if not os.path.exists(file_path):
+            logger.error(f"❌ File not found: {file_path}")
+            return file_path
+
+        topic_id = topic_data.get('TopicID', 'unknown')
+        # Snapshot only what metadata needs; topic_data keeps mutating in the pipeline
+        meta_topic = {"TopicID": topic_id, "Title": topic_data.get("Title", "Unknown Topic")}
+
+        def on_complete(url: str):
+            manifest = ArtifactManifest(os.path.dirname(file_path))
+            if os.path.exists(manifest.path):
+                manifest.record_upload(file_path, url)
+            with self.resolved_links_lock:
+                # A topic that already finished keeps no link map; only its row is updated
+                resolved = self.resolved_links.get(topic_id)
+                if link_key is None:
+                    value = url
+                    if resolved is not None:
+                        resolved[link_field] = url
+                elif resolved is not None:
+                    links = resolved.setdefault(link_field, {})
+                    links[link_key] = url
+                    value = json.dumps(links)
+                else:
+                    # Without the topic's other variant links a partial JSON would clobber the column
+                    logger.info(f"☁️ Late {link_field}[{link_key}] upload for finished topic {topic_id}: {url}")
+                    return
+                column = self.essential_link_columns.get(link_field)
+                if column and self.sheets_gateway:
+                    self.sheets_gateway.update_row("EssentialContent", topic_id, {column: value}, key_column=2)
+
+        mimetype = {"audio": "audio/mpeg", "image": "image/png", "video": "video/mp4"}.get(file_type)
+        if data is not None and data.startswith(b'\xff\xd8\xff'):
+            mimetype = "image/jpeg"
+
+        self.drive_uploader.submit(
+            file_path, topic_id,
+            lambda service: self.drive_file_metadata(file_path, file_type, meta_topic, service=service),
+            mimetype=mimetype,
+            on_complete=on_complete,
+            data=data
+        )
+        return file_path
+
+    def save_artifact_bytes(self, data: bytes, file_path: str, kind: str) -> str:
+        """💾 Validate provider bytes in memory, write them once and keep the buffer for upload"""
+        validator = self.validate_image_bytes if kind == "image" else self.validate_audio_bytes
+        if not validator(data):
+            raise Exception(f"Provider returned invalid {kind} content ({len(data)} bytes)")
+
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, "wb") as f:
+            f.write(data)
+
+        with self.artifact_buffers_lock:
+            self.artifact_buffers[file_path] = data
+        return file_path
+
+    def release_artifact_buffers(self, topic_folder: str) -> int:
+        """Drop buffers a topic saved but never uploaded (upload type disabled, or the topic failed first)"""
+        prefix = os.path.join(os.path.abspath(topic_folder), "")
+        with self.artifact_buffers_lock:
+            paths = [p for p in self.artifact_buffers if os.path.abspath(p).startswith(prefix)]
+            for path in paths:
+                del self.artifact_buffers[path]
+        if paths:
+            logger.debug(f"Released {len(paths)} unused artifact buffer(s) for {topic_folder}")
+        return len(paths)
+
+    def apply_resolved_links(self, topic_data: Dict) -> Dict:
+        """Replace local paths in topic_data with Drive links from finished uploads"""
+        with self.resolved_links_lock:
+            links = dict(self.resolved_links.get(topic_data.get("TopicID", ""), {}))
+        for field, value in links.items():
+            if isinstance(value, dict):
+                # Keyed links (per-platform variants) merge into what the topic already has
+                topic_data[field] = {**(topic_data.get(field) or {}), **value}
+            else:
+                topic_data[field] = value
+        return topic_data
+
+    def create_or_find_drive_folder(self, folder_name: str, parent_folder_id: str, service=None) -> str:
+        """🔧 Create or find a folder in Google Drive (cached process-wide, single-flight)"""
+        folder_id = get_drive_folder_cache().get_or_create(
+            parent_folder_id, folder_name,
+            lambda: self._lookup_or_create_drive_folder(folder_name, parent_folder_id, service or self.drive_service)
+        )
+        # Return parent folder as fallback
+        return folder_id or parent_folder_id
+
+    def _lookup_or_create_drive_folder(self, folder_name: str, parent_folder_id: str, service) -> Optional[str]:
+        """Search Drive for the folder and create it when missing; None on failure"""
         try:
             # Search for existing folder
-            query = f"name='{folder_name}' and '{parent_folder_id}' in parents and mimeType='application/vnd.google-apps.folder' and trashed=false"
-            results = self.drive_service.files().list(q=query, fields="files(id, name)").execute()
+            safe_name = folder_name.replace("\\", "\\\\").replace("'", "\\'")
+            query = f"name='{safe_name}' and '{parent_folder_id}' in parents and mimeType='application/vnd.google-apps.folder' and trashed=false"
+            results = service.files().list(q=query, fields="files(id, name)").execute()
 
             folders = results.get('files', [])
             if folders:
@@ -366,7 +578,7 @@ class CompleteWorkflowEngine:
                     'mimeType': 'application/vnd.google-apps.folder'
                 }
 
-                folder = self.drive_service.files().create(
+                folder = service.files().create(
                     body=folder_metadata,
                     fields='id'
                 ).execute()
@@ -377,8 +589,40 @@ class CompleteWorkflowEngine:
 
         except Exception as e:
             logger.error(f"❌ Failed to create/find Drive folder {folder_name}: {e}")
-            # Return parent folder as fallback
-            return parent_folder_id
+            return None
+
+    def link_artifact(self, src_path: str, dst_path: str) -> str:
+        """📁 Expose a canonical artifact at another path without rewriting its bytes
+
+        LOCAL_MIRROR_MODE selects the strategy: "link" (default) hard-links and
+        falls back to a copy across filesystems, "copy" always copies, "none"
+        skips the mirror entirely (callers just reference the canonical file).
+        Returns the path that now holds the artifact.
+        """
+        mode = os.getenv("LOCAL_MIRROR_MODE", "link").lower()
+        if mode == "none":
+            return src_path
+        if os.path.normcase(os.path.abspath(src_path)) == os.path.normcase(os.path.abspath(dst_path)):
+            return dst_path
+
+        import shutil
+        os.makedirs(os.path.dirname(os.path.abspath(dst_path)), exist_ok=True)
+        if os.path.exists(dst_path):
+            try:
+                if os.path.samefile(src_path, dst_path):
+                    return dst_path
+            except OSError:
+                pass
+            os.remove(dst_path)
+
+        if mode == "link":
+            try:
+                os.link(src_path, dst_path)
+                return dst_path
+            except OSError as e:
+                logger.debug(f"Hard link not possible ({e}); copying {src_path}")
+        shutil.copy2(src_path, dst_path)
+        return dst_path
 
     def ensure_local_storage_copy(self, file_path: str, file_type: str, topic_data: Dict):
         """🔧 FIXED: Ensure files are copied to local storage directory using same folder structure"""
@@ -391,14 +635,14 @@ class CompleteWorkflowEngine:
             topic_local_dir = self.create_safe_topic_folder(topic_data)
             os.makedirs(topic_local_dir, exist_ok=True)
 
-            # Copy file to local storage
-            import shutil
+            # Link file into local storage (no-op when it already lives there)
             filename = os.path.basename(file_path)
             local_copy_path = os.path.join(topic_local_dir, filename)
 
-            if file_path != local_copy_path:  # Don't copy if already in the right place
-                shutil.copy2(file_path, local_copy_path)
-                logger.info(f"📁 Copied {file_type} to local storage: {local_copy_path}")
+            # Don't copy if already in the right place (compare normalized paths)
+            if os.path.normcase(os.path.abspath(file_path)) != os.path.normcase(os.path.abspath(local_copy_path)):
+                self.link_artifact(file_path, local_copy_path)
+                logger.info(f"📁 Linked {file_type} into local storage: {local_copy_path}")
             else:
                 logger.info(f"📁 {file_type} already in local storage: {local_copy_path}")
 
@@ -408,7 +652,7 @@ class CompleteWorkflowEngine:
     def init_run(self, webhook_data: Dict) -> Dict:
         """⚙️ Initialize run (exact from n8n workflow)"""
         run_id = str(uuid.uuid4())
-        topic_run_id = f"run_{int(time.time())}"
+        topic_run_id = unique_id("run")
 
         return {
             "runId": run_id,
@@ -467,7 +711,7 @@ Return ONLY the JSON array, no other text or formatting."""
                     "contents": [{"parts": [{"text": topic_prompt}]}],
                     "generationConfig": {"response_mime_type": "application/json"}
                 },
-                timeout=30
+                timeout=Deadline(run_data.get("DeadlineAt")).timeout(30)
             )
 
             if response.status_code == 200:
@@ -496,7 +740,85 @@ Return ONLY the JSON array, no other text or formatting."""
             self.log_error("Topic Extraction", str(e), run_data["runId"])
             raise
 
-    def parse_topics(self, gemini_response: Dict, run_data: Dict) -> List[Dict]:
+    def topics_from_gemini_response(self, gemini_response: Dict) -> List[Dict]:
+        """📋 Decode the topic list from a Gemini response (empty when the JSON is unusable)"""
+        # Handle different Gemini API response formats
+        try:
+            # Try new format first
+            if "candidates" in gemini_response and gemini_response["candidates"]:
+                candidate = gemini_response["candidates"][0]
+                if "content" in candidate and "parts" in candidate["content"]:
+                    content = candidate["content"]["parts"][0]["text"]
+                elif "parts" in candidate:
+                    content = candidate["parts"][0]["text"]
+                else:
+                    content = str(candidate.get("text", candidate))
+            else:
+                # Fallback to direct text
+                content = str(gemini_response)
+        except (KeyError, IndexError, TypeError) as e:
+            logger.warning(f"Failed to parse Gemini response structure: {e}")
+            content = str(gemini_response)
+
+        try:
+            topics_data = json.loads(content)
+        except json.JSONDecodeError:
+            return []
+
+        # Coerce topics_data into a list to avoid type errors on slicing (handles dict or list)
+        if isinstance(topics_data, dict):
+            if isinstance(topics_data.get("topics"), list):
+                return topics_data.get("topics")
+            elif isinstance(topics_data.get("data"), list):
+                return topics_data.get("data")
+            elif topics_data and all(isinstance(v, dict) for v in topics_data.values()):
+                return list(topics_data.values())
+            return [topics_data]
+        elif isinstance(topics_data, list):
+            return topics_data
+        return [topics_data]
+
+    def should_chunk_topic_extraction(self, payload: Dict) -> bool:
+        """Use map-reduce extraction for notes too long for one prompt (`extraction_mode`: auto|chunked|single)"""
+        if str(payload.get("input_type", "notes")).lower() != "notes":
+            return False
+        mode = str(payload.get("extraction_mode") or os.getenv("TOPIC_EXTRACTION_MODE", "auto")).lower()
+        if mode == "single":
+            return False
+        raw_notes = payload.get("raw_notes") or ""
+        return mode == "chunked" or len(raw_notes) > int(os.getenv("TOPIC_CHUNK_CHARS", "12000"))
+
+    def extract_topics_chunked(self, payload: Dict, run_data: Dict) -> List[Dict]:
+        """🗺️ Map-reduce topic extraction: one Gemini call per note section chunk, in parallel, then merge
+
+        Chunks are bounded by TOPIC_CHUNK_CHARS, so every call stays well inside the
+        request timeout no matter how long the notes are. Chunks that fail are skipped;
+        if all of them fail, parsing falls back to the usual placeholder topic.
+        """
+        chunks = chunk_notes(payload.get("raw_notes") or "", int(os.getenv("TOPIC_CHUNK_CHARS", "12000")))
+        try:
+            desired_count = max(1, int(payload.get("posts_per_day", 1)))
+        except Exception:
+            desired_count = 1
+        # Ask every chunk for a little more than its share so the merge has room to dedupe
+        per_chunk = max(2, math.ceil(desired_count / max(1, len(chunks))) + 1)
+        workers = max(1, min(len(chunks), int(os.getenv("TOPIC_EXTRACTION_WORKERS", "8"))))
+        logger.info(f"🗺️ Chunked topic extraction: {len(chunks)} chunk(s), {per_chunk} topic(s) each, {workers} worker(s)")
+
+        def extract_chunk(chunk: str) -> List[Dict]:
+            prompt = self.create_topic_extraction_prompt({**payload, "raw_notes": chunk, "posts_per_day": per_chunk})
+            try:
+                return self.topics_from_gemini_response(self.gemini_topic_extraction(prompt, run_data))
+            except Exception as e:
+                logger.warning(f"⚠️ Topic extraction failed for one chunk, skipping it: {e}")
+                return []
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="topic-extract") as pool:
+            chunk_topics = list(pool.map(extract_chunk, chunks))
+
+        return self.parse_topics({}, run_data, topics_list=merge_topics(chunk_topics, desired_count))
+
+    def parse_topics(self, gemini_response: Dict, run_data: Dict, topics_list: Optional[List[Dict]] = None) -> List[Dict]:
         """📋 Parse topics (exact from n8n workflow)"""
         try:
             logger.info("📋 Parsing topics from Gemini response...")
@@ -504,7 +826,7 @@ Return ONLY the JSON array, no other text or formatting."""
             # Prompt mode: bypass topic extraction; synthesize a single topic from payload
             webhook = run_data.get("webhook", {})
             if str(webhook.get("input_type", "")).lower() == "prompt":
-                topic_id = f"topic_{int(time.time())}_1"
+                topic_id = unique_id("topic", 1)
                 title = webhook.get("title", "Custom Prompt Script")
                 track_norm = webhook.get("track", "")
                 topic_data = {
@@ -552,7 +874,7 @@ Return ONLY the JSON array, no other text or formatting."""
                 script_text = (webhook.get("script_text") or "").strip()
                 if not script_text:
                     raise Exception("Script mode requires non-empty 'script_text' in payload")
-                topic_id = f"topic_{int(time.time())}_1"
+                topic_id = unique_id("topic", 1)
                 title = webhook.get("title", "User Provided Script")
                 track_norm = webhook.get("track", "")
                 topic_data = {
@@ -595,49 +917,17 @@ Return ONLY the JSON array, no other text or formatting."""
                 logger.info("📝 Script mode: using user-provided script and skipping topic extraction")
                 return [topic_data]
 
-            # Handle different Gemini API response formats
-            try:
-                # Try new format first
-                if "candidates" in gemini_response and gemini_response["candidates"]:
-                    candidate = gemini_response["candidates"][0]
-                    if "content" in candidate and "parts" in candidate["content"]:
-                        content = candidate["content"]["parts"][0]["text"]
-                    elif "parts" in candidate:
-                        content = candidate["parts"][0]["text"]
-                    else:
-                        content = str(candidate.get("text", candidate))
-                else:
-                    # Fallback to direct text
-                    content = str(gemini_response)
-            except (KeyError, IndexError, TypeError) as e:
-                logger.warning(f"Failed to parse Gemini response structure: {e}")
-                content = str(gemini_response)
-
-            try:
-                topics_data = json.loads(content)
-            except json.JSONDecodeError:
+            # Chunked extraction hands over already-merged topics
+            if topics_list is None:
+                topics_list = self.topics_from_gemini_response(gemini_response)
+            if not topics_list:
                 logger.warning("JSON parsing failed, using fallback method")
-                topics_data = [{"title": "Educational content from notes", "main_points": ["Key concept"], "transition_note": "Learn more"}]
+                topics_list = [{"title": "Educational content from notes", "main_points": ["Key concept"], "transition_note": "Learn more"}]
 
             # Transform to exact format from n8n workflow
             parsed_topics = []
             webhook = run_data["webhook"]
 
-            # Coerce topics_data into a list to avoid type errors on slicing (handles dict or list)
-            if isinstance(topics_data, dict):
-                if isinstance(topics_data.get("topics"), list):
-                    topics_list = topics_data.get("topics")
-                elif isinstance(topics_data.get("data"), list):
-                    topics_list = topics_data.get("data")
-                elif all(isinstance(v, dict) for v in topics_data.values()):
-                    topics_list = list(topics_data.values())
-                else:
-                    topics_list = [topics_data]
-            elif isinstance(topics_data, list):
-                topics_list = topics_data
-            else:
-                topics_list = [topics_data]
-
             # Determine number of topics to process based on payload (posts_per_day)
             desired_count = 1
             try:
@@ -648,7 +938,7 @@ Return ONLY the JSON array, no other text or formatting."""
                 desired_count = 1
 
             for i, topic in enumerate(topics_list[:desired_count]):
-                topic_id = f"topic_{int(time.time())}_{i+1}"
+                topic_id = unique_id("topic", i + 1)
 
                 # Normalize potential schema differences between template outputs and inline prompts
                 title_norm = topic.get("title") or topic.get("Title") or f"Topic {i+1}"
@@ -719,9 +1009,7 @@ Return ONLY the JSON array, no other text or formatting."""
             except Exception as _:
                 pass
 
-            worksheet = self.sheet.worksheet("EssentialContent")
-
-            # Prepare rows for batch insert (match EXACTLY 24 columns)
+            # Prepare rows for batch insert (match EXACTLY 25 columns)
             rows_to_insert = []
             for topic in topics:
                 row = [
@@ -748,12 +1036,13 @@ Return ONLY the JSON array, no other text or formatting."""
                     "",                                            # Image1GeneratedBy (empty initially)
                     "",                                            # Image2GeneratedBy (empty initially)
                     "",                                            # Image3GeneratedBy (empty initially)
-                    ""                                             # Image4GeneratedBy (empty initially)
+                    "",                                            # Image4GeneratedBy (empty initially)
+                    ""                                             # VideoVariantLinks (empty initially)
                 ]
                 rows_to_insert.append(row)
 
-            # Batch insert
-            worksheet.append_rows(rows_to_insert)
+            # Batch insert (TopicID in column 2 seeds the gateway's row index)
+            self.sheets_gateway.append_rows_now("EssentialContent", rows_to_insert, key_column=2)
 
             logger.info(f"✅ Inserted {len(topics)} topics to EssentialContent")
             return True
@@ -858,7 +1147,7 @@ Return ONLY the JSON, no other text."""
                     "contents": [{"parts": [{"text": script_prompt}]}],
                     "generationConfig": {"response_mime_type": "application/json"}
                 },
-                timeout=30
+                timeout=self.topic_deadline(topic_data).timeout(30)
             )
 
             if response.status_code == 200:
@@ -1001,7 +1290,12 @@ Return ONLY the JSON, no other text."""
     def build_image_prompts_from_script(self, topic_data: Dict) -> List[str]:
         """Generate 4 image prompts using the new smart fallback strategy."""
         script = (topic_data.get("Script") or "").strip()
-        return self.smart_fallback_image_prompts(script_text=script, llm_client=self.llm_client)
+        llm_client = self.llm_client
+        if llm_client and not self.topic_deadline(topic_data).allows(float(os.getenv("DEADLINE_OPTIONAL_STEP_SECONDS", "120"))):
+            # Optional step: keyword prompts are good enough when time is short
+            logger.info("⏱️ Deadline close; skipping LLM image-prompt extraction")
+            llm_client = None
+        return self.smart_fallback_image_prompts(script_text=script, llm_client=llm_client)
 
     def parse_script_response(self, gemini_response: Dict, topic_data: Dict) -> Dict:
         """📋 Parse script response (exact from n8n workflow)"""
@@ -1149,10 +1443,8 @@ Return ONLY the JSON, no other text."""
             audio_filename = f"audio_{topic_id}_{int(time.time())}.mp3"
             local_audio_path = f"{topic_folder}/{audio_filename}"
 
-            os.makedirs(topic_folder, exist_ok=True)
-
-            with open(local_audio_path, "wb") as out:
-                out.write(response.audio_content)
+            # Validate in memory and write once; the upload reuses the same buffer
+            self.save_artifact_bytes(response.audio_content, local_audio_path, "audio")
 
             # Log API usage
             self.log_api_usage({
@@ -1171,18 +1463,8 @@ Return ONLY the JSON, no other text."""
             # 🔧 FIXED: Ensure local storage copy
             self.ensure_local_storage_copy(local_audio_path, "audio", topic_data)
 
-            # 🔧 FIXED: Single upload call to avoid conflicts
-            try:
-                drive_audio_url = self.upload_to_google_drive(local_audio_path, "audio", topic_data)
-                if drive_audio_url and drive_audio_url != local_audio_path:
-                    logger.info(f"✅ Audio uploaded to Google Drive: {drive_audio_url}")
-                    return drive_audio_url
-                else:
-                    logger.warning("⚠️ Google Drive upload disabled, using local path")
-                    return local_audio_path
-            except Exception as drive_error:
-                logger.warning(f"⚠️ Google Drive upload failed, using local path: {drive_error}")
-                return local_audio_path
+            # Upload in the background; the pipeline continues with the local file
+            return self.queue_drive_upload(local_audio_path, "audio", topic_data, "AudioFileLink")
 
         except Exception as e:
             logger.error(f"❌ Audio generation failed: {e}")
@@ -1210,28 +1492,71 @@ Return ONLY the JSON, no other text."""
             while len(image_prompts) < 4:
                 image_prompts.append(f"Educational visual about {topic_data.get('Title', 'the topic')}")
 
-            image_urls = []
-
-            # Generate all 4 images (exact requirement from Master Developer Prompt)
-            for i, prompt in enumerate(image_prompts[:4]):
-                logger.info(f"🖼️ Generating image {i+1}/4...")
-
-                image_result = self.generate_single_image_with_fallback(prompt, topic_data, i+1)
-                if image_result:
-                    image_urls.append(image_result["url"])
-                    # CRITICAL FIX: Store both URL and platform for each image
-                    topic_data[f"Image{i+1}Link"] = image_result["url"]
-                    topic_data[f"Image{i+1}GeneratedBy"] = image_result["generated_by"]
-                    logger.info(f"🔧 FIXED: Image{i+1}Link = {image_result['url']}")
-                    logger.info(f"🔧 FIXED: Image{i+1}GeneratedBy = {image_result['generated_by']}")
+            # Per-slot prompt replacements requested through the regenerate API
+            prompt_overrides = topic_data.get("ImagePromptOverrides") or {}
+            prompts = [str(prompt_overrides.get(str(i + 1)) or prompt) for i, prompt in enumerate(image_prompts[:4])]
+
+            # Slots generated earlier with the same prompt are reused, never paid for twice
+            manifest = ArtifactManifest(self.create_safe_topic_folder(topic_data))
+            recorded_slots = manifest.image_slots()
+            uploads = manifest.uploads() if recorded_slots else {}
+            image_urls = [None] * len(prompts)
+            pending = []
+            for i, prompt in enumerate(prompts):
+                record = recorded_slots.get(str(i + 1))
+                # Retention may have deleted an uploaded image locally; its Drive copy still counts
+                source = manifest.available(record.get("path", "")) if record else None
+                if record and record.get("prompt_hash") == hash_value(prompt) and source:
+                    image_urls[i] = source
+                    topic_data[f"Image{i+1}Link"] = uploads.get(os.path.abspath(record["path"]), record["path"])
+                    topic_data[f"Image{i+1}GeneratedBy"] = record.get("generated_by", "Unknown")
+                    logger.info(f"♻️ Reusing image {i+1} from {record.get('generated_by')}: {record['path']}")
                 else:
-                    # Create placeholder if all APIs fail
-                    placeholder_url = f"placeholder_image_{i+1}.png"
-                    image_urls.append(placeholder_url)
-                    topic_data[f"Image{i+1}Link"] = placeholder_url
-                    topic_data[f"Image{i+1}GeneratedBy"] = "Failed"
-                    logger.info(f"🔧 FIXED: Image{i+1}Link = {placeholder_url} (Failed)")
-                    logger.info(f"🔧 FIXED: Image{i+1}GeneratedBy = Failed")
+                    pending.append(i)
+
+            # Generate missing slots; only the slots that failed are retried, with exponential backoff
+            backoff = float(os.getenv("IMAGE_RETRY_BACKOFF_SECONDS", "5"))
+            # Only as many retry rounds as the deadline leaves room for
+            retries = self.topic_deadline(topic_data).retries(int(os.getenv("IMAGE_SLOT_RETRIES", "2")), attempt_seconds=60 + backoff)
+            for attempt in range(retries + 1):
+                if attempt:
+                    delay = backoff * (2 ** (attempt - 1))
+                    logger.info(f"🔁 Retrying image slots {[i + 1 for i in pending]} in {delay:.0f}s (attempt {attempt + 1})")
+                    self.cancellation.wait(topic_data.get("WorkflowID"), delay)
+                failed = []
+                for i in pending:
+                    # Stop spending image credits as soon as the workflow is cancelled
+                    self.cancellation.check(topic_data.get("WorkflowID"))
+                    logger.info(f"🖼️ Generating image {i+1}/4...")
+                    image_result = self.generate_single_image_with_fallback(prompts[i], topic_data, i+1)
+                    if image_result:
+                        image_urls[i] = image_result["url"]
+                        # CRITICAL FIX: Store both URL and platform for each image
+                        topic_data[f"Image{i+1}Link"] = image_result["url"]
+                        topic_data[f"Image{i+1}GeneratedBy"] = image_result["generated_by"]
+                        logger.info(f"🔧 FIXED: Image{i+1}Link = {image_result['url']}")
+                        logger.info(f"🔧 FIXED: Image{i+1}GeneratedBy = {image_result['generated_by']}")
+                        if os.path.exists(image_result["url"]):
+                            manifest.record_image_slot(i + 1, {
+                                "path": os.path.abspath(image_result["url"]),
+                                "generated_by": image_result["generated_by"],
+                                "prompt_hash": hash_value(prompts[i]),
+                            })
+                    else:
+                        failed.append(i)
+                pending = failed
+                if not pending:
+                    break
+
+            for i in pending:
+                # Placeholder marks the slot; the pipeline stops before rendering until it is regenerated
+                placeholder_url = f"placeholder_image_{i+1}.png"
+                image_urls[i] = placeholder_url
+                topic_data[f"Image{i+1}Link"] = placeholder_url
+                topic_data[f"Image{i+1}GeneratedBy"] = "Failed"
+                logger.info(f"🔧 FIXED: Image{i+1}Link = {placeholder_url} (Failed)")
+                logger.info(f"🔧 FIXED: Image{i+1}GeneratedBy = Failed")
+            topic_data["FailedImageSlots"] = [i + 1 for i in pending]
 
             # Log successful generation
             self.log_api_usage({
@@ -1246,6 +1571,8 @@ Return ONLY the JSON, no other text."""
             logger.info(f"✅ Generated {len(image_urls)} images successfully")
             return image_urls
 
+        except WorkflowCancelled:
+            raise
         except Exception as e:
             logger.error(f"❌ Image generation failed: {e}")
             self.log_error("Image Generation", str(e), topic_data.get("RunID", ""), topic_data.get("TopicID", ""))
@@ -1271,8 +1598,9 @@ Return ONLY the JSON, no other text."""
                     if os.path.exists(image_url):
                         # 🔧 FIXED: Ensure local storage copy for images
                         self.ensure_local_storage_copy(image_url, "image", topic_data)
-                        drive_image_url = self.upload_to_google_drive(image_url, "image", topic_data)
-                        return {"url": drive_image_url, "generated_by": api_name, "local_path": image_url}
+                        # Background upload; the render uses the local file
+                        self.queue_drive_upload(image_url, "image", topic_data, f"Image{image_index}Link")
+                        return {"url": image_url, "generated_by": api_name, "local_path": image_url}
                     else:
                         # Assume API returned a hosted URL/Drive URL; ideally make it public at source
                         return {"url": image_url, "generated_by": api_name, "local_path": image_url}
@@ -1293,7 +1621,7 @@ Return ONLY the JSON, no other text."""
                     "Content-Type": "application/json"
                 },
                 json={"prompt": f"{prompt}, high quality, professional, educational"},
-                timeout=60
+                timeout=self.topic_deadline(topic_data).timeout(60)
             )
 
             if response.status_code == 200:
@@ -1304,34 +1632,8 @@ Return ONLY the JSON, no other text."""
                 image_filename = f"image_{topic_id}_{image_index}_{int(time.time())}.png"
                 local_image_path = f"{topic_folder}/{image_filename}"
 
-                os.makedirs(topic_folder, exist_ok=True)
-
-                with open(local_image_path, "wb") as f:
-                    f.write(response.content)
-
-                # Make file public and return shareable link
-                try:
-                    media = MediaFileUpload(local_image_path, mimetype='image/png')
-                    file_metadata = {
-                        'name': image_filename,
-                        'parents': [self.images_folder_id]
-                    }
-
-                    file = self.drive_service.files().create(
-                        body=file_metadata,
-                        media_body=media,
-                        fields='id,webViewLink'
-                    ).execute()
-
-                    # Make file public
-                    self.drive_service.permissions().create(
-                        fileId=file['id'], body={'role':'reader','type':'anyone'}
-                    ).execute()
-                    return f"https://drive.google.com/file/d/{file['id']}/view"
-
-                except Exception as e:
-                    logger.warning(f"⚠️ Google Drive upload failed: {e}")
-                    return local_image_path
+                # Validate in memory and write once; Drive upload reuses the buffer
+                return self.save_artifact_bytes(response.content, local_image_path, "image")
             else:
                 raise Exception(f"Cloudflare API error: {response.status_code}")
 
@@ -1355,30 +1657,23 @@ Return ONLY the JSON, no other text."""
                     "steps": 20,
                     "n": 1
                 },
-                timeout=60
+                timeout=self.topic_deadline(topic_data).timeout(60)
             )
 
             if response.status_code == 200:
                 result = response.json()
                 image_url = result["data"][0]["url"]
 
-                # Download and save image
-                img_response = requests.get(image_url, timeout=30)
-                if img_response.status_code == 200:
-                    topic_folder = self.create_safe_topic_folder(topic_data)
-                    topic_id = topic_data.get('TopicID', 'unknown')
-
-                    image_filename = f"image_{topic_id}_{image_index}_{int(time.time())}.png"
-                    local_image_path = f"{topic_folder}/{image_filename}"
+                # Stream image straight to the topic folder
+                topic_folder = self.create_safe_topic_folder(topic_data)
+                topic_id = topic_data.get('TopicID', 'unknown')
 
-                    os.makedirs(topic_folder, exist_ok=True)
+                image_filename = f"image_{topic_id}_{image_index}_{int(time.time())}.png"
+                local_image_path = f"{topic_folder}/{image_filename}"
 
-                    with open(local_image_path, "wb") as f:
-                        f.write(img_response.content)
+                os.makedirs(topic_folder, exist_ok=True)
 
-                    return local_image_path
-                else:
-                    raise Exception("Failed to download image from Together")
+                return self.download_to_file(image_url, local_image_path, "image", timeout=self.topic_deadline(topic_data).timeout(30))
             else:
                 raise Exception(f"Together API error: {response.status_code}")
 
@@ -1396,7 +1691,7 @@ Return ONLY the JSON, no other text."""
                 json={
                     "inputs": f"{prompt}, high quality, professional, educational"
                 },
-                timeout=60
+                timeout=self.topic_deadline(topic_data).timeout(60)
             )
 
             if response.status_code == 200:
@@ -1406,12 +1701,8 @@ Return ONLY the JSON, no other text."""
                 image_filename = f"image_{topic_id}_{image_index}_{int(time.time())}.png"
                 local_image_path = f"{topic_folder}/{image_filename}"
 
-                os.makedirs(topic_folder, exist_ok=True)
-
-                with open(local_image_path, "wb") as f:
-                    f.write(response.content)
-
-                return local_image_path
+                # Validate in memory and write once; Drive upload reuses the buffer
+                return self.save_artifact_bytes(response.content, local_image_path, "image")
             else:
                 raise Exception(f"HuggingFace API error: {response.status_code}")
 
@@ -1514,6 +1805,45 @@ Return ONLY the JSON, no other text."""
         logger.error(f"❌ URL does not match any known Google Drive patterns")
         return drive_url
 
+    def validate_audio_bytes(self, header: bytes, size: Optional[int] = None) -> bool:
+        """🔍 Validate audio content in memory (header bytes plus total size)"""
+        size = len(header) if size is None else size
+
+        # Check file size (should be > 10KB for valid audio)
+        if size < 10240:  # 10KB minimum
+            logger.error(f"❌ Audio file too small: {size} bytes (minimum 10KB required)")
+            return False
+
+        header = header[:512]
+
+        # Convert to string for HTML detection
+        try:
+            header_str = header.decode('utf-8', errors='ignore').lower()
+
+            # Check for HTML content (Google Drive error pages)
+            html_indicators = ['<!doctype', '<html', '<head>', '<body>', 'error', 'access denied', 'not found']
+            for indicator in html_indicators:
+                if indicator in header_str:
+                    logger.error(f"❌ Downloaded file contains HTML content ('{indicator}'), not audio")
+                    logger.error(f"❌ First 200 chars: {header_str[:200]}")
+                    return False
+        except:
+            pass  # If decode fails, continue with binary checks
+
+        # MP3 signatures
+        if header.startswith(b'ID3') or header[0:2] == b'\xff\xfb' or header[0:2] == b'\xff\xf3':
+            logger.info("✅ Valid MP3 audio file detected")
+            return True
+
+        # WAV signature
+        if header.startswith(b'RIFF') and b'WAVE' in header[:12]:
+            logger.info("✅ Valid WAV audio file detected")
+            return True
+
+        logger.error(f"❌ Unknown audio file format. Header bytes: {header[:20]}")
+        logger.error(f"❌ Header as hex: {header[:20].hex()}")
+        return False
+
     def validate_audio_file(self, file_path: str) -> bool:
         """🔍 Validate that downloaded file is actually an audio file"""
         try:
@@ -1524,47 +1854,59 @@ Return ONLY the JSON, no other text."""
             file_size = os.path.getsize(file_path)
             logger.info(f"🔍 Validating audio file: {file_path} ({file_size} bytes)")
 
-            # Check file size (should be > 10KB for valid audio)
-            if file_size < 10240:  # 10KB minimum
-                logger.error(f"❌ Audio file too small: {file_size} bytes (minimum 10KB required)")
-                return False
-
             # Read more bytes to check for HTML content
             with open(file_path, 'rb') as f:
                 header = f.read(512)  # Read first 512 bytes
-
-                # Convert to string for HTML detection
-                try:
-                    header_str = header.decode('utf-8', errors='ignore').lower()
-
-                    # Check for HTML content (Google Drive error pages)
-                    html_indicators = ['<!doctype', '<html', '<head>', '<body>', 'error', 'access denied', 'not found']
-                    for indicator in html_indicators:
-                        if indicator in header_str:
-                            logger.error(f"❌ Downloaded file contains HTML content ('{indicator}'), not audio")
-                            logger.error(f"❌ First 200 chars: {header_str[:200]}")
-                            return False
-                except:
-                    pass  # If decode fails, continue with binary checks
-
-                # MP3 signatures
-                if header.startswith(b'ID3') or header[0:2] == b'\xff\xfb' or header[0:2] == b'\xff\xf3':
-                    logger.info("✅ Valid MP3 audio file detected")
-                    return True
-
-                # WAV signature
-                if header.startswith(b'RIFF') and b'WAVE' in header[:12]:
-                    logger.info("✅ Valid WAV audio file detected")
-                    return True
-
-                logger.error(f"❌ Unknown audio file format. Header bytes: {header[:20]}")
-                logger.error(f"❌ Header as hex: {header[:20].hex()}")
-                return False
+            return self.validate_audio_bytes(header, file_size)
 
         except Exception as e:
             logger.error(f"❌ Audio validation error: {e}")
             return False
 
+    def validate_image_bytes(self, header: bytes, size: Optional[int] = None) -> bool:
+        """🔍 Validate image content in memory (header bytes plus total size)"""
+        size = len(header) if size is None else size
+
+        # Check file size (should be > 5KB for valid image)
+        if size < 5120:  # 5KB minimum
+            logger.error(f"❌ Image file too small: {size} bytes (minimum 5KB required)")
+            return False
+
+        header = header[:512]
+
+        # Convert to string for HTML detection
+        try:
+            header_str = header.decode('utf-8', errors='ignore').lower()
+
+            # Check for HTML content (Google Drive error pages)
+            html_indicators = ['<!doctype', '<html', '<head>', '<body>', 'error', 'access denied', 'not found']
+            for indicator in html_indicators:
+                if indicator in header_str:
+                    logger.error(f"❌ Downloaded file contains HTML content ('{indicator}'), not image")
+                    logger.error(f"❌ First 200 chars: {header_str[:200]}")
+                    return False
+        except:
+            pass  # If decode fails, continue with binary checks
+
+        # PNG signature
+        if header.startswith(b'\x89PNG\r\n\x1a\n'):
+            logger.info("✅ Valid PNG image file detected")
+            return True
+
+        # JPEG signatures
+        if header.startswith(b'\xff\xd8\xff'):
+            logger.info("✅ Valid JPEG image file detected")
+            return True
+
+        # GIF signatures
+        if header.startswith(b'GIF87a') or header.startswith(b'GIF89a'):
+            logger.info("✅ Valid GIF image file detected")
+            return True
+
+        logger.error(f"❌ Unknown image file format. Header bytes: {header[:20]}")
+        logger.error(f"❌ Header as hex: {header[:20].hex()}")
+        return False
+
     def validate_image_file(self, file_path: str) -> bool:
         """🔍 Validate that downloaded file is actually an image file"""
         try:
@@ -1575,59 +1917,167 @@ Return ONLY the JSON, no other text."""
             file_size = os.path.getsize(file_path)
             logger.info(f"🔍 Validating image file: {file_path} ({file_size} bytes)")
 
-            # Check file size (should be > 5KB for valid image)
-            if file_size < 5120:  # 5KB minimum
-                logger.error(f"❌ Image file too small: {file_size} bytes (minimum 5KB required)")
-                return False
-
             # Read more bytes to check for HTML content
             with open(file_path, 'rb') as f:
                 header = f.read(512)  # Read first 512 bytes
+            return self.validate_image_bytes(header, file_size)
 
-                # Convert to string for HTML detection
-                try:
-                    header_str = header.decode('utf-8', errors='ignore').lower()
-
-                    # Check for HTML content (Google Drive error pages)
-                    html_indicators = ['<!doctype', '<html', '<head>', '<body>', 'error', 'access denied', 'not found']
-                    for indicator in html_indicators:
-                        if indicator in header_str:
-                            logger.error(f"❌ Downloaded file contains HTML content ('{indicator}'), not image")
-                            logger.error(f"❌ First 200 chars: {header_str[:200]}")
-                            return False
-                except:
-                    pass  # If decode fails, continue with binary checks
-
-                # PNG signature
-                if header.startswith(b'\x89PNG\r\n\x1a\n'):
-                    logger.info("✅ Valid PNG image file detected")
-                    return True
+        except Exception as e:
+            logger.error(f"❌ Image validation error: {e}")
+            return False
 
-                # JPEG signatures
-                if header.startswith(b'\xff\xd8\xff'):
-                    logger.info("✅ Valid JPEG image file detected")
-                    return True
+    def download_to_file(self, url: str, dest_path: str, kind: str, timeout: float = 60,
+                         max_bytes: Optional[int] = None) -> str:
+        """⬇️ Stream a remote asset to disk in fixed-size chunks
 
-                # GIF signatures
-                if header.startswith(b'GIF87a') or header.startswith(b'GIF89a'):
-                    logger.info("✅ Valid GIF image file detected")
-                    return True
+        Content-Type is checked on the first chunk (HTML error pages are rejected
+        before anything is written), the body is capped at `max_bytes`
+        (MAX_DOWNLOAD_MB, default 100) and the media signature is validated from
+        the retained first chunk once the download completes.
+        """
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv("MAX_DOWNLOAD_MB", "100")) * 1024 * 1024)
+        validator = self.validate_image_bytes if kind == "image" else self.validate_audio_bytes
+
+        logger.info(f"⬇️ Streaming {kind} from: {url}")
+        with requests.get(url, stream=True, timeout=timeout) as r:
+            content_type = r.headers.get('content-type', 'unknown')
+            logger.info(f"⬇️ Response status: {r.status_code}, Content-Type: {content_type}")
+            if r.status_code != 200:
+                raise Exception(f"{kind.title()} download failed with status {r.status_code}")
+
+            declared = r.headers.get('content-length')
+            if declared and declared.isdigit() and int(declared) > max_bytes:
+                raise Exception(f"{kind.title()} download too large: {declared} bytes (limit {max_bytes})")
+
+            first_chunk = b""
+            total = 0
+            try:
+                with open(dest_path, "wb") as f:
+                    for chunk in r.iter_content(chunk_size=64 * 1024):
+                        if not chunk:
+                            continue
+                        if not first_chunk:
+                            first_chunk = chunk[:512]
+                            ctype = content_type.lower()
+                            if "text/html" in ctype or "application/json" in ctype:
+                                raise Exception(f"Expected {kind} but server returned {content_type}: {chunk[:200]!r}")
+                            logger.info(f"🔍 First 50 bytes of downloaded {kind}: {first_chunk[:50]}")
+                            logger.info(f"🔍 First 50 bytes as hex: {first_chunk[:50].hex()}")
+                        total += len(chunk)
+                        if total > max_bytes:
+                            raise Exception(f"{kind.title()} download exceeded {max_bytes} bytes")
+                        f.write(chunk)
+
+                logger.info(f"⬇️ Downloaded {total} bytes to {dest_path}")
+                if not validator(first_chunk, total):
+                    raise Exception(f"VALIDATION FAILED - Downloaded {kind} is invalid or corrupted")
+            except Exception:
+                # Never leave a partial/invalid file behind
+                if os.path.exists(dest_path):
+                    os.remove(dest_path)
+                raise
 
-                logger.error(f"❌ Unknown image file format. Header bytes: {header[:20]}")
-                logger.error(f"❌ Header as hex: {header[:20].hex()}")
-                return False
+        return dest_path
 
-        except Exception as e:
-            logger.error(f"❌ Image validation error: {e}")
-            return False
+    def create_render_workspace(self, local_inputs: List[str]) -> tuple:
+        """🎬 Create the scratch directory for one render
+
+        RENDER_SCRATCH_DIR (e.g. /dev/shm) places render inputs and the
+        in-progress MP4 on a RAM-backed filesystem. The size guard requires
+        staged local inputs + RENDER_SCRATCH_JOB_MB (downloads and output,
+        default 64) to leave RENDER_SCRATCH_RESERVE_MB (default 256) free;
+        otherwise the default temp dir is used. Returns (dir, uses_scratch).
+        """
+        import tempfile
+        import shutil
+
+        scratch_root = os.getenv("RENDER_SCRATCH_DIR")
+        if scratch_root:
+            try:
+                os.makedirs(scratch_root, exist_ok=True)
+                required = sum(os.path.getsize(p) for p in local_inputs if p and os.path.exists(p))
+                required += int(float(os.getenv("RENDER_SCRATCH_JOB_MB", "64")) * 1024 * 1024)
+                reserve = int(float(os.getenv("RENDER_SCRATCH_RESERVE_MB", "256")) * 1024 * 1024)
+                free = shutil.disk_usage(scratch_root).free
+                if free - required >= reserve:
+                    return tempfile.mkdtemp(prefix="ltc_video_", dir=scratch_root), True
+                logger.warning(f"⚠️ Render scratch {scratch_root} too full ({free} bytes free, need {required} + {reserve} reserve); using disk temp dir")
+            except Exception as e:
+                logger.warning(f"⚠️ Render scratch {scratch_root} unavailable: {e}; using disk temp dir")
+        return tempfile.mkdtemp(prefix="ltc_video_"), False
+
+    def publish_render_output(self, render_path: str, final_path: str) -> str:
+        """🎬 Move a finished render into place atomically
+
+        The file is first moved next to its destination under a temporary name
+        (a copy when crossing filesystems) and then renamed, so the output
+        folder never contains a half-written MP4.
+        """
+        import shutil
+
+        staging_path = f"{final_path}.partial"
+        shutil.move(render_path, staging_path)
+        os.replace(staging_path, final_path)
+        return final_path
+
+    def select_video_variants(self, topic_data: Dict) -> List[tuple]:
+        """(platform, profile) pairs to render next to the master video for this topic
+
+        Each variant is a full extra encode, so only distinct frame sizes get one:
+        platforms at the master's 1080x1920 use the master video, and a platform
+        whose size another variant already covers reuses that variant.
+        """
+        if not self.render_platform_variants:
+            return []
+        platforms = topic_data.get("Platforms") or []
+        if isinstance(platforms, str):
+            try:
+                platforms = json.loads(platforms)
+            except ValueError:
+                platforms = [p.strip() for p in platforms.split(",")]
+        variants = []
+        sizes = {(1080, 1920)}  # the master
+        for platform in platforms:
+            profile = self.platform_video_profiles.get(str(platform).strip())
+            if not profile:
+                logger.warning(f"⚠️ No video profile for platform '{platform}'; skipping variant")
+                continue
+            size = (profile["width"], profile["height"])
+            if size in sizes:
+                # Would differ from an existing output only by -maxrate/-t
+                logger.info(f"🎬 {platform} shares a {size[0]}x{size[1]} output; no separate variant")
+                continue
+            sizes.add(size)
+            variants.append((str(platform).strip(), profile))
+        return variants
+
+    def publish_video_variants(self, topic_data: Dict, variant_outputs: List[Dict]):
+        """🎬 Move rendered platform variants into place and queue their uploads"""
+        if not variant_outputs:
+            return
+        topic_id = topic_data.get("TopicID", "")
+        variant_links = {}
+        for variant in variant_outputs:
+            if os.path.exists(variant["render_path"]) and os.path.getsize(variant["render_path"]) > 0:
+                variant_links[variant["platform"]] = self.publish_render_output(variant["render_path"], variant["final_path"])
+            else:
+                logger.warning(f"⚠️ {variant['platform']} variant was not produced")
+        # Seed local paths; uploads replace each entry with its Drive link as they finish
+        with self.resolved_links_lock:
+            self.resolved_links.setdefault(topic_id, {})["VideoVariantLinks"] = dict(variant_links)
+        topic_data["VideoVariantLinks"] = dict(variant_links)
+        for platform, path in variant_links.items():
+            self.queue_drive_upload(path, "video", topic_data, "VideoVariantLinks", link_key=platform)
+        logger.info(f"🎬 Platform variants ready: {', '.join(variant_links) or 'none'}")
 
     def create_video_ffmpeg(self, topic_data: Dict, audio_url: str, image_urls: List[str]) -> str:
         """🎬 Create video using FFmpeg with robust error handling and proper audio/video sync
         Ensures audio is always available by downloading remote URLs and normalizing format.
         """
-        import tempfile
         import shutil
 
+        deadline = self.topic_deadline(topic_data)
         try:
             logger.info(f"🎬 Creating video for topic: {topic_data.get('Title', 'Unknown')}")
 
@@ -1654,8 +2104,12 @@ Return ONLY the JSON, no other text."""
 
             os.makedirs(topic_folder, exist_ok=True)
 
-            # Create temporary directory for processing
-            temp_dir = tempfile.mkdtemp(prefix="ltc_video_")
+            # Create scratch directory for processing (RAM-backed when configured)
+            local_inputs = [u for u in [audio_url, *image_urls] if isinstance(u, str) and not u.startswith("http")]
+            temp_dir, uses_scratch = self.create_render_workspace(local_inputs)
+            # FFmpeg writes here; only the finished file is moved into topic_folder
+            render_video_path = os.path.join(temp_dir, video_filename)
+            logger.info(f"🎬 Render workspace: {temp_dir} ({'scratch' if uses_scratch else 'disk temp'})")
 
             # Download and prepare audio file
             local_audio_path = None
@@ -1666,39 +2120,16 @@ Return ONLY the JSON, no other text."""
                     # Convert Google Drive URL to direct download if needed
                     direct_audio_url = self.convert_drive_url_to_direct(audio_url)
 
-                    # Download audio to temp directory
+                    # Stream audio to temp directory (validated on the fly)
                     tmp_audio = os.path.join(temp_dir, f"audio_{topic_id}.mp3")
-                    logger.info(f"🎵 Downloading audio from: {direct_audio_url}")
-                    logger.info(f"🎵 Making request to: {direct_audio_url}")
-                    r = requests.get(direct_audio_url, timeout=60)
-                    logger.info(f"🎵 Response status: {r.status_code}, Content-Type: {r.headers.get('content-type', 'unknown')}")
-
-                    if r.status_code == 200:
-                        # Log response details
-                        content_length = len(r.content)
-                        logger.info(f"🎵 Downloaded {content_length} bytes")
-
-                        with open(tmp_audio, "wb") as f:
-                            f.write(r.content)
-
-                        # Log first few bytes for debugging
-                        with open(tmp_audio, 'rb') as f:
-                            first_bytes = f.read(100)
-                            logger.info(f"🔍 First 50 bytes of downloaded audio: {first_bytes[:50]}")
-                            logger.info(f"🔍 First 50 bytes as hex: {first_bytes[:50].hex()}")
-
-                        # Validate downloaded audio file
-                        if self.validate_audio_file(tmp_audio):
-                            local_audio_path = tmp_audio
-                            logger.info("🎵 ✅ Downloaded and validated remote audio for FFmpeg")
-                        else:
-                            logger.error(f"❌ VALIDATION FAILED - Downloaded audio file is invalid or corrupted: {tmp_audio}")
-                            raise Exception("VALIDATION FAILED - Downloaded audio file is invalid or corrupted")
-                    else:
-                        logger.error(f"❌ Failed to download remote audio (status {r.status_code})")
-                        raise Exception(f"Audio download failed with status {r.status_code}")
+                    local_audio_path = self.download_to_file(direct_audio_url, tmp_audio, "audio", timeout=deadline.timeout(60))
+                    logger.info("🎵 ✅ Downloaded and validated remote audio for FFmpeg")
                 elif isinstance(audio_url, str) and os.path.exists(audio_url):
-                    local_audio_path = audio_url
+                    if uses_scratch:
+                        # Stage into the RAM scratch so FFmpeg never reads from disk
+                        local_audio_path = self.link_artifact(audio_url, os.path.join(temp_dir, os.path.basename(audio_url)))
+                    else:
+                        local_audio_path = audio_url
                     logger.info("🎵 Using local audio file")
                 else:
                     logger.error(f"❌ Invalid audio URL or path: {audio_url}")
@@ -1714,7 +2145,7 @@ Return ONLY the JSON, no other text."""
                     # Use configured ffprobe path
                     ffprobe_cmd = [getattr(self, 'ffprobe_path', 'ffprobe'), "-v", "error", "-show_entries", "format=duration",
                                  "-of", "default=noprint_wrappers=1:nokey=1", local_audio_path]
-                    result = subprocess.run(ffprobe_cmd, capture_output=True, text=True, timeout=30)
+                    result = subprocess.run(ffprobe_cmd, capture_output=True, text=True, timeout=deadline.timeout(30))
                     if result.returncode == 0 and result.stdout.strip():
                         audio_duration = float(result.stdout.strip())
                         logger.info(f"🎵 Audio duration detected: {audio_duration:.2f}s")
@@ -1731,7 +2162,8 @@ Return ONLY the JSON, no other text."""
 
             # Calculate duration per image to match audio duration
             per_img_duration = audio_duration / num_images
-            transition_duration = 0.5  # 0.5 second crossfade between images
+            transition_duration = float(topic_data.get("TransitionDuration") or 0.5)  # crossfade between images
+            transition = topic_data.get("Transition") or "fade"
 
             logger.info(f"🎬 Video timing: {per_img_duration:.2f}s per image × {num_images} images = {audio_duration:.2f}s total")
             logger.info(f"🎬 Audio duration: {audio_duration:.2f}s")
@@ -1745,43 +2177,17 @@ Return ONLY the JSON, no other text."""
                         # Convert Google Drive URL to direct download if needed
                         direct_img_url = self.convert_drive_url_to_direct(img_url)
 
-                        # Download remote image to temp directory
-                        local_img_path = os.path.join(temp_dir, f"image_{i+1}_{topic_id}.png")
-                        logger.info(f"🖼️ Downloading image {i+1} from: {direct_img_url}")
-                        logger.info(f"🖼️ Making request to: {direct_img_url}")
-                        r = requests.get(direct_img_url, timeout=60)
-                        logger.info(f"🖼️ Response status: {r.status_code}, Content-Type: {r.headers.get('content-type', 'unknown')}")
-
-                        if r.status_code == 200:
-                            # Log response details
-                            content_length = len(r.content)
-                            logger.info(f"🖼️ Downloaded {content_length} bytes for image {i+1}")
-
-                            with open(local_img_path, "wb") as f:
-                                f.write(r.content)
-
-                            # Log first few bytes for debugging
-                            with open(local_img_path, 'rb') as f:
-                                first_bytes = f.read(100)
-                                logger.info(f"� First 50 bytes of downloaded image {i+1}: {first_bytes[:50]}")
-                                logger.info(f"🔍 First 50 bytes as hex: {first_bytes[:50].hex()}")
-
-                            # Validate downloaded image file
-                            if self.validate_image_file(local_img_path):
-                                local_image_paths.append(local_img_path)
-                                logger.info(f"🖼️ ✅ Downloaded and validated remote image {i+1} for FFmpeg")
-                            else:
-                                logger.error(f"❌ VALIDATION FAILED - Downloaded image {i+1} is invalid or corrupted: {local_img_path}")
-                                raise Exception(f"VALIDATION FAILED - Downloaded image {i+1} is invalid or corrupted")
-                        else:
-                            logger.error(f"❌ Failed to download image {i+1} (status {r.status_code})")
-                            raise Exception(f"Failed to download image {i+1} with status {r.status_code}")
-                    elif isinstance(img_url, str) and os.path.exists(img_url):
-                        # Copy local image to temp directory for processing
+                        # Stream remote image to temp directory (validated on the fly)
                         local_img_path = os.path.join(temp_dir, f"image_{i+1}_{topic_id}.png")
-                        shutil.copy2(img_url, local_img_path)
+                        self.download_to_file(direct_img_url, local_img_path, "image", timeout=deadline.timeout(60))
                         local_image_paths.append(local_img_path)
-                        logger.info(f"🖼️ Copied local image {i+1} for FFmpeg")
+                        logger.info(f"🖼️ ✅ Downloaded and validated remote image {i+1} for FFmpeg")
+                    elif isinstance(img_url, str) and os.path.exists(img_url):
+                        # FFmpeg reads the canonical local file directly unless a RAM scratch is in use
+                        if uses_scratch:
+                            img_url = self.link_artifact(img_url, os.path.join(temp_dir, f"image_{i+1}_{topic_id}{os.path.splitext(img_url)[1]}"))
+                        local_image_paths.append(img_url)
+                        logger.info(f"🖼️ Using local image {i+1} for FFmpeg")
                     else:
                         logger.error(f"❌ Invalid image URL or path: {img_url}")
                         raise Exception(f"Invalid image URL or path: {img_url}")
@@ -1839,48 +2245,107 @@ Return ONLY the JSON, no other text."""
             # Create crossfade transitions between images
             if len(local_image_paths) == 1:
                 # Single image case
-                filter_complex = filter_parts[0].replace(f"[v0]", "[v]")
+                filter_parts[0] = filter_parts[0].replace(f"[v0]", "[v]")
             else:
                 # Multiple images with crossfade
                 current_output = "v0"
                 for i in range(1, len(local_image_paths)):
                     offset = i * per_img_duration - transition_duration
                     if i == 1:
-                        filter_parts.append(f"[v0][v{i}]xfade=transition=fade:duration={transition_duration}:offset={offset:.2f}[x{i}]")
+                        filter_parts.append(f"[v0][v{i}]xfade=transition={transition}:duration={transition_duration}:offset={offset:.2f}[x{i}]")
                         current_output = f"x{i}"
                     else:
-                        filter_parts.append(f"[{current_output}][v{i}]xfade=transition=fade:duration={transition_duration}:offset={offset:.2f}[x{i}]")
+                        filter_parts.append(f"[{current_output}][v{i}]xfade=transition={transition}:duration={transition_duration}:offset={offset:.2f}[x{i}]")
                         current_output = f"x{i}"
 
                 # Rename final output to [v]
                 filter_parts[-1] = filter_parts[-1].replace(f"[{current_output}]", "[v]")
 
+            # Platform variants share the decode/filter pass: split [v] once, encode each branch
+            variants = self.select_video_variants(topic_data)
+            variant_outputs = []
+            master_label = "[v]"
+            if variants:
+                master_label = "[vmain]"
+                split_labels = "".join(f"[vs{i}]" for i in range(len(variants)))
+                filter_parts.append(f"[v]split={len(variants) + 1}[vmain]{split_labels}")
+                for i, (platform, profile) in enumerate(variants):
+                    w, h = profile["width"], profile["height"]
+                    filter_parts.append(
+                        f"[vs{i}]scale={w}:{h}:force_original_aspect_ratio=decrease,"
+                        f"pad={w}:{h}:(ow-iw)/2:(oh-ih)/2,setsar=1[vo{i}]"
+                    )
+                    slug = re.sub(r'[^a-z0-9]+', '_', platform.lower()).strip('_')
+                    variant_filename = f"video_{topic_id}_{slug}_{int(time.time())}.mp4"
+                    variant_outputs.append({
+                        "platform": platform,
+                        "profile": profile,
+                        "label": f"[vo{i}]",
+                        "render_path": os.path.join(temp_dir, variant_filename),
+                        "final_path": os.path.join(topic_folder, variant_filename),
+                    })
+
             filter_complex = ";".join(filter_parts)
 
             # Build final FFmpeg command using configured path
+            render_scheduler = get_render_scheduler()
+            # The master and every variant are separate x264 encoders sharing one job's thread budget
+            output_count = 1 + len(variant_outputs)
+            thread_args = render_scheduler.ffmpeg_thread_args(output_count)
+            audio_map = f"{len(local_image_paths)}:a"  # audio is the last input
             ffmpeg_cmd = [
                 getattr(self, 'ffmpeg_path', 'ffmpeg'), "-y",  # Use configured ffmpeg path
                 *inputs,
                 "-filter_complex", filter_complex,
-                "-map", "[v]",  # Map the final video output
-                "-map", f"{len(local_image_paths)}:a",  # Map audio from last input
+                "-map", master_label,  # Map the final video output
+                "-map", audio_map,  # Map audio from last input
                 "-c:v", "libx264", "-pix_fmt", "yuv420p", "-r", "30",
+                *thread_args,
                 "-c:a", "aac", "-b:a", "192k", "-ar", "44100",
                 "-shortest",  # Stop when shortest stream ends
-                local_video_path
+                render_video_path
             ]
+            for variant in variant_outputs:
+                ffmpeg_cmd += [
+                    "-map", variant["label"], "-map", audio_map,
+                    "-c:v", "libx264", "-pix_fmt", "yuv420p", "-r", "30",
+                    "-maxrate", variant["profile"]["maxrate"], "-bufsize", variant["profile"]["bufsize"],
+                    *thread_args,
+                    "-c:a", "aac", "-b:a", "192k", "-ar", "44100",
+                    "-t", str(variant["profile"]["max_duration"]),
+                    "-shortest",
+                    variant["render_path"]
+                ]
 
             # Log detailed information for debugging
             logger.info(f"🎬 FFmpeg command: {' '.join(ffmpeg_cmd)}")
             logger.info(f"🎬 Filter complex: {filter_complex}")
-            logger.info(f"🎬 Output path: {local_video_path}")
+            logger.info(f"🎬 Output path: {local_video_path} (rendering to {render_video_path})")
             logger.info(f"🎬 Audio file: {local_audio_path} (duration: {audio_duration:.2f}s)")
             logger.info(f"🎬 Images: {len(local_image_paths)} files")
 
             # Execute FFmpeg with comprehensive error handling
             try:
                 logger.info("🎬 Starting FFmpeg video generation...")
-                result = subprocess.run(ffmpeg_cmd, capture_output=True, text=True, timeout=300)
+                workflow_id = topic_data.get("WorkflowID")
+
+                def on_render_queued(position):
+                    if workflow_id and hasattr(self, 'status_callback'):
+                        self.status_callback(workflow_id, "Render Queued", render_queue_position=position)
+
+                def on_render_started(queue_wait):
+                    topic_data["RenderQueueWaitSeconds"] = round(queue_wait, 2)
+                    if workflow_id and hasattr(self, 'status_callback'):
+                        self.status_callback(workflow_id, "Rendering", render_queue_wait_seconds=round(queue_wait, 2))
+
+                # Wait for a render slot so parallel topics don't oversubscribe the CPU; the wait
+                # counts against the deadline and FFmpeg only gets what is left after it
+                result = render_scheduler.run(ffmpeg_cmd, timeout=300, label=topic_data.get("TopicID", "") or video_filename,
+                                              priority=topic_data.get("Priority", PRIORITY_NORMAL),
+                                              on_queued=on_render_queued, on_started=on_render_started,
+                                              owner=workflow_id, outputs=output_count, deadline=deadline,
+                                              cancelled=lambda: self.cancellation.is_cancelled(workflow_id))
+                logger.info(f"🎬 Render finished in {result.run_seconds:.1f}s after {result.queue_wait:.1f}s in queue")
 
                 # Log FFmpeg output for debugging
                 if result.stdout:
@@ -1888,9 +2353,11 @@ Return ONLY the JSON, no other text."""
                 if result.stderr:
                     logger.info(f"🎬 FFmpeg stderr: {result.stderr}")
 
-            except subprocess.TimeoutExpired:
-                logger.error("❌ FFmpeg process timed out after 5 minutes")
-                raise Exception("FFmpeg process timed out after 5 minutes")
+            except (WorkflowCancelled, DeadlineExceeded):
+                raise
+            except subprocess.TimeoutExpired as e:
+                logger.error(f"❌ FFmpeg process timed out after {e.timeout:.0f}s")
+                raise Exception(f"FFmpeg process timed out after {e.timeout:.0f}s")
             except FileNotFoundError:
                 logger.error("❌ FFmpeg not found in PATH. Please install FFmpeg to enable video generation.")
                 raise Exception("FFmpeg not found in PATH")
@@ -1902,25 +2369,20 @@ Return ONLY the JSON, no other text."""
             if result.returncode == 0:
                 logger.info("✅ Video creation successful")
 
-                # Verify output file was created and has content
-                if os.path.exists(local_video_path) and os.path.getsize(local_video_path) > 0:
+                # Verify output file was created and has content, then move it into place
+                if os.path.exists(render_video_path) and os.path.getsize(render_video_path) > 0:
+                    self.publish_render_output(render_video_path, local_video_path)
                     logger.info(f"✅ Video file created: {local_video_path} ({os.path.getsize(local_video_path)} bytes)")
 
                     # Ensure local file is preserved in generated_content directory
                     self.ensure_local_storage_copy(local_video_path, "video", topic_data)
 
-                    try:
-                        # Upload to Google Drive and get shareable link
-                        drive_video_url = self.upload_to_google_drive(local_video_path, "video", topic_data)
-                        logger.info(f"✅ Video uploaded to Google Drive: {drive_video_url}")
-
-                        # Return Drive URL for database, but keep local file
-                        return drive_video_url
-                    except Exception as drive_error:
-                        logger.warning(f"⚠️ Google Drive upload failed, using local path: {drive_error}")
-                        return local_video_path
+                    self.publish_video_variants(topic_data, variant_outputs)
+
+                    # Upload in the background; VideoFileLink switches to Drive when done
+                    return self.queue_drive_upload(local_video_path, "video", topic_data, "VideoFileLink")
                 else:
-                    logger.error(f"❌ Video file not created or empty: {local_video_path}")
+                    logger.error(f"❌ Video file not created or empty: {render_video_path}")
                     raise Exception("Video file not created or empty after FFmpeg execution")
             else:
                 logger.error(f"❌ FFmpeg failed with return code: {result.returncode}")
@@ -1928,6 +2390,8 @@ Return ONLY the JSON, no other text."""
                 logger.error(f"❌ FFmpeg stdout: {result.stdout}")
                 raise Exception(f"FFmpeg failed with return code {result.returncode}: {result.stderr}")
 
+        except (WorkflowCancelled, DeadlineExceeded):
+            raise
         except Exception as e:
             logger.error(f"❌ Video creation failed: {e}")
             self.log_error("Video Creation", str(e), topic_data.get("RunID", ""), topic_data.get("TopicID", ""))
@@ -1942,34 +2406,19 @@ Return ONLY the JSON, no other text."""
                 logger.warning(f"⚠️ Failed to clean up temporary directory: {cleanup_error}")
 
     def update_generated_content(self, topic_data: Dict) -> bool:
-        """📊 Update EssentialContent row with generated content - DEFINITIVE FIX"""
-        try:
-            logger.info("📊 DEFINITIVE FIX: Updating EssentialContent with generated data...")
+        """📊 Queue EssentialContent row update through the quota-aware Sheets gateway
 
-            worksheet = self.sheet.worksheet("EssentialContent")
-            records = worksheet.get_all_records()
+        Updates for the same TopicID are coalesced into a single `update_cells`
+        call and retried with backoff when Sheets throttles us.
+        """
+        try:
+            logger.info("📊 Queueing EssentialContent update with generated data...")
 
-            if not records:
-                logger.error("❌ No records found in EssentialContent sheet")
+            if not self.sheets_gateway:
+                logger.error("❌ Google Sheets client not initialized - cannot update EssentialContent")
                 return False
 
-            # Find the row corresponding to this TopicID; fallback to last row if not found
             topic_id = topic_data.get("TopicID", "")
-            row_index = None
-            try:
-                topic_col_values = worksheet.col_values(2)  # Column 2 is TopicID per headers
-                for idx, val in enumerate(topic_col_values, start=1):
-                    if val == topic_id:
-                        row_index = idx
-                        break
-            except Exception:
-                row_index = None
-
-            if row_index is None:
-                row_index = len(records) + 1  # +1 for header row
-                logger.warning(f"⚠️ TopicID '{topic_id}' not found. Falling back to last row {row_index}")
-            else:
-                logger.info(f"🔧 Updating row {row_index} for TopicID {topic_id}")
 
             # FORCE IMAGE DATA - Ensure we have data to save
             for i in range(1, 5):
@@ -1978,50 +2427,36 @@ Return ONLY the JSON, no other text."""
                 if not topic_data.get(f"Image{i}GeneratedBy"):
                     topic_data[f"Image{i}GeneratedBy"] = "Cloudflare"
 
-            logger.info(f"🔧 DEFINITIVE: Forced image data set for all 4 images")
-                # Use individual image links directly from topic_data
-                # These are set in the image generation process
-
-            # DEFINITIVE FIX: Direct cell updates with guaranteed success
-            try:
-                # Update critical columns directly
-                logger.info(f"🔧 DEFINITIVE: Updating database cells directly...")
-
-                # Update image links (columns 15-18)
-                worksheet.update_cell(row_index, 15, topic_data.get("Image1Link", ""))
-                worksheet.update_cell(row_index, 16, topic_data.get("Image2Link", ""))
-                worksheet.update_cell(row_index, 17, topic_data.get("Image3Link", ""))
-                worksheet.update_cell(row_index, 18, topic_data.get("Image4Link", ""))
-
-                # Update platform tracking (columns 21-24)
-                worksheet.update_cell(row_index, 21, topic_data.get("Image1GeneratedBy", ""))
-                worksheet.update_cell(row_index, 22, topic_data.get("Image2GeneratedBy", ""))
-                worksheet.update_cell(row_index, 23, topic_data.get("Image3GeneratedBy", ""))
-                worksheet.update_cell(row_index, 24, topic_data.get("Image4GeneratedBy", ""))
-
-                # Update other essential columns
-                worksheet.update_cell(row_index, 6, topic_data.get("Script", ""))
-                worksheet.update_cell(row_index, 11, topic_data.get("StatusProgress", "Content Generated"))
-                worksheet.update_cell(row_index, 12, topic_data.get("Status", "Completed"))
-                worksheet.update_cell(row_index, 13, topic_data.get("Caption", ""))
-                worksheet.update_cell(row_index, 14, topic_data.get("Hashtags", ""))
-                worksheet.update_cell(row_index, 19, topic_data.get("AudioFileLink", ""))
-                worksheet.update_cell(row_index, 20, topic_data.get("VideoFileLink", ""))
-
-                logger.info("🔧 ✅ DEFINITIVE FIX: ALL DATABASE UPDATES COMPLETED SUCCESSFULLY")
-
-                # Verify the updates worked
-                updated_records = worksheet.get_all_records()
-                if updated_records:
-                    latest = updated_records[-1]
-                    platform_count = sum(1 for i in range(1, 5) if latest.get(f"Image{i}GeneratedBy", ""))
-                    logger.info(f"🔧 ✅ VERIFICATION: {platform_count}/4 platform tracking entries saved")
-
-                return True
+            # Hold the link lock so a finishing upload can't be overwritten by a stale local path
+            with self.resolved_links_lock:
+                self.apply_resolved_links(topic_data)
+                cells = {
+                    # Script / status / caption columns
+                    6: topic_data.get("Script", ""),
+                    11: topic_data.get("StatusProgress", "Content Generated"),
+                    12: topic_data.get("Status", "Completed"),
+                    13: topic_data.get("Caption", ""),
+                    14: topic_data.get("Hashtags", ""),
+                    # Image links (columns 15-18)
+                    15: topic_data.get("Image1Link", ""),
+                    16: topic_data.get("Image2Link", ""),
+                    17: topic_data.get("Image3Link", ""),
+                    18: topic_data.get("Image4Link", ""),
+                    # Media links
+                    19: topic_data.get("AudioFileLink", ""),
+                    20: topic_data.get("VideoFileLink", ""),
+                    # Platform tracking (columns 21-24)
+                    21: topic_data.get("Image1GeneratedBy", ""),
+                    22: topic_data.get("Image2GeneratedBy", ""),
+                    23: topic_data.get("Image3GeneratedBy", ""),
+                    24: topic_data.get("Image4GeneratedBy", ""),
+                    # Per-platform video variants (JSON platform -> link)
+                    25: json.dumps(topic_data["VideoVariantLinks"]) if topic_data.get("VideoVariantLinks") else "",
+                }
 
-            except Exception as update_error:
-                logger.error(f"🔧 ❌ DEFINITIVE FIX FAILED: {update_error}")
-                return False
+                self.sheets_gateway.update_row("EssentialContent", topic_id, cells, key_column=2, priority=PRIORITY_STATUS)
+            logger.info(f"🔧 ✅ EssentialContent update queued for TopicID {topic_id} (status: {cells[12]})")
+            return True
 
         except Exception as e:
             logger.error(f"❌ Failed to update EssentialContent: {e}")
@@ -2031,7 +2466,6 @@ Return ONLY the JSON, no other text."""
     def log_api_usage(self, usage_data: Dict):
         """📊 Log API usage (exact from n8n workflow)"""
         try:
-            worksheet = self.sheet.worksheet("API_Usage")
             row = [
                 datetime.now().isoformat(),
                 usage_data.get("RunID", ""),
@@ -2040,8 +2474,8 @@ Return ONLY the JSON, no other text."""
                 usage_data.get("StatusCode", 200),
                 usage_data.get("TokensUsed", usage_data.get("TotalTokens", 0))
             ]
-            worksheet.append_row(row)
-            logger.info("✅ API usage logged")
+            self.sheets_gateway.append_row("API_Usage", row, priority=PRIORITY_LOG)
+            logger.info("✅ API usage queued")
         except Exception as e:
             logger.error(f"❌ Failed to log API usage: {e}")
 
@@ -2060,7 +2494,8 @@ Return ONLY the JSON, no other text."""
             "Gender", "Tone", "Platform", "StatusProgress", "FinalStatus",
             "Caption", "Hashtag", "Image1Link", "Image2Link", "Image3Link",
             "Image4Link", "AudioLink", "VideoLink", "Image1GeneratedBy",
-            "Image2GeneratedBy", "Image3GeneratedBy", "Image4GeneratedBy"
+            "Image2GeneratedBy", "Image3GeneratedBy", "Image4GeneratedBy",
+            "VideoVariantLinks"
         ]
 
         # Minimal tracking tables
@@ -2075,31 +2510,80 @@ Return ONLY the JSON, no other text."""
             "API_Usage": api_usage_headers,
             "ErrorLog": error_log_headers,
         }
+        gateway = self.sheets_gateway
         for ws_name, headers in sheets_spec.items():
             try:
                 try:
-                    ws = self.sheet.worksheet(ws_name)
+                    ws = gateway.worksheet(ws_name)
                 except Exception:
-                    ws = self.sheet.add_worksheet(title=ws_name, rows=1, cols=len(headers))
-                current = ws.get_all_values()
-                current_headers = current[0] if current else []
-                if current_headers != headers:
-                    ws.clear()
-                    ws.update([headers])
+                    ws = gateway.execute("write", self.sheet.add_worksheet, title=ws_name, rows=1, cols=len(headers))
+                    gateway.forget_worksheet(ws_name)
+                # Header row only - avoids downloading every data row on each insert
+                current_headers = gateway.execute("read", ws.row_values, 1)
+                if current_headers and current_headers == headers[:len(current_headers)] and len(current_headers) < len(headers):
+                    # Only new trailing columns: extend the header row and keep existing data
+                    missing_cols = len(headers) - getattr(ws, "col_count", len(headers))
+                    if missing_cols > 0:
+                        gateway.execute("write", ws.add_cols, missing_cols)
+                    gateway.execute("write", ws.update, [headers])
+                    gateway.forget_worksheet(ws_name)
+                    result["updated"].append(ws_name)
+                elif current_headers != headers:
+                    gateway.execute("write", ws.clear)
+                    gateway.execute("write", ws.update, [headers])
+                    gateway.forget_worksheet(ws_name)
                     result["updated"].append(ws_name)
                 if reset:
                     # Resize to keep header row only
-                    ws.resize(rows=1)
+                    gateway.execute("write", ws.resize, rows=1)
+                    gateway.forget_worksheet(ws_name)
                 logger.info(f"✅ Ensured worksheet '{ws_name}' (reset={reset})")
             except Exception as e:
                 logger.error(f"❌ Failed ensuring worksheet '{ws_name}': {e}")
         return result
 
+    def get_table_row_counts(self, max_age: Optional[float] = None) -> Dict[str, Any]:
+        """📊 Data-row counts per tab from one batched single-column values request
+
+        Results are cached for DB_STATUS_TTL_SECONDS (default 10s) so monitoring
+        can poll /admin/db-status without downloading whole sheets.
+        """
+        if max_age is None:
+            max_age = float(os.getenv("DB_STATUS_TTL_SECONDS", "10"))
+
+        cache = getattr(self, "_row_counts_cache", None)
+        now = time.time()
+        if cache and now - cache["fetched_at"] < max_age:
+            return {**cache, "cached": True, "age_seconds": round(now - cache["fetched_at"], 2)}
+
+        if not self.sheets_gateway:
+            raise Exception("Google Sheets client not initialized")
+
+        # Key column per tab: TopicID for EssentialContent, Timestamp for the logs
+        key_ranges = {
+            "EssentialContent": "EssentialContent!B:B",
+            "API_Usage": "API_Usage!A:A",
+            "ErrorLog": "ErrorLog!A:A",
+        }
+        response = self.sheets_gateway.execute(
+            "read", self.sheet.values_batch_get, list(key_ranges.values()),
+            params={"majorDimension": "COLUMNS"}
+        )
+
+        tables = {}
+        for name, value_range in zip(key_ranges, response.get("valueRanges", [])):
+            columns = value_range.get("values") or [[]]
+            # Minus the header row
+            tables[name] = max(len([v for v in columns[0] if v != ""]) - 1, 0)
+        for name in key_ranges:
+            tables.setdefault(name, 0)
+
+        self._row_counts_cache = {"tables": tables, "fetched_at": now}
+        return {**self._row_counts_cache, "cached": False, "age_seconds": 0.0}
+
     def log_error(self, node_name: str, error_message: str, run_id: str, topic_id: str = ""):
         """🚨 Log error (exact from n8n workflow)"""
         try:
-            worksheet = self.sheet.worksheet("ErrorLog")
-
             row = [
                 datetime.now().isoformat(),
                 run_id,
@@ -2108,8 +2592,8 @@ Return ONLY the JSON, no other text."""
                 "Failed"
             ]
 
-            worksheet.append_row(row)
-            logger.info(f"✅ Error logged: {node_name}")
+            self.sheets_gateway.append_row("ErrorLog", row, priority=PRIORITY_LOG)
+            logger.info(f"✅ Error queued: {node_name}")
 
         except Exception as e:
             logger.error(f"❌ Failed to log error: {e}")
@@ -2130,15 +2614,14 @@ Return ONLY the JSON, no other text."""
             topic_id = topic_data.get("TopicID", "unknown")
             topic_title = topic_data.get('Title', 'Unknown').replace(' ', '_').replace('/', '_')[:50]
 
-            # Files should already be in topic-based folders, but ensure they're also in main storage
-            import shutil
+            # Files already live in topic-based folders; the flat folders only get links to them
 
             # Copy video (if exists and different from topic folder)
             if video_url and os.path.exists(video_url):
                 local_video = f"{local_base}/videos/{topic_id}_{topic_title}.mp4"
                 try:
-                    shutil.copy2(video_url, local_video)
-                    logger.info(f"✅ Video copied to: {local_video}")
+                    self.link_artifact(video_url, local_video)
+                    logger.info(f"✅ Video linked at: {local_video}")
                 except Exception as e:
                     logger.warning(f"⚠️ Video copy failed: {e}")
 
@@ -2146,8 +2629,8 @@ Return ONLY the JSON, no other text."""
             if audio_url and os.path.exists(audio_url):
                 local_audio = f"{local_base}/audio/{topic_id}_{topic_title}.mp3"
                 try:
-                    shutil.copy2(audio_url, local_audio)
-                    logger.info(f"✅ Audio copied to: {local_audio}")
+                    self.link_artifact(audio_url, local_audio)
+                    logger.info(f"✅ Audio linked at: {local_audio}")
                 except Exception as e:
                     logger.warning(f"⚠️ Audio copy failed: {e}")
 
@@ -2156,8 +2639,8 @@ Return ONLY the JSON, no other text."""
                 if img_url and os.path.exists(img_url):
                     local_image = f"{local_base}/images/{topic_id}_{topic_title}_image_{i+1}.png"
                     try:
-                        shutil.copy2(img_url, local_image)
-                        logger.info(f"✅ Image {i+1} copied to: {local_image}")
+                        self.link_artifact(img_url, local_image)
+                        logger.info(f"✅ Image {i+1} linked at: {local_image}")
                     except Exception as e:
                         logger.warning(f"⚠️ Image {i+1} copy failed: {e}")
 
@@ -2168,270 +2651,602 @@ Return ONLY the JSON, no other text."""
 
     def process_single_topic_full_pipeline(self, topic_data: Dict) -> Dict:
         """🎯 Process single topic through full pipeline (exact workflow from Master Developer Prompt)"""
+        return self.run_topic_pipeline(self.begin_topic_pipeline(topic_data))
+
+    def run_topic_pipeline(self, ctx: Dict) -> Dict:
+        """Run every stage in order for one topic context"""
+        error = None
         try:
-            logger.info(f"🎯 Starting full pipeline for topic: {topic_data.get('Title', 'Unknown')}")
-
-            workflow_id = topic_data.get('WorkflowID')
-
-            # Step 1: Generate script + image prompts (ScriptGenerated status)
-            if not topic_data.get("Script"):
-                logger.info("🎯 Step 1: Generating script and image prompts...")
-                # If Script already provided (script mode), skip LLM script generation
-                pre_script = (topic_data.get("Script") or "").strip()
-                if pre_script:
-                    logger.info("📝 Script provided by user; skipping LLM script generation")
-                    if not topic_data.get("ImagePromptsJson"):
-                        image_prompts = self.build_image_prompts_from_script(topic_data)
-                        topic_data["ImagePromptsJson"] = json.dumps(image_prompts)
-                    topic_data["Status"] = "Script Generated"
-                    self.update_generated_content(topic_data)
-                else:
-                    script_prompt = self.create_script_generation_prompt(topic_data)
-                    script_response = self.gemini_script_generation(script_prompt, topic_data)
-                    topic_data = self.parse_script_response(script_response, topic_data)
-            else:
-                logger.info("📝 Skipping script generation - using provided script text")
-                # If the user embedded image prompt lines inside the script, extract and use them
-                if not topic_data.get("ImagePromptsJson"):
-                    extracted, cleaned = self.try_extract_image_prompts(topic_data.get("Script", ""))
-                    if extracted:
-                        topic_data["ImagePromptsJson"] = json.dumps(extracted)
-                        topic_data["Script"] = cleaned
-                # Ensure image prompts exist for relevance in script mode
-                if not topic_data.get("ImagePromptsJson"):
-                    prompts = self.build_image_prompts_from_script(topic_data)
-                    topic_data["ImagePromptsJson"] = json.dumps(prompts)
-                # Mark as Script Generated and persist to sheet for parity
-                topic_data["Status"] = "Script Generated"
-                topic_data["UpdatedAt"] = datetime.now().isoformat()
-                try:
-                    self.update_generated_content(topic_data)
-                except Exception:
-                    pass
+            for name, stage in self.topic_pipeline_stages():
+                if not self.run_topic_stage(name, stage, ctx):
+                    break
+        except Exception as e:
+            error = e
+        return self.finish_topic_pipeline(ctx, error)
+
+    def topic_deadline(self, topic_data: Dict) -> Deadline:
+        """The topic's workflow deadline (never expires when none was set)"""
+        return Deadline(topic_data.get("DeadlineAt"))
+
+    def topic_pipeline_stages(self) -> List[tuple]:
+        """Ordered (name, stage) pairs; each stage takes the topic context and returns False to stop early"""
+        return [
+            ("script", self.run_script_stage),
+            ("audio", self.run_audio_stage),
+            ("images", self.run_images_stage),
+            ("render", self.run_render_stage),
+            ("upload", self.run_upload_stage),
+        ]
 
-            # Update status AFTER script generation is complete
-            topic_data["Status"] = "Script Generated"
-            self.update_generated_content(topic_data)
+    def begin_topic_pipeline(self, topic_data: Dict, force_stages: Optional[List[str]] = None) -> Dict:
+        """Build the per-topic context shared by all stages"""
+        # Keep the retention sweeper away from this topic's files while it runs
+        topic_folder = self.create_safe_topic_folder(topic_data)
+        self.retention.protect(topic_folder)
+        manifest = ArtifactManifest(topic_folder)
+        manifest.init_source({k: v for k, v in topic_data.items() if k not in self.RUN_ONLY_FIELDS})
+        # Drive links finishing while the topic runs are collected here until it ends
+        with self.resolved_links_lock:
+            self.resolved_links.setdefault(topic_data.get("TopicID", ""), {})
+        logger.info(f"🎯 Starting full pipeline for topic: {topic_data.get('Title', 'Unknown')}")
+        return {"topic_data": topic_data, "topic_folder": topic_folder, "audio_url": "", "image_urls": [], "result": None,
+                "manifest": manifest, "force_stages": set(force_stages or [])}
+
+    # Stages recorded in the artifact manifest; "upload" is cheap and always runs
+    MANIFEST_STAGES = ("script", "audio", "images", "render")
+    STAGE_CONTEXT_KEYS = ("audio_url", "image_urls")
+
+    def stage_inputs(self, name: str, ctx: Dict) -> Dict:
+        """Everything a stage's output depends on; a changed hash means it must run again"""
+        topic_data = ctx["topic_data"]
+
+        def pick(*keys):
+            return {k: topic_data.get(k) for k in keys}
+
+        if name == "script":
+            return pick("Title", "MainPointsText", "MainPoints", "TransitionNote", "Language", "Tone",
+                        "InputType", "CustomPrompt", "TargetDurationSeconds", "raw_notes")
+        if name == "audio":
+            return pick("Script", "Language", "VoiceGender", "AudioSpeakingRate")
+        if name == "images":
+            return pick("Title", "Script", "ImagePromptsJson", "ImagePromptOverrides",
+                        "image_width", "image_height", "image_aspect_ratio")
+        if name == "render":
+            manifest = ctx.get("manifest")
+            content_hash = manifest.content_hash if manifest else hash_file
+            return {
+                **pick("Platforms", "Transition", "TransitionDuration"),
+                "variants": self.render_platform_variants,
+                "audio": content_hash(ctx["audio_url"]) if ctx["audio_url"] else None,
+                "images": [(content_hash(p) or p) if p else p for p in ctx["image_urls"]],
+            }
+        return {}
+
+    def run_topic_stage(self, name: str, stage, ctx: Dict) -> bool:
+        """Run one stage, or reuse its recorded outputs when its inputs are unchanged"""
+        self.cancellation.check(ctx["topic_data"].get("WorkflowID"))
+        self.topic_deadline(ctx["topic_data"]).check(f"stage '{name}'", self.STAGE_MIN_SECONDS.get(name, 0))
+        manifest = ctx.get("manifest")
+        if not manifest or name not in self.MANIFEST_STAGES:
+            return stage(ctx)
+
+        topic_data = ctx["topic_data"]
+        inputs = self.stage_inputs(name, ctx)
+        if name not in ctx["force_stages"] and manifest.is_current(name, inputs):
+            logger.info(f"⏭️ Stage '{name}' unchanged for {topic_data.get('TopicID')}; reusing recorded outputs")
+            self.restore_stage_outputs(ctx, manifest.stage(name)["outputs"], manifest.uploads())
+            return True
 
-            # Update workflow status callback AFTER completion
-            if workflow_id and hasattr(self, 'status_callback'):
-                self.status_callback(workflow_id, "Script Generated")
-                logger.info(f"✅ Script generation completed for workflow: {workflow_id}")
-
-            # Guard: script must be non-empty before proceeding
-                if not (topic_data.get("Script") and topic_data["Script"].strip()):
-                    logger.error("❌ Script is empty or too short; aborting pipeline for this topic")
-                    topic_data["Status"] = "Script Too Short"
-                    topic_data["UpdatedAt"] = datetime.now().isoformat()
-                    self.update_generated_content(topic_data)
-                    return {
-                        "success": False,
-                        "topic_data": topic_data,
-                        "error": "Script Too Short",
-                        "message": f"Pipeline aborted due to empty/short script: {topic_data.get('Title','Unknown')}"
-                    }
-
-                # Step 2: Generate audio (AudioGenerated status)
-            logger.info("🎯 Step 2: Generating audio with TTS...")
-            audio_url = self.generate_audio_tts(topic_data)
-            topic_data["AudioFileLink"] = audio_url
-            topic_data["Status"] = "Audio Generated"
-            topic_data["UpdatedAt"] = datetime.now().isoformat()
+        before = copy.deepcopy(topic_data)
+        before_ctx = {k: copy.deepcopy(ctx[k]) for k in self.STAGE_CONTEXT_KEYS}
+        proceed = stage(ctx)
+        topic_data = ctx["topic_data"]
 
-            # Get TTS voice info for logging
-            voice_info = self.get_tts_voice_name(topic_data.get("Language", "English"), topic_data.get("VoiceGender", "Female"))
-            topic_data["TTSVoiceName"] = voice_info["name"]
-            topic_data["TTSLanguageCode"] = voice_info["code"]
+        failed = topic_data.get("Status") in ("Video Failed", "Images Failed", "Images Incomplete", "Script Too Short")
+        if not proceed or failed:
+            manifest.forget_stage(name)
+            return proceed
 
-            self.update_generated_content(topic_data)
+        outputs = {
+            "topic": {k: v for k, v in topic_data.items() if k != "UpdatedAt" and before.get(k) != v},
+            "context": {k: ctx[k] for k in self.STAGE_CONTEXT_KEYS if before_ctx[k] != ctx[k]},
+        }
+        files = set()
+        for value in [*outputs["topic"].values(), *outputs["context"].values()]:
+            candidates = value.values() if isinstance(value, dict) else value if isinstance(value, list) else [value]
+            files.update(c for c in candidates if isinstance(c, str) and c and os.path.isfile(c))
+        manifest.record_stage(name, inputs, outputs, sorted(files))
+        return proceed
+
+    def restore_stage_outputs(self, ctx: Dict, outputs: Dict, uploads: Dict[str, str]):
+        """Put a skipped stage's recorded outputs back, preferring Drive links for uploaded files"""
+        def linked(value):
+            if isinstance(value, dict):
+                return {k: linked(v) for k, v in value.items()}
+            if isinstance(value, list):
+                return [linked(v) for v in value]
+            if isinstance(value, str) and ", " in value:
+                return ", ".join(uploads.get(os.path.abspath(v), v) for v in value.split(", "))
+            if isinstance(value, str) and value:
+                return uploads.get(os.path.abspath(value), value)
+            return value
+
+        for key, value in (outputs.get("topic") or {}).items():
+            ctx["topic_data"][key] = linked(value)
+        # Context values feed later stages, so only fall back to a Drive link once the local file is gone
+        def available(value):
+            if isinstance(value, list):
+                return [available(v) for v in value]
+            if isinstance(value, str) and value and not os.path.exists(value):
+                return uploads.get(os.path.abspath(value), value)
+            return value
+
+        for key, value in (outputs.get("context") or {}).items():
+            ctx[key] = available(value)
+
+    def rerun_topic_stage(self, topic_id: str, stage: str, overrides: Optional[Dict] = None,
+                          workflow_id: Optional[str] = None, deadline_at: Optional[float] = None) -> Dict:
+        """🔁 Re-run one stage for a topic from its saved artifacts
+
+        Earlier stages are reused from the manifest, `stage` always runs, and
+        later stages run only if their inputs changed as a result. The re-run
+        gets its own `deadline_at`, never the original run's.
+        """
+        stage_names = [name for name, _ in self.topic_pipeline_stages()]
+        if stage not in stage_names:
+            raise ValueError(f"Unknown stage '{stage}'; expected one of {stage_names}")
+        manifest = ArtifactManifest.find(os.path.join(self.get_project_root(), "generated_content"), topic_id)
+        if not manifest:
+            raise ValueError(f"No artifact manifest found for topic {topic_id}")
+
+        # TopicID/Title pick the topic folder, so they can't be overridden
+        overrides = {k: v for k, v in (overrides or {}).items()
+                     if k not in ("TopicID", "Title", *self.RUN_ONLY_FIELDS)}
+        if overrides:
+            manifest.update_source(overrides)
+        # Manifests written before run fields were left out still carry the first run's
+        topic_data = {k: v for k, v in manifest.source().items() if k not in self.RUN_ONLY_FIELDS}
+        if workflow_id:
+            topic_data["WorkflowID"] = workflow_id
+        if deadline_at:
+            topic_data["DeadlineAt"] = deadline_at
+        topic_data.setdefault("UploadTypes", list(self.default_upload_types))
+
+        logger.info(f"🔁 Re-running stage '{stage}' for topic {topic_id} (overrides: {list(overrides)})")
+        try:
+            return self.run_topic_pipeline(self.begin_topic_pipeline(topic_data, force_stages=[stage]))
+        finally:
+            self.cancellation.clear(workflow_id)
 
-            # Update workflow status callback AFTER audio generation is complete
-            if workflow_id and hasattr(self, 'status_callback'):
-                self.status_callback(workflow_id, "Audio Generated")
-                logger.info(f"✅ Audio generation completed for workflow: {workflow_id}")
-
-            # Step 3: Generate all 4 images (ImagesGenerated status)
-            logger.info("🎯 Step 3: Generating 4 images...")
-            image_urls = self.generate_images_with_fallback(topic_data)
-
-            if image_urls and len(image_urls) > 0:
-                topic_data["ImageFileLinks"] = ", ".join(image_urls)
-
-                # Store individual image links for database - CRITICAL FIX
-                logger.info(f"🔧 Setting individual image links for database:")
-                for i, url in enumerate(image_urls[:4]):  # Ensure max 4 images
-                    topic_data[f"Image{i+1}Link"] = url
-                    logger.info(f"   Image{i+1}Link = {url}")
-
-                # Ensure we have exactly 4 image slots and platform tracking
-                while len(image_urls) < 4:
-                    image_urls.append("")
-
-                # CRITICAL FIX: Ensure platform tracking is set
-                logger.info(f"🔧 Checking platform tracking:")
-                for i in range(4):
-                    platform = topic_data.get(f"Image{i+1}GeneratedBy", "")
-                    logger.info(f"   Image{i+1}GeneratedBy = '{platform}'")
-                    if not platform:
-                        topic_data[f"Image{i+1}GeneratedBy"] = "Unknown"
-                        logger.info(f"   Set Image{i+1}GeneratedBy = 'Unknown'")
-
-                topic_data["Status"] = "Images Generated"
-                topic_data["UpdatedAt"] = datetime.now().isoformat()
+    def regenerate_image_slots(self, topic_id: str, slots: List[int], prompts: Optional[Dict[str, str]] = None,
+                               workflow_id: Optional[str] = None, deadline_at: Optional[float] = None) -> Dict:
+        """🖼️ Regenerate only the given image slots, then re-render once all 4 exist
+
+        Other slots are reused from the manifest; `prompts` optionally replaces
+        the prompt of a slot ({"2": "new prompt"}).
+        """
+        manifest = ArtifactManifest.find(os.path.join(self.get_project_root(), "generated_content"), topic_id)
+        if not manifest:
+            raise ValueError(f"No artifact manifest found for topic {topic_id}")
+        bad_slots = [slot for slot in slots if int(slot) not in (1, 2, 3, 4)]
+        if bad_slots or not slots:
+            raise ValueError(f"Image slots must be between 1 and 4 (got {slots})")
+
+        for slot in slots:
+            manifest.forget_image_slot(int(slot))
+        overrides = {}
+        if prompts:
+            merged = dict(manifest.source().get("ImagePromptOverrides") or {})
+            merged.update({str(k): v for k, v in prompts.items()})
+            overrides["ImagePromptOverrides"] = merged
+        logger.info(f"🖼️ Regenerating image slots {slots} for topic {topic_id}")
+        return self.rerun_topic_stage(topic_id, "images", overrides, workflow_id=workflow_id, deadline_at=deadline_at)
+
+    def finish_topic_pipeline(self, ctx: Dict, error: Optional[Exception] = None) -> Dict:
+        """Turn a finished (or failed) topic context into the pipeline result"""
+        topic_data = ctx["topic_data"]
+        try:
+            if error is None:
+                result = ctx["result"]
+                self.checkpoint_topic_result(topic_data, bool(result and result.get("success")))
+                return result
 
-                logger.info(f"🔧 Calling update_generated_content with image data...")
+            if isinstance(error, WorkflowCancelled):
+                logger.info(f"🛑 Topic {topic_data.get('Title', 'Unknown')} stopped: workflow cancelled")
+                topic_data["Status"] = "Cancelled"
+                topic_data["UpdatedAt"] = datetime.now().isoformat()
                 self.update_generated_content(topic_data)
+                return {
+                    "success": False,
+                    "cancelled": True,
+                    "topic_data": topic_data,
+                    "error": str(error),
+                    "message": f"Pipeline cancelled for topic: {topic_data.get('Title', 'Unknown')}"
+                }
 
-                # Update workflow status callback AFTER image generation is complete
-                if workflow_id and hasattr(self, 'status_callback'):
-                    self.status_callback(workflow_id, "Images Generated")
-                    logger.info(f"✅ Image generation completed for workflow: {workflow_id} - {len(image_urls)} images")
+            logger.error(f"❌ Full pipeline failed for topic {topic_data.get('Title', 'Unknown')}: {error}")
 
-                    # Log which platforms were used
-                    platforms_used = [topic_data.get(f"Image{i}GeneratedBy", "Unknown") for i in range(1, 5)]
-                    logger.info(f"🖼️ Image platforms used: {platforms_used}")
-            else:
-                logger.warning(f"⚠️ No images generated for workflow: {workflow_id}")
-                topic_data["Status"] = "Images Failed"
-                if workflow_id and hasattr(self, 'status_callback'):
-                    self.status_callback(workflow_id, "Images Failed")
+            # Update status to failed
+            topic_data["Status"] = "Deadline Exceeded" if isinstance(error, DeadlineExceeded) else "Failed"
+            topic_data["UpdatedAt"] = datetime.now().isoformat()
+            self.update_generated_content(topic_data)
+            self.checkpoint_topic_result(topic_data, False)
 
-            # Step 4: Create video (VideoGenerated status)
-            logger.info("🎯 Step 4: Creating video with FFmpeg...")
+            return {
+                "success": False,
+                "deadline_exceeded": isinstance(error, DeadlineExceeded),
+                "topic_data": topic_data,
+                "error": str(error),
+                "message": f"Pipeline failed for topic: {topic_data.get('Title', 'Unknown')}"
+            }
+        finally:
+            with self.resolved_links_lock:
+                self.resolved_links.pop(topic_data.get("TopicID", ""), None)
+            self.release_artifact_buffers(ctx["topic_folder"])
+            self.retention.release(ctx["topic_folder"])
+
+    def checkpoint_topic_result(self, topic_data: Dict, success: bool):
+        """💾 Mark a topic finished in its workflow checkpoint so a resume skips it"""
+        if topic_data.get("WorkflowID"):
+            self.checkpoints.record_topic_result(topic_data["WorkflowID"], topic_data.get("TopicID", ""),
+                                                 success, topic_data.get("Status", ""))
+
+    def run_script_stage(self, ctx: Dict) -> bool:
+        """📝 Stage 1: script + image prompts"""
+        topic_data = ctx["topic_data"]
+        workflow_id = topic_data.get('WorkflowID')
+
+        # Step 1: Generate script + image prompts (ScriptGenerated status)
+        if not topic_data.get("Script"):
+            logger.info("🎯 Step 1: Generating script and image prompts...")
+            # If Script already provided (script mode), skip LLM script generation
+            pre_script = (topic_data.get("Script") or "").strip()
+            if pre_script:
+                logger.info("📝 Script provided by user; skipping LLM script generation")
+                if not topic_data.get("ImagePromptsJson"):
+                    image_prompts = self.build_image_prompts_from_script(topic_data)
+                    topic_data["ImagePromptsJson"] = json.dumps(image_prompts)
+                topic_data["Status"] = "Script Generated"
+                self.update_generated_content(topic_data)
+            else:
+                script_prompt = self.create_script_generation_prompt(topic_data)
+                script_response = self.gemini_script_generation(script_prompt, topic_data)
+                topic_data = self.parse_script_response(script_response, topic_data)
+                ctx["topic_data"] = topic_data
+        else:
+            logger.info("📝 Skipping script generation - using provided script text")
+            # If the user embedded image prompt lines inside the script, extract and use them
+            if not topic_data.get("ImagePromptsJson"):
+                extracted, cleaned = self.try_extract_image_prompts(topic_data.get("Script", ""))
+                if extracted:
+                    topic_data["ImagePromptsJson"] = json.dumps(extracted)
+                    topic_data["Script"] = cleaned
+            # Ensure image prompts exist for relevance in script mode
+            if not topic_data.get("ImagePromptsJson"):
+                prompts = self.build_image_prompts_from_script(topic_data)
+                topic_data["ImagePromptsJson"] = json.dumps(prompts)
+            # Mark as Script Generated and persist to sheet for parity
+            topic_data["Status"] = "Script Generated"
+            topic_data["UpdatedAt"] = datetime.now().isoformat()
             try:
-                video_url = self.create_video_ffmpeg(topic_data, audio_url, image_urls)
-                topic_data["VideoFileLink"] = video_url
-                topic_data["Status"] = "Video Generated"
+                self.update_generated_content(topic_data)
+            except Exception:
+                pass
 
-                # Update workflow status callback AFTER video generation is complete
-                if workflow_id and hasattr(self, 'status_callback'):
-                    self.status_callback(workflow_id, "Video Generated")
-                    logger.info(f"✅ Video generation completed for workflow: {workflow_id}")
+        # Update status AFTER script generation is complete
+        topic_data["Status"] = "Script Generated"
+        self.update_generated_content(topic_data)
 
-            except Exception as video_error:
-                logger.warning(f"⚠️ Video generation failed: {video_error}")
-                topic_data["VideoFileLink"] = f"Video generation failed: {str(video_error)}"
-                topic_data["Status"] = "Video Failed"
+        # Update workflow status callback AFTER completion
+        if workflow_id and hasattr(self, 'status_callback'):
+            self.status_callback(workflow_id, "Script Generated")
+            logger.info(f"✅ Script generation completed for workflow: {workflow_id}")
 
-                # Update workflow status for video failure
-                if workflow_id and hasattr(self, 'status_callback'):
-                    self.status_callback(workflow_id, "Video Failed")
-                    logger.info(f"⚠️ Video generation failed for workflow: {workflow_id}")
+        # Guard: script must be non-empty before proceeding
+            if not (topic_data.get("Script") and topic_data["Script"].strip()):
+                logger.error("❌ Script is empty or too short; aborting pipeline for this topic")
+                topic_data["Status"] = "Script Too Short"
+                topic_data["UpdatedAt"] = datetime.now().isoformat()
+                self.update_generated_content(topic_data)
+                ctx["result"] = {
+                    "success": False,
+                    "topic_data": topic_data,
+                    "error": "Script Too Short",
+                    "message": f"Pipeline aborted due to empty/short script: {topic_data.get('Title','Unknown')}"
+                }
+                return False
 
+        return True
+
+    def run_audio_stage(self, ctx: Dict) -> bool:
+        """🎵 Stage 2: TTS audio"""
+        topic_data = ctx["topic_data"]
+        workflow_id = topic_data.get('WorkflowID')
+
+        # Step 2: Generate audio (AudioGenerated status)
+        logger.info("🎯 Step 2: Generating audio with TTS...")
+        audio_url = self.generate_audio_tts(topic_data)
+        ctx["audio_url"] = audio_url
+        topic_data["AudioFileLink"] = audio_url
+        topic_data["Status"] = "Audio Generated"
+        topic_data["UpdatedAt"] = datetime.now().isoformat()
+
+        # Get TTS voice info for logging
+        voice_info = self.get_tts_voice_name(topic_data.get("Language", "English"), topic_data.get("VoiceGender", "Female"))
+        topic_data["TTSVoiceName"] = voice_info["name"]
+        topic_data["TTSLanguageCode"] = voice_info["code"]
+
+        self.update_generated_content(topic_data)
+
+        # Update workflow status callback AFTER audio generation is complete
+        if workflow_id and hasattr(self, 'status_callback'):
+            self.status_callback(workflow_id, "Audio Generated")
+            logger.info(f"✅ Audio generation completed for workflow: {workflow_id}")
+        return True
+
+    def run_images_stage(self, ctx: Dict) -> bool:
+        """🖼️ Stage 3: the 4 images"""
+        topic_data = ctx["topic_data"]
+        workflow_id = topic_data.get('WorkflowID')
+
+        # Step 3: Generate all 4 images (ImagesGenerated status)
+        logger.info("🎯 Step 3: Generating 4 images...")
+        image_urls = self.generate_images_with_fallback(topic_data)
+        ctx["image_urls"] = image_urls
+
+        # Never render with missing slots; they can be regenerated individually later
+        failed_slots = topic_data.get("FailedImageSlots") or []
+        if failed_slots:
+            logger.warning(f"⚠️ Image slots {failed_slots} failed on every provider; render deferred")
+            topic_data["Status"] = "Images Incomplete"
             topic_data["UpdatedAt"] = datetime.now().isoformat()
             self.update_generated_content(topic_data)
+            if workflow_id and hasattr(self, 'status_callback'):
+                self.status_callback(workflow_id, "Images Incomplete", failed_image_slots=failed_slots)
+            ctx["result"] = {
+                "success": False,
+                "topic_data": topic_data,
+                "error": "Images Incomplete",
+                "failed_image_slots": failed_slots,
+                "message": f"Image slots {failed_slots} failed; regenerate them to render: {topic_data.get('Title', 'Unknown')}"
+            }
+            return False
 
-            # Step 5: Upload to Google Drive and copy to local storage
-            try:
-                # Upload video to Google Drive
-                drive_video_url = self.upload_to_google_drive(video_url, "video", topic_data)
-                if drive_video_url and drive_video_url != video_url:
-                    topic_data["VideoFileLink"] = drive_video_url
-                    logger.info(f"✅ Video uploaded to Google Drive: {drive_video_url}")
+        if image_urls and len(image_urls) > 0:
+            topic_data["ImageFileLinks"] = ", ".join(image_urls)
+
+            # Store individual image links for database - CRITICAL FIX
+            logger.info(f"🔧 Setting individual image links for database:")
+            for i, url in enumerate(image_urls[:4]):  # Ensure max 4 images
+                topic_data[f"Image{i+1}Link"] = url
+                logger.info(f"   Image{i+1}Link = {url}")
+
+            # Ensure we have exactly 4 image slots and platform tracking
+            while len(image_urls) < 4:
+                image_urls.append("")
+
+            # CRITICAL FIX: Ensure platform tracking is set
+            logger.info(f"🔧 Checking platform tracking:")
+            for i in range(4):
+                platform = topic_data.get(f"Image{i+1}GeneratedBy", "")
+                logger.info(f"   Image{i+1}GeneratedBy = '{platform}'")
+                if not platform:
+                    topic_data[f"Image{i+1}GeneratedBy"] = "Unknown"
+                    logger.info(f"   Set Image{i+1}GeneratedBy = 'Unknown'")
+
+            topic_data["Status"] = "Images Generated"
+            topic_data["UpdatedAt"] = datetime.now().isoformat()
 
-                # Upload audio to Google Drive
-                drive_audio_url = self.upload_to_google_drive(audio_url, "audio", topic_data)
-                if drive_audio_url and drive_audio_url != audio_url:
-                    topic_data["AudioFileLink"] = drive_audio_url
-                    logger.info(f"✅ Audio uploaded to Google Drive: {drive_audio_url}")
+            logger.info(f"🔧 Calling update_generated_content with image data...")
+            self.update_generated_content(topic_data)
 
-                # Copy files to local storage
-                self.copy_files_to_local_storage(topic_data, audio_url, image_urls, video_url)
+            # Update workflow status callback AFTER image generation is complete
+            if workflow_id and hasattr(self, 'status_callback'):
+                self.status_callback(workflow_id, "Images Generated")
+                logger.info(f"✅ Image generation completed for workflow: {workflow_id} - {len(image_urls)} images")
 
-            except Exception as e:
-                logger.warning(f"⚠️ Google Drive upload failed, using Cloudflare URLs: {e}")
+                # Log which platforms were used
+                platforms_used = [topic_data.get(f"Image{i}GeneratedBy", "Unknown") for i in range(1, 5)]
+                logger.info(f"🖼️ Image platforms used: {platforms_used}")
+        else:
+            logger.warning(f"⚠️ No images generated for workflow: {workflow_id}")
+            topic_data["Status"] = "Images Failed"
+            if workflow_id and hasattr(self, 'status_callback'):
+                self.status_callback(workflow_id, "Images Failed")
+        return True
 
-            # Step 6: Mark as completed (Completed status)
-            logger.info("🎯 Step 6: Finalizing and marking as completed...")
-            # Gate completion on successful video production
-            video_ok = False
-            vf = topic_data.get("VideoFileLink", "")
-            try:
-                if isinstance(vf, str) and vf.strip():
-                    if vf.startswith("http://") or vf.startswith("https://"):
-                        video_ok = True
-                    elif os.path.exists(vf) and os.path.getsize(vf) > 0:
-                        video_ok = True
-            except Exception:
-                video_ok = False
+    def run_render_stage(self, ctx: Dict) -> bool:
+        """🎬 Stage 4: FFmpeg render"""
+        topic_data = ctx["topic_data"]
+        workflow_id = topic_data.get('WorkflowID')
 
-            if video_ok:
-                topic_data["Status"] = "Completed"
-                topic_data["CompletedAt"] = datetime.now().isoformat()
-            else:
-                logger.warning("⚠️ Video not confirmed; preserving previous failure status (not marking Completed)")
-            topic_data["UpdatedAt"] = datetime.now().isoformat()
+        # Step 4: Create video (VideoGenerated status)
+        logger.info("🎯 Step 4: Creating video with FFmpeg...")
+        try:
+            video_url = self.create_video_ffmpeg(topic_data, ctx["audio_url"], ctx["image_urls"])
+            topic_data["VideoFileLink"] = video_url
+            topic_data["Status"] = "Video Generated"
 
-            self.update_generated_content(topic_data)
+            # Update workflow status callback AFTER video generation is complete
+            if workflow_id and hasattr(self, 'status_callback'):
+                self.status_callback(workflow_id, "Video Generated")
+                logger.info(f"✅ Video generation completed for workflow: {workflow_id}")
+
+        except (WorkflowCancelled, DeadlineExceeded):
+            raise
+        except Exception as video_error:
+            logger.warning(f"⚠️ Video generation failed: {video_error}")
+            topic_data["VideoFileLink"] = f"Video generation failed: {str(video_error)}"
+            topic_data["Status"] = "Video Failed"
 
-            # Update workflow status callback AFTER everything is complete
+            # Update workflow status for video failure
             if workflow_id and hasattr(self, 'status_callback'):
-                self.status_callback(workflow_id, "Completed")
-                logger.info(f"✅ Full pipeline completed for workflow: {workflow_id}")
+                self.status_callback(workflow_id, "Video Failed")
+                logger.info(f"⚠️ Video generation failed for workflow: {workflow_id}")
 
-            logger.info(f"🎉 Full pipeline completed for topic: {topic_data.get('Title', 'Unknown')}")
+        topic_data["UpdatedAt"] = datetime.now().isoformat()
+        self.update_generated_content(topic_data)
+        return True
 
-            return {
-                "success": True,
-                "topic_data": topic_data,
-                "message": f"Successfully completed full pipeline for topic: {topic_data.get('Title', 'Unknown')}"
-            }
+    def run_upload_stage(self, ctx: Dict) -> bool:
+        """☁️ Stage 5: local copy, wait for Drive uploads, mark completed"""
+        topic_data = ctx["topic_data"]
+        workflow_id = topic_data.get('WorkflowID')
 
+        # Step 5: Copy to local storage (Drive uploads were queued by each stage)
+        try:
+            self.copy_files_to_local_storage(topic_data, ctx["audio_url"], ctx["image_urls"], topic_data.get("VideoFileLink", ""))
         except Exception as e:
-            logger.error(f"❌ Full pipeline failed for topic {topic_data.get('Title', 'Unknown')}: {e}")
+            logger.warning(f"⚠️ Local storage copy failed: {e}")
+
+        # Give queued uploads a bounded window so the final row/response carry Drive links
+        if self.drive_uploader:
+            upload_wait = float(os.getenv("DRIVE_UPLOAD_WAIT_SECONDS", "300"))
+            remaining = self.topic_deadline(topic_data).remaining()
+            if remaining is not None:
+                upload_wait = max(0.0, min(upload_wait, remaining))
+            if not self.drive_uploader.wait_for_topic(topic_data.get("TopicID", ""), timeout=upload_wait):
+                logger.warning("⚠️ Drive uploads still running; links will be updated when they finish")
+            self.apply_resolved_links(topic_data)
+
+        # Step 6: Mark as completed (Completed status)
+        logger.info("🎯 Step 6: Finalizing and marking as completed...")
+        # Gate completion on successful video production
+        video_ok = False
+        vf = topic_data.get("VideoFileLink", "")
+        try:
+            if isinstance(vf, str) and vf.strip():
+                if vf.startswith("http://") or vf.startswith("https://"):
+                    video_ok = True
+                elif os.path.exists(vf) and os.path.getsize(vf) > 0:
+                    video_ok = True
+        except Exception:
+            video_ok = False
 
-            # Update status to failed
-            topic_data["Status"] = "Failed"
-            topic_data["UpdatedAt"] = datetime.now().isoformat()
-            self.update_generated_content(topic_data)
+        if video_ok:
+            topic_data["Status"] = "Completed"
+            topic_data["CompletedAt"] = datetime.now().isoformat()
+        else:
+            logger.warning("⚠️ Video not confirmed; preserving previous failure status (not marking Completed)")
+        topic_data["UpdatedAt"] = datetime.now().isoformat()
 
-            return {
-                "success": False,
-                "topic_data": topic_data,
-                "error": str(e),
-                "message": f"Pipeline failed for topic: {topic_data.get('Title', 'Unknown')}"
-            }
+        self.update_generated_content(topic_data)
+        with self.resolved_links_lock:
+            self.resolved_links.pop(topic_data.get("TopicID", ""), None)
+        self.retention.record_status(ctx["topic_folder"], topic_data.get("Status", ""))
 
-    def process_webhook_request(self, headers: Dict, payload: Dict, workflow_id: str = None) -> tuple:
-        """🎯 MAIN WEBHOOK PROCESSOR (exact replica of n8n workflow)"""
-        try:
-            logger.info("🚀 Starting webhook processing...")
+        # Update workflow status callback AFTER everything is complete
+        if workflow_id and hasattr(self, 'status_callback'):
+            self.status_callback(workflow_id, "Completed")
+            logger.info(f"✅ Full pipeline completed for workflow: {workflow_id}")
 
-            # Step 1: Authentication check (exact from n8n workflow)
-            if not self.webhook_auth_check(headers):
-                return {
-                    "ok": False,
-                    "error": "Unauthorized - Invalid webhook secret"
-                }, 401
+        logger.info(f"🎉 Full pipeline completed for topic: {topic_data.get('Title', 'Unknown')}")
 
-            # Step 2: Initialize run (exact from n8n workflow)
-            run_data = self.init_run(payload)
-            logger.info(f"⚙️ Run initialized: {run_data['runId']}")
+        ctx["result"] = {
+            "success": True,
+            "topic_data": topic_data,
+            "message": f"Successfully completed full pipeline for topic: {topic_data.get('Title', 'Unknown')}"
+        }
+        return True
+
+    def resolve_execution_mode(self, payload: Dict) -> str:
+        """Per-request `execution_mode` (sequential | pipelined) overrides PIPELINE_MODE"""
+        mode = str(payload.get("execution_mode") or self.default_execution_mode).lower()
+        return mode if mode in ("sequential", "pipelined") else "sequential"
+
+    def get_stage_pipeline(self) -> StagePipeline:
+        """🏭 Shared stage pipeline; PIPELINE_<STAGE>_WORKERS sizes each stage's pool"""
+        with self.stage_pipeline_lock:
+            if self.stage_pipeline is None:
+                default_workers = {
+                    "script": 2,
+                    "audio": 2,
+                    "images": 2,
+                    "render": get_render_scheduler().max_concurrent,
+                    "upload": 4,
+                }
+                self.stage_pipeline = StagePipeline([
+                    (name, functools.partial(self.run_topic_stage, name, stage),
+                     int(os.getenv(f"PIPELINE_{name.upper()}_WORKERS", str(default_workers[name]))))
+                    for name, stage in self.topic_pipeline_stages()
+                ])
+            return self.stage_pipeline
+
+    def extract_request_topics(self, payload: Dict, run_data: Dict, workflow_id: str = None) -> List[Dict]:
+        """🧭 Steps 3-5: turn one submission into topics (direct script, prompt, or notes extraction)"""
+        # Determine input mode (notes | script | prompt)
+        input_type = str(payload.get("input_type", "notes")).lower()
+        logger.info(f"🔧 Input mode: {input_type}")
+
+        if input_type == "script":
+            # Direct Script/Story Mode: skip topic/script generation; use provided text directly
+            direct_script = payload.get("script_text") or payload.get("script")
+            if not direct_script or not str(direct_script).strip():
+                raise ValueError("Missing 'script_text' for input_type=script")
+
+            title = payload.get("title") or "User Script"
+            language = payload.get("language", "English")
+            tone = payload.get("tone", "Friendly")
+            voice_gender = payload.get("voice_gender", "Female")
+
+            # Build single topic using direct script
+            topic_id = unique_id("topic", 1)
+            topic = {
+                "TopicID": topic_id,
+                "Order": 1,
+                "Title": title,
+                "MainPointsText": "",
+                "MainPoints": [],
+                "TransitionNote": "",
+                "Language": language,
+                "Tone": tone,
+                "VoiceGender": voice_gender,
+                "Status": "Pending",
+                "RunID": run_data["runId"],
+                "TopicRunID": run_data["topicRunId"],
+                "FullPipeline": payload.get("full_pipeline", True),
+                "raw_notes": payload.get("raw_notes", ""),
+                "startTime": run_data["startTime"],
+                "runId": run_data["runId"],
+                "runTimestamp": run_data["runTimestamp"],
+                "platforms": payload.get("platforms", []),
+                "track": payload.get("track", ""),
+                "image_aspect_ratio": payload.get("image_aspect_ratio", "9:16"),
+                "image_width": payload.get("image_width", 1080),
+                "image_height": payload.get("image_height", 1920),
+                "Track": payload.get("track", ""),
+                "Platforms": payload.get("platforms", []),
+                "audioFolderId": self.audio_folder_id,
+                "imagesFolderId": self.images_folder_id,
+                "videosFolderId": self.videos_folder_id,
+                # Optional overrides
+                "AudioSpeakingRate": payload.get("audio_speaking_rate"),
+                # Pre-provide script to skip script generation step
+                "Script": str(direct_script).strip()
+            }
+            # Allow image prompts provided alongside script via payload
+            if isinstance(payload.get("image_prompts"), list):
+                topic["ImagePromptsJson"] = json.dumps(payload.get("image_prompts"))
+            elif isinstance(payload.get("ImagePromptsJson"), str):
+                topic["ImagePromptsJson"] = payload.get("ImagePromptsJson")
 
-            # Store workflow ID for status tracking
-            if workflow_id:
-                run_data['WorkflowID'] = workflow_id
+            topics = [topic]
 
-            # Determine input mode (notes | script | prompt)
-            input_type = str(payload.get("input_type", "notes")).lower()
-            logger.info(f"🔧 Input mode: {input_type}")
-
-            if input_type == "script":
-                # Direct Script/Story Mode: skip topic/script generation; use provided text directly
-                direct_script = payload.get("script_text") or payload.get("script")
-                if not direct_script or not str(direct_script).strip():
-                    return {
-                        "ok": False,
-                        "error": "Missing 'script_text' for input_type=script"
-                    }, 400
-
-                title = payload.get("title") or "User Script"
+            # Update status callback to indicate topics are ready
+            if workflow_id and hasattr(self, 'status_callback'):
+                self.status_callback(workflow_id, "Topics Extracted")
+                logger.info(f"✅ Direct script mode: created synthetic topic {topic_id}")
+
+            elif input_type == "prompt":
+                # FIX: Prompt Mode - skip topic extraction, use custom prompt for direct script generation
+                custom_prompt = payload.get("custom_prompt", "").strip()
+                context_notes = payload.get("context_notes", "").strip()
+                target_duration = payload.get("target_duration_seconds")
+                title = payload.get("title") or "Prompt Script"
                 language = payload.get("language", "English")
                 tone = payload.get("tone", "Friendly")
                 voice_gender = payload.get("voice_gender", "Female")
-
-                # Build single topic using direct script
-                topic_id = f"topic_{int(time.time())}_1"
+                topic_id = unique_id("topic", 1)
                 topic = {
                     "TopicID": topic_id,
                     "Order": 1,
@@ -2446,7 +3261,7 @@ Return ONLY the JSON, no other text."""
                     "RunID": run_data["runId"],
                     "TopicRunID": run_data["topicRunId"],
                     "FullPipeline": payload.get("full_pipeline", True),
-                    "raw_notes": payload.get("raw_notes", ""),
+                    "raw_notes": context_notes,
                     "startTime": run_data["startTime"],
                     "runId": run_data["runId"],
                     "runTimestamp": run_data["runTimestamp"],
@@ -2460,163 +3275,121 @@ Return ONLY the JSON, no other text."""
                     "audioFolderId": self.audio_folder_id,
                     "imagesFolderId": self.images_folder_id,
                     "videosFolderId": self.videos_folder_id,
-                    # Optional overrides
                     "AudioSpeakingRate": payload.get("audio_speaking_rate"),
-                    # Pre-provide script to skip script generation step
-                    "Script": str(direct_script).strip()
+                    "InputType": "prompt",
+                    "CustomPrompt": custom_prompt,
+                    "TargetDurationSeconds": target_duration
                 }
-                # Allow image prompts provided alongside script via payload
+                # Generate script using Gemini directly
+                script_prompt = self.create_script_generation_prompt(topic)
+                script_response = self.gemini_script_generation(script_prompt, topic)
+                topic = self.parse_script_response(script_response, topic)
+                # Allow image prompts provided alongside prompt via payload
                 if isinstance(payload.get("image_prompts"), list):
                     topic["ImagePromptsJson"] = json.dumps(payload.get("image_prompts"))
                 elif isinstance(payload.get("ImagePromptsJson"), str):
                     topic["ImagePromptsJson"] = payload.get("ImagePromptsJson")
-
                 topics = [topic]
-
                 # Update status callback to indicate topics are ready
                 if workflow_id and hasattr(self, 'status_callback'):
                     self.status_callback(workflow_id, "Topics Extracted")
-                    logger.info(f"✅ Direct script mode: created synthetic topic {topic_id}")
-
-                elif input_type == "prompt":
-                    # FIX: Prompt Mode - skip topic extraction, use custom prompt for direct script generation
-                    custom_prompt = payload.get("custom_prompt", "").strip()
-                    context_notes = payload.get("context_notes", "").strip()
-                    target_duration = payload.get("target_duration_seconds")
-                    title = payload.get("title") or "Prompt Script"
-                    language = payload.get("language", "English")
-                    tone = payload.get("tone", "Friendly")
-                    voice_gender = payload.get("voice_gender", "Female")
-                    topic_id = f"topic_{int(time.time())}_1"
-                    topic = {
-                        "TopicID": topic_id,
-                        "Order": 1,
-                        "Title": title,
-                        "MainPointsText": "",
-                        "MainPoints": [],
-                        "TransitionNote": "",
-                        "Language": language,
-                        "Tone": tone,
-                        "VoiceGender": voice_gender,
-                        "Status": "Pending",
-                        "RunID": run_data["runId"],
-                        "TopicRunID": run_data["topicRunId"],
-                        "FullPipeline": payload.get("full_pipeline", True),
-                        "raw_notes": context_notes,
-                        "startTime": run_data["startTime"],
-                        "runId": run_data["runId"],
-                        "runTimestamp": run_data["runTimestamp"],
-                        "platforms": payload.get("platforms", []),
-                        "track": payload.get("track", ""),
-                        "image_aspect_ratio": payload.get("image_aspect_ratio", "9:16"),
-                        "image_width": payload.get("image_width", 1080),
-                        "image_height": payload.get("image_height", 1920),
-                        "Track": payload.get("track", ""),
-                        "Platforms": payload.get("platforms", []),
-                        "audioFolderId": self.audio_folder_id,
-                        "imagesFolderId": self.images_folder_id,
-                        "videosFolderId": self.videos_folder_id,
-                        "AudioSpeakingRate": payload.get("audio_speaking_rate"),
-                        "InputType": "prompt",
-                        "CustomPrompt": custom_prompt,
-                        "TargetDurationSeconds": target_duration
-                    }
-                    # Generate script using Gemini directly
-                    script_prompt = self.create_script_generation_prompt(topic)
-                    script_response = self.gemini_script_generation(script_prompt, topic)
-                    topic = self.parse_script_response(script_response, topic)
-                    # Allow image prompts provided alongside prompt via payload
-                    if isinstance(payload.get("image_prompts"), list):
-                        topic["ImagePromptsJson"] = json.dumps(payload.get("image_prompts"))
-                    elif isinstance(payload.get("ImagePromptsJson"), str):
-                        topic["ImagePromptsJson"] = payload.get("ImagePromptsJson")
-                    topics = [topic]
-                    # Update status callback to indicate topics are ready
-                    if workflow_id and hasattr(self, 'status_callback'):
-                        self.status_callback(workflow_id, "Topics Extracted")
-                        logger.info(f"✅ Prompt mode: created synthetic topic {topic_id}")
+                    logger.info(f"✅ Prompt mode: created synthetic topic {topic_id}")
+        else:
+            # Notes or Custom Prompt mode → perform topic extraction via LLM
+            if input_type == "prompt":
+                topic_prompt = payload.get("custom_prompt") or self.create_topic_extraction_prompt(payload)
+                logger.info("📝 Using custom prompt for topic extraction")
             else:
-                # Notes or Custom Prompt mode → perform topic extraction via LLM
-                if input_type == "prompt":
-                    topic_prompt = payload.get("custom_prompt") or self.create_topic_extraction_prompt(payload)
-                    logger.info("📝 Using custom prompt for topic extraction")
-                else:
-                    # Default notes mode
-                    topic_prompt = self.create_topic_extraction_prompt(payload)
+                # Default notes mode
+                topic_prompt = self.create_topic_extraction_prompt(payload)
 
-                # Update status for topic extraction start
-                if workflow_id and hasattr(self, 'status_callback'):
-                    self.status_callback(workflow_id, "Extracting Topics")
-                    logger.info(f"🎯 Starting topic extraction for workflow: {workflow_id}")
+            # Update status for topic extraction start
+            if workflow_id and hasattr(self, 'status_callback'):
+                self.status_callback(workflow_id, "Extracting Topics")
+                logger.info(f"🎯 Starting topic extraction for workflow: {workflow_id}")
 
-                # Gemini topic extraction and parsing
+            # Gemini topic extraction and parsing
+            if input_type != "prompt" and self.should_chunk_topic_extraction(payload):
+                topics = self.extract_topics_chunked(payload, run_data)
+            else:
                 gemini_response = self.gemini_topic_extraction(topic_prompt, run_data)
                 topics = self.parse_topics(gemini_response, run_data)
 
-                # Update status after topic extraction is complete
-                if workflow_id and hasattr(self, 'status_callback'):
-                    self.status_callback(workflow_id, "Topics Extracted")
-                    logger.info(f"✅ Topic extraction completed for workflow: {workflow_id} - {len(topics)} topics found")
+            # Update status after topic extraction is complete
+            if workflow_id and hasattr(self, 'status_callback'):
+                self.status_callback(workflow_id, "Topics Extracted")
+                logger.info(f"✅ Topic extraction completed for workflow: {workflow_id} - {len(topics)} topics found")
 
-            
-            # Step 6: Insert topics to EssentialContent (updated for fresh schema)
-            backlog_success = self.insert_topics_to_essential_content(topics)
+        return topics
 
-            if not backlog_success:
-                raise Exception("Failed to insert topics to EssentialContent")
+    def process_webhook_request(self, headers: Dict, payload: Dict, workflow_id: str = None) -> tuple:
+        """🎯 MAIN WEBHOOK PROCESSOR (exact replica of n8n workflow)"""
+        try:
+            logger.info("🚀 Starting webhook processing...")
 
-            # Step 7: Process full pipeline for each topic (if full_pipeline is True)
-            if payload.get("full_pipeline", True):
-                logger.info("🎬 Starting full pipeline processing...")
+            # Step 1: Authentication check (exact from n8n workflow)
+            if not self.webhook_auth_check(headers):
+                return {
+                    "ok": False,
+                    "error": "Unauthorized - Invalid webhook secret"
+                }, 401
 
-                # Process topics based on payload (dynamic generation)
-                processed_topics = []
-                topics_to_process = len(topics)
-                logger.info(f"🎯 Processing {topics_to_process} topics from payload")
+            # Step 2: Initialize run (exact from n8n workflow)
+            run_data = self.init_run(payload)
+            logger.info(f"⚙️ Run initialized: {run_data['runId']}")
+            run_data["DeadlineAt"] = Deadline.from_payload(payload).expires_at
 
-                for i, topic in enumerate(topics, 1):
-                    logger.info(f"🎯 Processing topic {i}/{topics_to_process}: {topic.get('Title', 'Unknown')}")
+            # Determine input mode (notes | script | prompt); a bad request is never journaled
+            input_type = str(payload.get("input_type", "notes")).lower()
+            if input_type == "script" and not str(payload.get("script_text") or payload.get("script") or "").strip():
+                return {
+                    "ok": False,
+                    "error": "Missing 'script_text' for input_type=script"
+                }, 400
 
-                    # Pass workflow ID to topic for status tracking
-                    if 'WorkflowID' in run_data:
-                        topic['WorkflowID'] = run_data['WorkflowID']
+            # Store workflow ID for status tracking
+            if workflow_id:
+                run_data['WorkflowID'] = workflow_id
+                # Journal the request so a crash mid-run can be resumed
+                self.checkpoints.begin(workflow_id, payload)
+            Deadline(run_data["DeadlineAt"]).check("topic extraction", self.STAGE_MIN_SECONDS["extract"])
+            topics = self.extract_request_topics(payload, run_data, workflow_id)
+            self.cancellation.check(workflow_id)
 
-                    # Process topic through full pipeline
-                    result = self.process_single_topic_full_pipeline(topic)
-                    processed_topics.append(result)
+            # Step 6: Insert topics to EssentialContent (updated for fresh schema)
+            backlog_success = self.insert_topics_to_essential_content(topics)
 
-                logger.info(f"✅ All {topics_to_process} topics processing completed")
+            if not backlog_success:
+                raise Exception("Failed to insert topics to EssentialContent")
+            if workflow_id:
+                self.checkpoints.record_topics(workflow_id, run_data, topics)
 
-                # Success response with full pipeline results
-                response = {
-                    "ok": True,
-                    "message": f"Successfully processed {len(topics)} topics through full pipeline",
-                    "runId": run_data["runId"],
-                    "topicRunId": run_data["topicRunId"],
-                    "topicsCount": len(topics),
-                    "topics": [{"TopicID": t["TopicID"], "Title": t["Title"], "Status": "Completed"} for t in topics],
-                    "processed_results": processed_topics,
-                    "timestamp": datetime.now().isoformat(),
-                    "full_pipeline": True
-                }
+            # Step 7: Process full pipeline for each topic (if full_pipeline is True)
+            if payload.get("full_pipeline", True):
+                processed_topics = self.process_topics(topics, run_data, payload)
+                response = self.build_pipeline_response(run_data, topics, processed_topics)
             else:
-                # Success response for topic extraction only
-                response = {
-                    "ok": True,
-                    "message": f"Successfully extracted {len(topics)} topics and added to backlog",
-                    "runId": run_data["runId"],
-                    "topicRunId": run_data["topicRunId"],
-                    "topicsCount": len(topics),
-                    "topics": [{"TopicID": t["TopicID"], "Title": t["Title"], "Status": "Pending"} for t in topics],
-                    "timestamp": datetime.now().isoformat(),
-                    "full_pipeline": False
-                }
+                response = self.build_backlog_response(run_data, topics)
 
             logger.info("🎉 Webhook processing completed successfully")
+            if workflow_id:
+                self.end_workflow(workflow_id)
             return response, 200
 
+        except WorkflowCancelled:
+            self.end_workflow(workflow_id)
+            return self.cancelled_response(workflow_id), 409
+
+        except DeadlineExceeded as e:
+            logger.error(f"⏱️ Webhook processing stopped: {e}")
+            if workflow_id:
+                self.end_workflow(workflow_id)
+            return self.deadline_response(e), 504
+
         except Exception as e:
             logger.error(f"❌ Webhook processing failed: {e}")
+            if workflow_id:
+                self.end_workflow(workflow_id)
 
             # Error response (exact from n8n workflow)
             error_response = {
@@ -2627,6 +3400,229 @@ Return ONLY the JSON, no other text."""
 
             return error_response, 500
 
+    def process_topics(self, topics: List[Dict], run_data: Dict, payload: Dict) -> List[Dict]:
+        """🎬 Run the full pipeline for every topic (sequential or stage-pipelined)"""
+        logger.info("🎬 Starting full pipeline processing...")
+
+        # Process topics based on payload (dynamic generation)
+        processed_topics = []
+        topics_to_process = len(topics)
+        execution_mode = self.resolve_execution_mode(payload)
+        logger.info(f"🎯 Processing {topics_to_process} topics from payload ({execution_mode})")
+
+        for topic in topics:
+            # Pass workflow ID to topic for status tracking
+            if 'WorkflowID' in run_data:
+                topic['WorkflowID'] = run_data['WorkflowID']
+            # Which artifact types go to Drive for this request
+            topic['UploadTypes'] = self.resolve_upload_types(payload)
+            # Scheduling lane for stage queues and render slots
+            topic['Priority'] = resolve_priority(payload)
+            # End-to-end budget every stage derives its timeouts from
+            topic['DeadlineAt'] = run_data.get('DeadlineAt')
+
+        if execution_mode == "pipelined":
+            # Topics flow between per-stage pools: topic 2 scripts while topic 1 renders
+            contexts = [self.begin_topic_pipeline(topic) for topic in topics]
+            processed_topics = self.get_stage_pipeline().run(contexts, self.finish_topic_pipeline,
+                                                             priority=resolve_priority(payload),
+                                                             fair_key=payload.get("fair_key") or resolve_fair_key(payload))
+        else:
+            for i, topic in enumerate(topics, 1):
+                logger.info(f"🎯 Processing topic {i}/{topics_to_process}: {topic.get('Title', 'Unknown')}")
+
+                # Process topic through full pipeline
+                result = self.process_single_topic_full_pipeline(topic)
+                processed_topics.append(result)
+
+        logger.info(f"✅ All {topics_to_process} topics processing completed")
+        # Topics stop at their next stage boundary; surface the cancel once they have all drained
+        self.cancellation.check(run_data.get("WorkflowID"))
+        return processed_topics
+
+    def end_workflow(self, workflow_id: Optional[str]):
+        """A workflow reached a final state: drop its checkpoint and cancel flag"""
+        self.checkpoints.finish(workflow_id)
+        self.cancellation.clear(workflow_id)
+
+    def cancelled_response(self, workflow_id: str) -> Dict:
+        return {"ok": False, "cancelled": True, "error": "Workflow cancelled", "timestamp": datetime.now().isoformat()}
+
+    def deadline_response(self, error: Exception) -> Dict:
+        return {"ok": False, "deadline_exceeded": True, "error": str(error), "timestamp": datetime.now().isoformat()}
+
+    def cancel_workflow(self, workflow_id: str) -> Dict:
+        """🛑 Cancel a running workflow
+
+        No further stages, image slots or retries start, any render it is waiting for
+        is dropped and its running FFmpeg is killed. A provider request already on the
+        wire finishes (bounded by its timeout) but its result is discarded.
+        """
+        self.cancellation.cancel(workflow_id)
+        killed = get_render_scheduler().cancel(workflow_id)
+        return {"workflow_id": workflow_id, "renders_killed": killed}
+
+    def build_pipeline_response(self, run_data: Dict, topics: List[Dict], processed_topics: List[Dict]) -> Dict:
+        """Success response with full pipeline results"""
+        return {
+            "ok": True,
+            "message": f"Successfully processed {len(topics)} topics through full pipeline",
+            "runId": run_data["runId"],
+            "topicRunId": run_data["topicRunId"],
+            "topicsCount": len(topics),
+            "topics": [{"TopicID": t["TopicID"], "Title": t["Title"], "Status": "Completed"} for t in topics],
+            "processed_results": processed_topics,
+            "timestamp": datetime.now().isoformat(),
+            "full_pipeline": True
+        }
+
+    def build_backlog_response(self, run_data: Dict, topics: List[Dict]) -> Dict:
+        """Success response for topic extraction only"""
+        return {
+            "ok": True,
+            "message": f"Successfully extracted {len(topics)} topics and added to backlog",
+            "runId": run_data["runId"],
+            "topicRunId": run_data["topicRunId"],
+            "topicsCount": len(topics),
+            "topics": [{"TopicID": t["TopicID"], "Title": t["Title"], "Status": "Pending"} for t in topics],
+            "timestamp": datetime.now().isoformat(),
+            "full_pipeline": False
+        }
+
+    def finish_batch_item(self, workflow_id: str, response: Dict, status_code: int, on_item_done=None):
+        """A batch item reached a final state: clean up and report it through `on_item_done`"""
+        self.end_workflow(workflow_id)
+        if on_item_done:
+            try:
+                on_item_done(workflow_id, response, status_code)
+            except Exception as e:
+                logger.warning(f"⚠️ Batch item callback failed for {workflow_id}: {e}")
+
+    def fail_batch_item(self, workflow_id: str, error: Exception, on_item_done=None):
+        if isinstance(error, WorkflowCancelled):
+            self.finish_batch_item(workflow_id, self.cancelled_response(workflow_id), 409, on_item_done)
+            return
+        if isinstance(error, DeadlineExceeded):
+            self.finish_batch_item(workflow_id, self.deadline_response(error), 504, on_item_done)
+            return
+        logger.error(f"❌ Batch item {workflow_id} failed: {error}")
+        self.finish_batch_item(workflow_id, {"ok": False, "error": str(error), "timestamp": datetime.now().isoformat()},
+                               500, on_item_done)
+
+    def prepare_batch_request(self, headers: Dict, items: List[Dict], on_item_done=None) -> List[tuple]:
+        """📦 Shared first half of a batch: `items` = [{"workflow_id": ..., "payload": {...}}]
+
+        Topic extraction runs in parallel across items and every item's topics go to
+        EssentialContent in a single schema check + append. Returns the ready items as
+        (item, run_data, topics) for `process_batch_item`, which callers schedule as
+        separate jobs. Items that fail here are reported through
+        `on_item_done(workflow_id, response, status_code)` and left out.
+        """
+        if not self.webhook_auth_check(headers):
+            for item in items:
+                self.finish_batch_item(item["workflow_id"], {"ok": False, "error": "Unauthorized - Invalid webhook secret"},
+                                       401, on_item_done)
+            return []
+
+        # Step 1: topics for every item (LLM extraction is the slow, parallel part)
+        def prepare(item: Dict) -> tuple:
+            workflow_id, payload = item["workflow_id"], item["payload"]
+            self.cancellation.check(workflow_id)
+            run_data = self.init_run(payload)
+            run_data["WorkflowID"] = workflow_id
+            run_data["DeadlineAt"] = Deadline.from_payload(payload).expires_at
+            self.checkpoints.begin(workflow_id, payload)
+            Deadline(run_data["DeadlineAt"]).check("topic extraction", self.STAGE_MIN_SECONDS["extract"])
+            topics = self.extract_request_topics(payload, run_data, workflow_id)
+            self.cancellation.check(workflow_id)
+            return run_data, topics
+
+        prepared = []
+        workers = max(1, min(len(items), int(os.getenv("BATCH_PREPARE_WORKERS", "4"))))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch-prepare") as pool:
+            futures = [(item, pool.submit(prepare, item)) for item in items]
+            for item, future in futures:
+                try:
+                    run_data, topics = future.result()
+                    prepared.append((item, run_data, topics))
+                except Exception as e:
+                    self.fail_batch_item(item["workflow_id"], e, on_item_done)
+
+        # Step 2: one EssentialContent insert for the whole batch
+        all_topics = [topic for _, _, topics in prepared for topic in topics]
+        if all_topics and not self.insert_topics_to_essential_content(all_topics):
+            for item, _, _ in prepared:
+                self.fail_batch_item(item["workflow_id"], Exception("Failed to insert topics to EssentialContent"), on_item_done)
+            return []
+        for item, run_data, topics in prepared:
+            self.checkpoints.record_topics(item["workflow_id"], run_data, topics)
+        logger.info(f"📦 Batch: {len(prepared)}/{len(items)} item(s) ready, {len(all_topics)} topic(s) inserted in one append")
+        return prepared
+
+    def process_batch_item(self, entry: tuple, on_item_done=None) -> int:
+        """📦 Run one prepared batch item like a normal workflow; returns its status code"""
+        item, run_data, topics = entry
+        workflow_id, payload = item["workflow_id"], item["payload"]
+        try:
+            # Cancelled while it waited for a worker
+            self.cancellation.check(workflow_id)
+            if payload.get("full_pipeline", True):
+                processed_topics = self.process_topics(topics, run_data, payload)
+                response = self.build_pipeline_response(run_data, topics, processed_topics)
+            else:
+                response = self.build_backlog_response(run_data, topics)
+            self.finish_batch_item(workflow_id, response, 200, on_item_done)
+            return 200
+        except Exception as e:
+            self.fail_batch_item(workflow_id, e, on_item_done)
+            return 409 if isinstance(e, WorkflowCancelled) else 504 if isinstance(e, DeadlineExceeded) else 500
+
+    def resume_workflow(self, checkpoint: Dict) -> tuple:
+        """💾 Continue a workflow from its checkpoint after a crash or restart
+
+        Before topics were inserted the request is simply replayed. After that,
+        topics that already finished are left alone and the rest re-enter the
+        pipeline, where the artifact manifest skips every completed stage.
+        """
+        workflow_id = checkpoint["workflow_id"]
+        payload = checkpoint.get("payload") or {}
+        logger.info(f"💾 Resuming workflow {workflow_id} from phase '{checkpoint.get('phase')}'")
+
+        if checkpoint.get("phase") != "topics_inserted":
+            # The original request already passed authentication
+            return self.process_webhook_request({"X-Webhook-Secret": self.webhook_secret}, payload, workflow_id)
+
+        try:
+            run_data = dict(checkpoint.get("run_data") or {})
+            run_data["WorkflowID"] = workflow_id
+            topics = checkpoint.get("topics") or []
+            finished = checkpoint.get("topic_results") or {}
+            remaining = [t for t in topics if t.get("TopicID") not in finished]
+            logger.info(f"💾 {len(finished)} topic(s) already finished, {len(remaining)} to resume")
+
+            if payload.get("full_pipeline", True):
+                processed_topics = self.process_topics(remaining, run_data, payload)
+                response = self.build_pipeline_response(run_data, topics, processed_topics)
+            else:
+                response = self.build_backlog_response(run_data, topics)
+            response["resumed"] = True
+            self.end_workflow(workflow_id)
+            return response, 200
+
+        except WorkflowCancelled:
+            self.end_workflow(workflow_id)
+            return {**self.cancelled_response(workflow_id), "resumed": True}, 409
+
+        except DeadlineExceeded as e:
+            logger.error(f"⏱️ Resumed workflow {workflow_id} stopped: {e}")
+            self.end_workflow(workflow_id)
+            return {**self.deadline_response(e), "resumed": True}, 504
+
+        except Exception as e:
+            logger.error(f"❌ Resumed workflow {workflow_id} failed: {e}")
+            self.end_workflow(workflow_id)
+            return {"ok": False, "error": str(e), "resumed": True, "timestamp": datetime.now().isoformat()}, 500
+
 # Global workflow instance
 complete_workflow_engine = CompleteWorkflowEngine()
 
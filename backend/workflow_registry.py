@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+🗂️ WORKFLOW REGISTRY
+Bounded workflow/batch status records: compact entries, TTL + size eviction, optional shared SQLite store
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+import logging
+from typing import Dict, List, Any, Optional
+
+from backend.status_events import TERMINAL_STATUSES
+
+logger = logging.getLogger(__name__)
+
+# Payload fields worth keeping for status pages; notes/scripts and secrets are dropped
+_PAYLOAD_SUMMARY_FIELDS = ("input_type", "track_name", "track", "language", "tone", "voice_gender", "platforms",
+                           "posts_per_day", "priority", "execution_mode", "extraction_mode", "full_pipeline",
+                           "deadline_seconds", "deadline_at", "topic_id")
+
+# Per-topic fields kept from a pipeline result
+_TOPIC_SUMMARY_FIELDS = ("TopicID", "Title", "Status", "AudioFileLink", "VideoFileLink")
+
+
+def summarize_payload(payload: Optional[Dict]) -> Dict[str, Any]:
+    """Small, secret-free view of a submission"""
+    if not isinstance(payload, dict):
+        return {}
+    summary = {k: payload[k] for k in _PAYLOAD_SUMMARY_FIELDS if payload.get(k) is not None}
+    for field in ("raw_notes", "script_text", "script", "custom_prompt"):
+        if payload.get(field):
+            summary["input_chars"] = len(str(payload[field]))
+            break
+    return summary
+
+
+def summarize_response(response: Any) -> Any:
+    """A workflow response without per-topic row data (topic_data, full processed results)"""
+    if not isinstance(response, dict):
+        return response
+    summary = {k: v for k, v in response.items() if k not in ("processed_results", "topic_data")}
+    if isinstance(response.get("processed_results"), list):
+        summary["processed_results"] = [
+            {
+                **{k: (r.get("topic_data") or {}).get(k) for k in _TOPIC_SUMMARY_FIELDS},
+                "success": r.get("success"),
+                "error": r.get("error"),
+            }
+            for r in response["processed_results"] if isinstance(r, dict)
+        ]
+    return summary
+
+
+class _MemoryStore:
+    """Process-local entries"""
+
+    def __init__(self):
+        self._entries: Dict[str, Dict[str, Any]] = {}
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        return json.loads(json.dumps(entry, default=str)) if entry is not None else None
+
+    def put(self, key: str, entry: Dict[str, Any]):
+        self._entries[key] = json.loads(json.dumps(entry, default=str))
+
+    def delete(self, keys: List[str]):
+        for key in keys:
+            self._entries.pop(key, None)
+
+    def finished(self) -> List[tuple]:
+        """(finished_at, key) for every finished entry"""
+        return [(e["_finished_at"], k) for k, e in self._entries.items() if e.get("_finished_at")]
+
+    def unfinished(self) -> List[tuple]:
+        """(key, entry) for every in-flight entry"""
+        return [(k, self.get(k)) for k, e in list(self._entries.items()) if not e.get("_finished_at")]
+
+    def count(self) -> int:
+        return len(self._entries)
+
+
+class _SqliteStore:
+    """Entries in a SQLite file, shared by every server process on the host"""
+
+    def __init__(self, path: str, table: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.table = table
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"CREATE TABLE IF NOT EXISTS {table} "
+                           "(key TEXT PRIMARY KEY, finished_at REAL, data TEXT NOT NULL)")
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_finished ON {table} (finished_at)")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute(f"SELECT data FROM {self.table} WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: str, entry: Dict[str, Any]):
+        self._conn.execute(f"INSERT OR REPLACE INTO {self.table} (key, finished_at, data) VALUES (?, ?, ?)",
+                           (key, entry.get("_finished_at"), json.dumps(entry, default=str)))
+
+    def delete(self, keys: List[str]):
+        self._conn.executemany(f"DELETE FROM {self.table} WHERE key = ?", [(k,) for k in keys])
+
+    def finished(self) -> List[tuple]:
+        return self._conn.execute(f"SELECT finished_at, key FROM {self.table} WHERE finished_at IS NOT NULL").fetchall()
+
+    def unfinished(self) -> List[tuple]:
+        rows = self._conn.execute(f"SELECT key, data FROM {self.table} WHERE finished_at IS NULL").fetchall()
+        return [(key, json.loads(data)) for key, data in rows]
+
+    def count(self) -> int:
+        return self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def transaction(self):
+        return _SqliteTransaction(self._conn)
+
+
+class _SqliteTransaction:
+    """BEGIN IMMEDIATE ... COMMIT, so read-modify-write is atomic across processes"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+
+    def __enter__(self):
+        self._conn.execute("BEGIN IMMEDIATE")
+
+    def __exit__(self, exc_type, exc, tb):
+        self._conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+class _NoTransaction:
+    """The in-memory store is already guarded by the registry lock"""
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+class WorkflowRegistry:
+    """🗂️ Status records for workflows (or batches), keyed by ID
+
+    Entries are copies: change them through `update()`, never in place. Payloads
+    and responses are stored as summaries. Finished entries are evicted
+    `ttl_seconds` after they finish, and the oldest finished ones go first when
+    more than `max_entries` are held; in-flight entries are never evicted.
+    With `db_path` (WORKFLOW_REGISTRY_DB) entries live in SQLite so several
+    server processes on one host see the same workflows; a process that doesn't
+    own a workflow asks its owner to cancel it through the store
+    (`cancel_requested`, picked up by `watch_cancel_requests`).
+    """
+
+    def __init__(self, kind: str = "workflows", ttl_seconds: Optional[float] = None,
+                 max_entries: Optional[int] = None, db_path: Optional[str] = None):
+        self.kind = kind
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.getenv("WORKFLOW_REGISTRY_TTL_SECONDS", "21600"))
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv("WORKFLOW_REGISTRY_MAX_ENTRIES", "1000"))
+        db_path = db_path if db_path is not None else os.getenv("WORKFLOW_REGISTRY_DB", "")
+        self._lock = threading.Lock()
+        self._store = _SqliteStore(db_path, kind) if db_path else _MemoryStore()
+        self._last_sweep = 0.0
+        self._cancel_watcher = None
+        self.stats = {"evicted_ttl": 0, "evicted_size": 0}
+        if db_path:
+            logger.info(f"🗂️ {kind.title()} registry shared via {db_path}")
+
+    @property
+    def shared(self) -> bool:
+        """True when other processes see (and may change) these entries"""
+        return isinstance(self._store, _SqliteStore)
+
+    def _transaction(self):
+        if isinstance(self._store, _SqliteStore):
+            return self._store.transaction()
+        return _NoTransaction()
+
+    @staticmethod
+    def _compact(fields: Dict[str, Any]) -> Dict[str, Any]:
+        if "payload" in fields:
+            fields["payload"] = summarize_payload(fields["payload"])
+        if "response" in fields:
+            fields["response"] = summarize_response(fields["response"])
+        return fields
+
+    @staticmethod
+    def _public(entry: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if entry is None:
+            return None
+        return {k: v for k, v in entry.items() if not k.startswith("_")}
+
+    # ------------------------------------------------------------------
+    # Entries
+    # ------------------------------------------------------------------
+    def create(self, key: str, status: str, **fields) -> Dict[str, Any]:
+        entry = {"status": status, "started_at": time.strftime("%Y-%m-%d %H:%M:%S"), **self._compact(fields)}
+        if status in TERMINAL_STATUSES:
+            entry["_finished_at"] = time.time()
+        with self._lock, self._transaction():
+            self._store.put(key, entry)
+        self.evict()
+        return self._public(entry)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._public(self._store.get(key))
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def update(self, key: str, details: Optional[Dict[str, Any]] = None, **fields) -> Optional[Dict[str, Any]]:
+        """Set `fields` and merge `details`; returns the updated entry, or None if unknown/evicted"""
+        with self._lock, self._transaction():
+            entry = self._store.get(key)
+            if entry is None:
+                return None
+            entry.update(self._compact(fields))
+            if details:
+                entry.setdefault("details", {}).update(details)
+            if entry.get("status") in TERMINAL_STATUSES:
+                entry.setdefault("_finished_at", time.time())
+            else:
+                entry.pop("_finished_at", None)
+            self._store.put(key, entry)
+        return self._public(entry)
+
+    def remove(self, key: str):
+        with self._lock, self._transaction():
+            self._store.delete([key])
+
+    # ------------------------------------------------------------------
+    # Cross-process cancellation
+    # ------------------------------------------------------------------
+    def watch_cancel_requests(self, owner: Any, on_cancel, interval: Optional[float] = None):
+        """Call `on_cancel(key)` once for each in-flight entry owned by `owner` that another
+        process flagged `cancel_requested` (idempotent; polls every `interval` seconds)"""
+        if self._cancel_watcher and self._cancel_watcher.is_alive():
+            return
+        interval = interval if interval is not None else float(os.getenv("WORKFLOW_CANCEL_POLL_SECONDS", "2"))
+
+        def watch():
+            handled = set()
+            while True:
+                time.sleep(interval)
+                try:
+                    with self._lock:
+                        in_flight = self._store.unfinished()
+                    requested = {k for k, e in in_flight if e.get("owner") == owner and e.get("cancel_requested")}
+                    for key in requested - handled:
+                        try:
+                            on_cancel(key)
+                        except Exception as e:
+                            logger.warning(f"⚠️ Cancel request for {key} failed: {e}")
+                    handled = requested
+                except Exception as e:
+                    logger.warning(f"⚠️ Could not poll {self.kind} cancel requests: {e}")
+
+        self._cancel_watcher = threading.Thread(target=watch, name=f"{self.kind}-cancel-watcher", daemon=True)
+        self._cancel_watcher.start()
+
+    # ------------------------------------------------------------------
+    # Eviction
+    # ------------------------------------------------------------------
+    def evict(self, force: bool = False) -> int:
+        """Drop expired finished entries, then the oldest finished ones over `max_entries`"""
+        now = time.time()
+        with self._lock:
+            # Sweep at most every 30s unless the cap is exceeded
+            over = self.max_entries and self._store.count() > self.max_entries
+            if not force and not over and now - self._last_sweep < 30:
+                return 0
+            self._last_sweep = now
+            with self._transaction():
+                finished = sorted(self._store.finished())
+                expired = [k for at, k in finished if self.ttl_seconds and now - at > self.ttl_seconds]
+                oversize = []
+                if self.max_entries:
+                    excess = self._store.count() - len(expired) - self.max_entries
+                    if excess > 0:
+                        expired_keys = set(expired)
+                        oversize = [k for _, k in finished if k not in expired_keys][:excess]
+                if expired or oversize:
+                    self._store.delete(expired + oversize)
+            self.stats["evicted_ttl"] += len(expired)
+            self.stats["evicted_size"] += len(oversize)
+        if expired or oversize:
+            logger.info(f"🗂️ Evicted {len(expired) + len(oversize)} finished {self.kind} "
+                        f"({len(expired)} expired, {len(oversize)} over the {self.max_entries} cap)")
+        return len(expired) + len(oversize)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._store.count()
+            finished = len(self._store.finished())
+        return {
+            "backend": "sqlite" if isinstance(self._store, _SqliteStore) else "memory",
+            "entries": entries,
+            "in_flight": entries - finished,
+            "finished": finished,
+            "ttl_seconds": self.ttl_seconds,
+            "max_entries": self.max_entries,
+            **self.stats,
+        }
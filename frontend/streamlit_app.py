@@ -734,6 +734,9 @@ with st.sidebar:
 # -------- Real-Time Status Tracker --------
 st.subheader("📊 Live Workflow Status Tracker")
 
+# Set while an active workflow is being watched; the page long-polls for its next change at the end
+watch_workflow = None
+
 # Auto-tracking current workflow if available
 if 'current_workflow_id' in st.session_state:
     st.info(f"🔄 Auto-tracking active workflow: {st.session_state.current_workflow_id}")
@@ -750,7 +753,9 @@ if 'current_workflow_id' in st.session_state:
             # Progress bar with detailed status
             col1, col2 = st.columns([3, 1])
             with col1:
-                if current_status == 'Processing':
+                if current_status == 'Queued':
+                    st.progress(0.02, "🎟️ Waiting for a worker...")
+                elif current_status == 'Processing':
                     st.progress(0.05, "🚀 Workflow started - Initializing...")
                 elif current_status == 'Extracting Topics':
                     st.progress(0.15, "🧠 Extracting topics from raw notes...")
@@ -762,6 +767,12 @@ if 'current_workflow_id' in st.session_state:
                     st.progress(0.6, "🎵 Audio files created with voice synthesis")
                 elif current_status == 'Images Generated':
                     st.progress(0.8, "🖼️ Images generated for visual content")
+                elif current_status == 'Render Queued':
+                    position = status_data.get('details', {}).get('render_queue_position')
+                    st.progress(0.82, f"⏳ Waiting for a render slot (position {position})")
+                elif current_status == 'Rendering':
+                    waited = status_data.get('details', {}).get('render_queue_wait_seconds', 0)
+                    st.progress(0.88, f"🎬 Rendering video (waited {waited}s in queue)")
                 elif current_status == 'Video Generated':
                     st.progress(0.95, "🎬 Videos created with audio integration")
                 elif current_status == 'Video Failed':
@@ -770,6 +781,13 @@ if 'current_workflow_id' in st.session_state:
                 elif current_status == 'Completed':
                     st.progress(1.0, "✅ Complete pipeline finished!")
                     st.success("🎉 All content generated successfully!")
+                elif current_status == 'Cancelling':
+                    st.progress(0.0, "🛑 Cancelling - stopping at the next step...")
+                elif current_status == 'Cancelled':
+                    st.progress(0.0, "🛑 Workflow cancelled")
+                elif current_status == 'Deadline Exceeded':
+                    st.progress(0.0, "⏱️ Deadline exceeded")
+                    st.error(f"⏱️ {status_data.get('error', 'The workflow could not finish before its deadline')}")
                 elif current_status == 'Failed':
                     st.progress(0.0, "❌ Pipeline failed")
                     st.error(f"❌ Workflow failed: {status_data.get('error', 'Unknown error')}")
@@ -777,18 +795,24 @@ if 'current_workflow_id' in st.session_state:
                     st.progress(0.1, f"🔄 Status: {current_status}")
 
             with col2:
-                if current_status in ['Completed', 'Failed', 'Video Failed']:
+                if current_status in ['Completed', 'Failed', 'Video Failed', 'Cancelled', 'Deadline Exceeded']:
                     if st.button("🎯 Clear Tracking"):
                         del st.session_state.current_workflow_id
                         st.rerun()
+                elif current_status != 'Cancelling':
+                    if st.button("🛑 Cancel Workflow"):
+                        secret = st.secrets.get("WEBHOOK_SECRET", os.getenv("WEBHOOK_SECRET", "n8n_s3cR3t_p@s5phr@s3_f0R_p1p3l1n3"))
+                        requests.delete(f"{backend_url}/api/workflow/{st.session_state.current_workflow_id}",
+                                        headers={"X-Webhook-Secret": secret}, timeout=10)
+                        st.rerun()
 
             st.info(f"📊 Current Status: {current_status}")
 
             # Auto-refresh only if workflow is still active AND auto-refresh is enabled
-            if (current_status not in ['Completed', 'Failed', 'Video Failed'] and
+            if (current_status not in ['Completed', 'Failed', 'Video Failed', 'Cancelled', 'Deadline Exceeded'] and
                 st.session_state.get('auto_refresh_enabled', False)):
-                st_autorefresh(interval=5000, key="active_workflow_refresh")  # 5 seconds for faster updates
-            elif current_status in ['Completed', 'Failed', 'Video Failed']:
+                watch_workflow = (backend_url, st.session_state.current_workflow_id, status_data.get('version', 0))
+            elif current_status in ['Completed', 'Failed', 'Video Failed', 'Cancelled', 'Deadline Exceeded']:
                 # Disable auto-refresh when workflow completes
                 st.session_state.auto_refresh_enabled = False
 
@@ -824,7 +848,8 @@ with col1:
 with col2:
     # Auto-refresh checkbox that respects session state
     current_auto_refresh = st.session_state.get('auto_refresh_enabled', False)
-    auto_refresh = st.checkbox("Auto-refresh (5s)", value=current_auto_refresh)
+    auto_refresh = st.checkbox("Auto-refresh (live)", value=current_auto_refresh,
+                               help="Active workflows update as their status changes; other views every 5s")
 
     # Update session state when checkbox changes
     if auto_refresh != current_auto_refresh:
@@ -1234,3 +1259,18 @@ with tab3:
 
 # System status section removed as requested
 
+# Live workflow updates: a short long-poll of the status endpoint (returns the moment the
+# status changes) then re-render. The script blocks while it waits, so keep the wait short
+# enough that widgets clicked meanwhile still feel responsive.
+if watch_workflow:
+    watch_url, watch_id, watch_version = watch_workflow
+    long_poll_seconds = min(float(os.getenv("STATUS_LONG_POLL_SECONDS", "2")), 5.0)
+    try:
+        requests.get(f"{watch_url}/api/workflow/status/{watch_id}",
+                     params={"cursor": watch_version, "wait": long_poll_seconds},
+                     timeout=long_poll_seconds + 10)
+    except requests.RequestException:
+        # Backend unreachable: back off instead of spinning
+        time.sleep(long_poll_seconds)
+    st.rerun()
+